@@ -7,9 +7,13 @@ from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy import desc
 from backend.models import Achievement, UserAchievement, Hike, User
+from backend.redis_client import redis_client
 
 logger = logging.getLogger("EcoAtlas.Achievements")
 
+# NPS park data is effectively static; share lookups across users for a day
+PARK_BADGE_CACHE_TTL = 24 * 60 * 60
+
 
 def compute_achievements(user_id: str, hike_id: str, db: Session) -> List[str]:
     """Compute and unlock achievements for a hike"""
@@ -212,7 +216,7 @@ def _get_park_achievement_code(park_name: str) -> str:
 def _get_park_logo_url(park_name: str) -> str:
     """Get official NPS badge/logo URL for a park using NPS API or known codes"""
     import os
-    import requests
+    from backend.http_session import http_session
     
     # Known NPS park codes for faster lookup
     NPS_PARK_CODES = {
@@ -241,7 +245,7 @@ def _get_park_logo_url(park_name: str) -> str:
         # Try NPS API
         nps_api_key = os.getenv("NPS_API_KEY", "demo")
         try:
-            resp = requests.get(
+            resp = http_session.get(
                 "https://developer.nps.gov/api/v1/parks",
                 params={"q": park_name, "limit": 1, "api_key": nps_api_key},
                 timeout=5,
@@ -269,10 +273,15 @@ def _get_park_logo_url(park_name: str) -> str:
 
 
 async def get_park_badge_info(park_name: str) -> Dict[str, Any]:
-    """Fetch detailed park badge/image info from NPS API"""
+    """Fetch detailed park badge/image info from NPS API (cached per park name)"""
     import os
     import httpx
     
+    cache_key = f"nps:badge:{(park_name or '').strip().lower()}"
+    cached = redis_client.get(cache_key)
+    if cached:
+        return cached
+    
     nps_api_key = os.getenv("NPS_API_KEY", "demo")
     
     try:
@@ -287,7 +296,7 @@ async def get_park_badge_info(park_name: str) -> Dict[str, Any]:
                 if parks:
                     park = parks[0]
                     images = park.get("images", [])
-                    return {
+                    info = {
                         "park_code": park.get("parkCode"),
                         "name": park.get("fullName"),
                         "designation": park.get("designation"),
@@ -301,6 +310,8 @@ async def get_park_badge_info(park_name: str) -> Dict[str, Any]:
                             for img in images[:5]
                         ],
                     }
+                    redis_client.set(cache_key, info, ttl=PARK_BADGE_CACHE_TTL)
+                    return info
     except Exception as e:
         logger.error(f"Error fetching park badge info: {e}")
     
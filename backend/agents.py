@@ -2,9 +2,9 @@
 AI Agent definitions for EcoAtlas
 """
 import os
-import json
 import logging
 import asyncio
+import orjson
 from typing import List, Any, Optional
 from google import genai
 from google.genai import types
@@ -65,10 +65,14 @@ class Agent:
             )
             
             if response_schema:
-                text = response.text.strip()
-                if text.startswith("```json"): text = text[7:]
-                if text.endswith("```"): text = text[:-3]
-                return json.loads(text.strip())
+                try:
+                    return orjson.loads(response.text)
+                except orjson.JSONDecodeError:
+                    # Fall back to stripping a stray ```json fence
+                    text = response.text.strip()
+                    if text.startswith("```json"): text = text[7:]
+                    if text.endswith("```"): text = text[:-3]
+                    return orjson.loads(text.strip())
             return response.text
         except Exception as e:
             logger.error(f"Agent {self.name} failed: {str(e)}")
@@ -5,6 +5,7 @@ import os
 import logging
 import base64
 import asyncio
+from pathlib import Path
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 from sqlalchemy.orm import Session
@@ -151,8 +152,7 @@ async def generate_trail_video_veo(
             # Read the photo if it's a local file
             try:
                 if photo_path.startswith('/'):
-                    with open(photo_path, 'rb') as f:
-                        image_data = f.read()
+                    image_data = await asyncio.to_thread(Path(photo_path).read_bytes)
                     image_base64 = base64.b64encode(image_data).decode('utf-8')
                 else:
                     # URL - would need to download
@@ -277,7 +277,8 @@ Return as JSON with: story, highlights (array), emotional_journey (array of {{ti
         
         client = get_gemini_client(api_key)
         
-        response = client.models.generate_content(
+        response = await asyncio.to_thread(
+            client.models.generate_content,
             model="gemini-2.0-flash",  # Using flash for now, upgrade to 3-pro for production
             contents=prompt,
             config={
@@ -429,7 +430,8 @@ User has completed {len(hikes)} hikes:
 
 Return JSON with: patterns (array of {{pattern, confidence, explanation}}), recommendations (array of {{trail_id, reason, match_score}}), progress_predictions (array), skill_development (object)."""
         
-        response = client.models.generate_content(
+        response = await asyncio.to_thread(
+            client.models.generate_content,
             model="gemini-2.0-flash",
             contents=prompt,
             config={
@@ -493,7 +495,8 @@ Entries:
 
 Return JSON with: results (array of {{hike_id, relevance_score, matched_snippets, highlights}}), suggestions (array of related search terms)."""
         
-        response = client.models.generate_content(
+        response = await asyncio.to_thread(
+            client.models.generate_content,
             model="gemini-2.0-flash",
             contents=prompt,
             config={
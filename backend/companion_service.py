@@ -4,6 +4,7 @@ Real-time companion service for hiking - identifies vegetation, wildlife, and pr
 import os
 import logging
 import base64
+from functools import lru_cache
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 from google import genai
@@ -471,6 +472,7 @@ Return as JSON:
             }
 
 
+@lru_cache(maxsize=4)
 def get_companion_service(api_key: str) -> HikingCompanion:
-    """Get or create companion service instance"""
+    """Get or create companion service instance (one per API key, reused across requests)"""
     return HikingCompanion(api_key)
@@ -2,12 +2,15 @@
 Database configuration and session management
 Supports both SQLite (development) and PostgreSQL (production)
 """
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text, select, update, delete, func, and_
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import StaticPool, QueuePool
 import os
+import time
 import logging
-from backend.models import Base
+from collections import defaultdict
+from datetime import datetime
+from backend.models import Base, HikeCheckpointProgress, TrailCheckpoint
 
 logger = logging.getLogger("EcoAtlas.Database")
 
@@ -17,6 +20,9 @@ DATABASE_URL = os.getenv(
     "sqlite:///./ecoatlas.db"  # Default to SQLite for development
 )
 
+# Compiled-statement cache entries; hot endpoints reuse a small set of SELECTs
+QUERY_CACHE_SIZE = int(os.getenv("DB_QUERY_CACHE_SIZE", "1200"))
+
 # Create engine with appropriate configuration
 if DATABASE_URL.startswith("sqlite"):
     # SQLite configuration (development)
@@ -24,37 +30,143 @@ if DATABASE_URL.startswith("sqlite"):
         DATABASE_URL,
         connect_args={"check_same_thread": False},
         poolclass=StaticPool,
+        query_cache_size=QUERY_CACHE_SIZE,
         echo=False,  # Set to True for SQL query logging
     )
     logger.info("Using SQLite database (development mode)")
 else:
     # PostgreSQL configuration (production)
     # Parse connection pool settings from environment
-    pool_size = int(os.getenv("DB_POOL_SIZE", "5"))
-    max_overflow = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    pool_size = int(os.getenv("DB_POOL_SIZE", "20"))
+    max_overflow = int(os.getenv("DB_MAX_OVERFLOW", "30"))
+    pool_timeout = int(os.getenv("DB_POOL_TIMEOUT", "10"))
+    pool_recycle = int(os.getenv("DB_POOL_RECYCLE", "1800"))
     
     engine = create_engine(
         DATABASE_URL,
         poolclass=QueuePool,
         pool_size=pool_size,
         max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        pool_recycle=pool_recycle,
         pool_pre_ping=True,  # Verify connections before using
+        pool_use_lifo=True,  # Reuse the most recently returned (warm) connection first
+        query_cache_size=QUERY_CACHE_SIZE,
         echo=False,  # Set to True for SQL query logging
     )
     logger.info(f"Using PostgreSQL database (production mode) - Pool size: {pool_size}, Max overflow: {max_overflow}")
 
+# Log slow statements so N+1 patterns and missing indexes show up in the logs
+SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "100"))
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_start_time"].pop()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if elapsed_ms > SLOW_QUERY_MS:
+        logger.warning(f"Slow query ({elapsed_ms:.1f} ms): {statement}")
+
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+def _merge_progress_rows(rows, checkpoint_activities):
+    """Fold duplicate progress rows for one checkpoint into the values of a single row.
+
+    Activities and photos are unioned; XP is re-derived from the merged
+    activities when the checkpoint still defines them, and never drops below
+    what any single row already held.
+    """
+    # Survivor: the row carrying the most progress, newest on ties
+    keep = max(rows, key=lambda r: (r.xp_earned or 0, r.updated_at or datetime.min))
+    activities, photos = [], []
+    for row in sorted(rows, key=lambda r: r.created_at or datetime.min):
+        activities += [a for a in (row.activities_completed or []) if a not in activities]
+        photos += [p for p in (row.photos_taken or []) if p not in photos]
+    xp = max(r.xp_earned or 0 for r in rows)
+    if checkpoint_activities:
+        xp_by_id = {a.get("id"): a.get("xp", 0) for a in checkpoint_activities if isinstance(a, dict)}
+        xp = max(xp, sum(xp_by_id.get(a, 0) for a in activities))
+    reached = [r.reached_at for r in rows if r.reached_at]
+    updated = [r.updated_at for r in rows if r.updated_at]
+    return keep.id, {
+        "activities_completed": activities,
+        "photos_taken": photos,
+        "xp_earned": xp,
+        "reached_at": min(reached) if reached else None,
+        "updated_at": max(updated) if updated else None,
+    }
+
+
+def ensure_checkpoint_progress_index(bind=None):
+    """Add the (hike_id, checkpoint_id) unique index to pre-existing tables.
+
+    create_all() never adds indexes to tables that already exist, and the
+    checkpoint reach insert relies on this index for ON CONFLICT. Duplicate
+    rows (left by the old select-then-insert race) are merged into one row
+    before the index is built, so no completed activity or XP is lost.
+    """
+    bind = bind or engine
+    index_name = "ix_hike_checkpoint_progress_hike_checkpoint"
+    inspector = inspect(bind)
+    if not inspector.has_table("hike_checkpoint_progress"):
+        return
+    if any(ix["name"] == index_name for ix in inspector.get_indexes("hike_checkpoint_progress")):
+        return
+    progress = HikeCheckpointProgress.__table__
+    checkpoints = TrailCheckpoint.__table__
+    merged = 0
+    with bind.begin() as conn:
+        duplicated = (
+            select(progress.c.hike_id, progress.c.checkpoint_id)
+            .group_by(progress.c.hike_id, progress.c.checkpoint_id)
+            .having(func.count() > 1)
+        ).subquery()
+        rows = conn.execute(
+            select(progress, checkpoints.c.activities.label("checkpoint_activities"))
+            .join(duplicated, and_(
+                progress.c.hike_id == duplicated.c.hike_id,
+                progress.c.checkpoint_id == duplicated.c.checkpoint_id,
+            ))
+            .outerjoin(checkpoints, checkpoints.c.id == progress.c.checkpoint_id)
+        ).all()
+        groups = defaultdict(list)
+        for row in rows:
+            groups[(row.hike_id, row.checkpoint_id)].append(row)
+        for group in groups.values():
+            keep_id, values = _merge_progress_rows(group, group[0].checkpoint_activities)
+            conn.execute(update(progress).where(progress.c.id == keep_id).values(**values))
+            conn.execute(delete(progress).where(
+                progress.c.id.in_([r.id for r in group if r.id != keep_id])
+            ))
+            merged += len(group) - 1
+        conn.execute(text(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {index_name} "
+            "ON hike_checkpoint_progress (hike_id, checkpoint_id)"
+        ))
+    logger.info(f"Created {index_name} (merged {merged} duplicate checkpoint progress rows)")
+
+
 def init_db():
     """Initialize database tables"""
     Base.metadata.create_all(bind=engine)
+    ensure_checkpoint_progress_index()
     print("Database initialized")
 
 
 def get_db() -> Session:
-    """Dependency for getting database session"""
+    """Dependency for getting database session.
+
+    Sessions are synchronous; endpoints that only touch the database should be
+    declared with plain ``def`` so FastAPI runs them in its threadpool instead
+    of blocking the event loop.
+    """
     db = SessionLocal()
     try:
         yield db
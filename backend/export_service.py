@@ -1,125 +1,197 @@
 """
 Export service
 """
-import json
 import csv
 import io
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Iterator, Iterable, List
+import orjson
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from backend.database import SessionLocal
 from backend.models import Hike, RoutePoint, SensorBatch, Media, Discovery
 
 logger = logging.getLogger("EcoAtlas.Export")
 
+EXPORT_FORMATS = ("json", "csv")
 
-def export_hike_data(hike_id: str, user_id: str, format: str = "json", db: Session = None) -> Optional[bytes]:
-    """Export hike data as JSON or CSV"""
-    if not db:
-        return None
-    
+# Rows fetched per round trip and serialized per yielded chunk
+EXPORT_BATCH_SIZE = 500
+
+
+def _iso(value) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def _rows(db: Session, model, hike_id: str) -> Iterable:
+    """Stream a hike's child rows in batches instead of loading them all"""
+    return db.scalars(
+        select(model)
+        .where(model.hike_id == hike_id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+
+
+def _hike_dict(hike: Hike) -> Dict[str, Any]:
+    return {
+        "id": hike.id,
+        "status": hike.status,
+        "start_time": _iso(hike.start_time),
+        "end_time": _iso(hike.end_time),
+        "distance_miles": hike.distance_miles,
+        "duration_minutes": hike.duration_minutes,
+        "elevation_gain_feet": hike.elevation_gain_feet,
+        "max_altitude_feet": hike.max_altitude_feet,
+        "weather": hike.weather,
+        "metadata": hike.meta_data
+    }
+
+
+def _route_point_dict(rp: RoutePoint) -> Dict[str, Any]:
+    return {
+        "timestamp": rp.timestamp.isoformat(),
+        "latitude": rp.latitude,
+        "longitude": rp.longitude,
+        "altitude": rp.altitude,
+        "accuracy": rp.accuracy
+    }
+
+
+def _sensor_batch_dict(sb: SensorBatch) -> Dict[str, Any]:
+    return {
+        "timestamp": sb.timestamp.isoformat(),
+        "heart_rate": sb.heart_rate,
+        "cadence": sb.cadence,
+        "pace": sb.pace,
+        "altitude": sb.altitude,
+        "pressure": sb.pressure,
+        "temperature": sb.temperature
+    }
+
+
+def _media_dict(m: Media) -> Dict[str, Any]:
+    return {
+        "id": m.id,
+        "type": m.type,
+        "category": m.category,
+        "url": m.url,
+        "created_at": _iso(m.created_at),
+        "location": m.location
+    }
+
+
+def _discovery_dict(d: Discovery) -> Dict[str, Any]:
+    return {
+        "type": d.discovery_type,
+        "description": d.description,
+        "confidence": d.confidence,
+        "timestamp": _iso(d.timestamp),
+        "location": d.location
+    }
+
+
+def _json_array(items: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    """Serialize items as a JSON array, one chunk per EXPORT_BATCH_SIZE items"""
+    parts: List[bytes] = [b"["]
+    for i, item in enumerate(items):
+        if i:
+            parts.append(b",")
+        parts.append(orjson.dumps(item))
+        if len(parts) >= EXPORT_BATCH_SIZE * 2:
+            yield b"".join(parts)
+            parts = []
+    parts.append(b"]")
+    yield b"".join(parts)
+
+
+def _iter_json(db: Session, hike_id: str, summary: Dict[str, Any]) -> Iterator[bytes]:
+    yield b'{"hike":' + orjson.dumps(summary)
+    sections = (
+        ("route_points", RoutePoint, _route_point_dict),
+        ("sensor_batches", SensorBatch, _sensor_batch_dict),
+        ("media", Media, _media_dict),
+        ("discoveries", Discovery, _discovery_dict),
+    )
+    for name, model, to_dict in sections:
+        yield b',"' + name.encode() + b'":'
+        yield from _json_array(to_dict(row) for row in _rows(db, model, hike_id))
+    yield b"}"
+
+
+def _iter_csv(db: Session, hike_id: str, summary: Dict[str, Any]) -> Iterator[bytes]:
+    output = io.StringIO()
+    writer = csv.writer(output)
+
+    def flush() -> bytes:
+        chunk = output.getvalue().encode("utf-8")
+        output.seek(0)
+        output.truncate(0)
+        return chunk
+
+    # Write hike summary
+    writer.writerow(["Field", "Value"])
+    writer.writerow(["Hike ID", summary["id"]])
+    writer.writerow(["Start Time", summary["start_time"] or ""])
+    writer.writerow(["End Time", summary["end_time"] or ""])
+    writer.writerow(["Distance (miles)", summary["distance_miles"] or ""])
+    writer.writerow(["Duration (minutes)", summary["duration_minutes"] or ""])
+    writer.writerow([])
+
+    # Write route points
+    writer.writerow(["Route Points"])
+    writer.writerow(["Timestamp", "Latitude", "Longitude", "Altitude", "Accuracy"])
+    yield flush()
+    for i, rp in enumerate(_rows(db, RoutePoint, hike_id), 1):
+        writer.writerow([
+            rp.timestamp.isoformat(),
+            rp.latitude,
+            rp.longitude,
+            rp.altitude or "",
+            rp.accuracy or ""
+        ])
+        if i % EXPORT_BATCH_SIZE == 0:
+            yield flush()
+    writer.writerow([])
+
+    # Write discoveries
+    writer.writerow(["Discoveries"])
+    writer.writerow(["Type", "Description", "Confidence", "Timestamp"])
+    for i, d in enumerate(_rows(db, Discovery, hike_id), 1):
+        writer.writerow([
+            d.discovery_type,
+            d.description or "",
+            d.confidence,
+            _iso(d.timestamp) or ""
+        ])
+        if i % EXPORT_BATCH_SIZE == 0:
+            yield flush()
+    yield flush()
+
+
+def _stream_export(bind, hike_id: str, summary: Dict[str, Any], format: str) -> Iterator[bytes]:
+    # The request's session is closed before the body streams; read the child
+    # rows through our own session on the same engine
+    db = SessionLocal(bind=bind)
     try:
-        hike = db.query(Hike).filter(
-            Hike.id == hike_id,
-            Hike.user_id == user_id
-        ).first()
-        
-        if not hike:
-            return None
-        
-        # Fetch all related data
-        route_points = db.query(RoutePoint).filter(RoutePoint.hike_id == hike_id).all()
-        sensor_batches = db.query(SensorBatch).filter(SensorBatch.hike_id == hike_id).all()
-        media_list = db.query(Media).filter(Media.hike_id == hike_id).all()
-        discoveries = db.query(Discovery).filter(Discovery.hike_id == hike_id).all()
-        
-        data = {
-            "hike": {
-                "id": hike.id,
-                "status": hike.status,
-                "start_time": hike.start_time.isoformat() if hike.start_time else None,
-                "end_time": hike.end_time.isoformat() if hike.end_time else None,
-                "distance_miles": hike.distance_miles,
-                "duration_minutes": hike.duration_minutes,
-                "elevation_gain_feet": hike.elevation_gain_feet,
-                "max_altitude_feet": hike.max_altitude_feet,
-                "weather": hike.weather,
-                "metadata": hike.meta_data
-            },
-            "route_points": [{
-                "timestamp": rp.timestamp.isoformat(),
-                "latitude": rp.latitude,
-                "longitude": rp.longitude,
-                "altitude": rp.altitude,
-                "accuracy": rp.accuracy
-            } for rp in route_points],
-            "sensor_batches": [{
-                "timestamp": sb.timestamp.isoformat(),
-                "heart_rate": sb.heart_rate,
-                "cadence": sb.cadence,
-                "pace": sb.pace,
-                "altitude": sb.altitude,
-                "pressure": sb.pressure,
-                "temperature": sb.temperature
-            } for sb in sensor_batches],
-            "media": [{
-                "id": m.id,
-                "type": m.type,
-                "category": m.category,
-                "url": m.url,
-                "created_at": m.created_at.isoformat() if m.created_at else None,
-                "location": m.location
-            } for m in media_list],
-            "discoveries": [{
-                "type": d.discovery_type,
-                "description": d.description,
-                "confidence": d.confidence,
-                "timestamp": d.timestamp.isoformat() if d.timestamp else None,
-                "location": d.location
-            } for d in discoveries]
-        }
-        
         if format == "json":
-            return json.dumps(data, indent=2).encode("utf-8")
-        elif format == "csv":
-            output = io.StringIO()
-            writer = csv.writer(output)
-            
-            # Write hike summary
-            writer.writerow(["Field", "Value"])
-            writer.writerow(["Hike ID", hike.id])
-            writer.writerow(["Start Time", hike.start_time.isoformat() if hike.start_time else ""])
-            writer.writerow(["End Time", hike.end_time.isoformat() if hike.end_time else ""])
-            writer.writerow(["Distance (miles)", hike.distance_miles or ""])
-            writer.writerow(["Duration (minutes)", hike.duration_minutes or ""])
-            writer.writerow([])
-            
-            # Write route points
-            writer.writerow(["Route Points"])
-            writer.writerow(["Timestamp", "Latitude", "Longitude", "Altitude", "Accuracy"])
-            for rp in route_points:
-                writer.writerow([
-                    rp.timestamp.isoformat(),
-                    rp.latitude,
-                    rp.longitude,
-                    rp.altitude or "",
-                    rp.accuracy or ""
-                ])
-            writer.writerow([])
-            
-            # Write discoveries
-            writer.writerow(["Discoveries"])
-            writer.writerow(["Type", "Description", "Confidence", "Timestamp"])
-            for d in discoveries:
-                writer.writerow([
-                    d.discovery_type,
-                    d.description or "",
-                    d.confidence,
-                    d.timestamp.isoformat() if d.timestamp else ""
-                ])
-            
-            return output.getvalue().encode("utf-8")
+            yield from _iter_json(db, hike_id, summary)
         else:
-            return None
-    except Exception as e:
-        logger.error(f"Error exporting hike data: {e}")
+            yield from _iter_csv(db, hike_id, summary)
+    finally:
+        db.close()
+
+
+def export_hike_data(hike_id: str, user_id: str, format: str = "json", db: Session = None) -> Optional[Iterator[bytes]]:
+    """
+    Export hike data as JSON or CSV.
+    Returns an iterator of encoded chunks, or None if the hike isn't the user's
+    or the format is unsupported.
+    """
+    if not db or format not in EXPORT_FORMATS:
+        return None
+
+    hike = db.get(Hike, hike_id)
+    if not hike or hike.user_id != user_id:
         return None
+
+    return _stream_export(db.get_bind(), hike_id, _hike_dict(hike), format)
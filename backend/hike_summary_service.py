@@ -2,17 +2,145 @@
 Hike summary service using Gemini Vision to automatically generate comprehensive hike summaries
 """
 import os
+import uuid
+import asyncio
 import logging
 import base64
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Set
 from datetime import datetime
 from sqlalchemy.orm import Session
-from backend.models import Hike, Media, Discovery, RoutePoint
+from backend.database import SessionLocal
+from backend.models import Hike, Media, Discovery
 from google import genai
 from google.genai import types
 
 logger = logging.getLogger("EcoAtlas.HikeSummary")
 
+# In-memory job store keyed by hike_id (latest summary job per hike)
+_summary_jobs: Dict[str, Dict[str, Any]] = {}
+
+# Strong references to running jobs; the event loop only keeps weak ones
+_summary_tasks: Set[asyncio.Task] = set()
+
+
+def start_hike_summary_job(hike_id: str, api_key: str) -> Dict[str, Any]:
+    """Queue summary generation for a hike and return the job record"""
+    job = {
+        "id": str(uuid.uuid4()),
+        "hike_id": hike_id,
+        "status": "queued",
+        "created_at": datetime.utcnow().isoformat(),
+        "updated_at": datetime.utcnow().isoformat(),
+        "error": None,
+        "result": None,
+    }
+    _summary_jobs[hike_id] = job
+    
+    # Start generation asynchronously (don't await)
+    task = asyncio.create_task(_process_summary_job(job["id"], hike_id, api_key))
+    _summary_tasks.add(task)
+    task.add_done_callback(_summary_tasks.discard)
+    return job
+
+
+def get_hike_summary_job(hike_id: str) -> Optional[Dict[str, Any]]:
+    """Get the latest summary job for a hike"""
+    return _summary_jobs.get(hike_id)
+
+
+async def _process_summary_job(job_id: str, hike_id: str, api_key: str) -> None:
+    job = _summary_jobs.get(hike_id)
+    if not job or job["id"] != job_id:
+        return
+    
+    job["status"] = "processing"
+    job["updated_at"] = datetime.utcnow().isoformat()
+    
+    try:
+        # The request's session is closed by the time this runs; use our own
+        db = SessionLocal()
+        try:
+            result = await generate_hike_summary(hike_id, db, api_key)
+        finally:
+            db.close()
+    except Exception as e:
+        logger.error(f"Summary job {job_id} for hike {hike_id} failed: {e}", exc_info=True)
+        result = {"success": False, "error": str(e)}
+    
+    if result.get("success"):
+        job["status"] = "completed"
+        job["result"] = result
+    else:
+        job["status"] = "failed"
+        job["error"] = result.get("error", "Failed to generate summary")
+    job["updated_at"] = datetime.utcnow().isoformat()
+
+
+def _load_summary_inputs(hike_id: str, db: Session) -> Optional[Dict[str, Any]]:
+    """Blocking part of summary generation: DB queries and photo reads"""
+    hike = db.query(Hike).filter(Hike.id == hike_id).first()
+    if not hike:
+        return None
+    
+    # Get all media (photos)
+    photos = db.query(Media).filter(
+        Media.hike_id == hike_id,
+        Media.type == 'photo'
+    ).all()
+    
+    # Get discoveries
+    discoveries = db.query(Discovery).filter(Discovery.hike_id == hike_id).all()
+    
+    # Build context
+    trail_name = hike.trail.name if hike.trail else "Unknown Trail"
+    place_name = hike.trail.place.name if hike.trail and hike.trail.place else "Unknown Place"
+    
+    hike_duration = ""
+    if hike.duration_minutes:
+        hours = hike.duration_minutes // 60
+        minutes = hike.duration_minutes % 60
+        hike_duration = f"{hours}h {minutes}m" if hours > 0 else f"{minutes}m"
+    
+    discoveries_summary = []
+    for disc in discoveries:
+        discoveries_summary.append({
+            "type": disc.discovery_type,
+            "description": disc.description,
+            "confidence": disc.confidence,
+            "timestamp": disc.timestamp.isoformat() if disc.timestamp else None
+        })
+    
+    # Prepare photos for analysis
+    photo_parts = []
+    for photo in photos[:10]:  # Limit to 10 photos for analysis
+        try:
+            if photo.file_path:
+                with open(photo.file_path, 'rb') as f:
+                    photo_data = f.read()
+            else:
+                # URL-only photos would need a fetch - for now skip
+                continue
+            
+            photo_parts.append(types.Part.from_bytes(
+                data=photo_data,
+                mime_type="image/jpeg"
+            ))
+        except Exception as e:
+            logger.warning(f"Could not load photo {photo.id}: {e}")
+            continue
+    
+    return {
+        "trail_name": trail_name,
+        "place_name": place_name,
+        "hike_duration": hike_duration,
+        "distance_info": f"{hike.distance_miles:.2f} miles" if hike.distance_miles else "Unknown distance",
+        "elevation_info": f"+{int(hike.elevation_gain_feet)} ft" if hike.elevation_gain_feet else "Unknown elevation",
+        "date": hike.start_time.strftime('%B %d, %Y') if hike.start_time else 'Unknown',
+        "discoveries_summary": discoveries_summary,
+        "photo_parts": photo_parts,
+    }
+
+
 async def generate_hike_summary(
     hike_id: str,
     db: Session,
@@ -34,79 +162,23 @@ async def generate_hike_summary(
     try:
         client = genai.Client(api_key=api_key)
         
-        # Get hike data
-        hike = db.query(Hike).filter(Hike.id == hike_id).first()
-        if not hike:
+        # Queries and file reads are blocking; keep them off the event loop
+        inputs = await asyncio.to_thread(_load_summary_inputs, hike_id, db)
+        if inputs is None:
             return {"success": False, "error": "Hike not found"}
-        
-        # Get all media (photos)
-        photos = db.query(Media).filter(
-            Media.hike_id == hike_id,
-            Media.type == 'photo'
-        ).all()
-        
-        # Get discoveries
-        discoveries = db.query(Discovery).filter(Discovery.hike_id == hike_id).all()
-        
-        # Get route points for elevation profile
-        route_points = db.query(RoutePoint).filter(RoutePoint.hike_id == hike_id).order_by(RoutePoint.timestamp).all()
-        
-        # Build context
-        trail_name = hike.trail.name if hike.trail else "Unknown Trail"
-        place_name = hike.trail.place.name if hike.trail and hike.trail.place else "Unknown Place"
-        
-        hike_duration = ""
-        if hike.duration_minutes:
-            hours = hike.duration_minutes // 60
-            minutes = hike.duration_minutes % 60
-            hike_duration = f"{hours}h {minutes}m" if hours > 0 else f"{minutes}m"
-        
-        distance_info = f"{hike.distance_miles:.2f} miles" if hike.distance_miles else "Unknown distance"
-        elevation_info = f"+{int(hike.elevation_gain_feet)} ft" if hike.elevation_gain_feet else "Unknown elevation"
-        
-        discoveries_summary = []
-        for disc in discoveries:
-            discoveries_summary.append({
-                "type": disc.discovery_type,
-                "description": disc.description,
-                "confidence": disc.confidence,
-                "timestamp": disc.timestamp.isoformat() if disc.timestamp else None
-            })
-        
-        # Prepare photos for analysis
-        photo_parts = []
-        photo_descriptions = []
-        
-        for i, photo in enumerate(photos[:10]):  # Limit to 10 photos for analysis
-            try:
-                if photo.file_path:
-                    with open(photo.file_path, 'rb') as f:
-                        photo_data = f.read()
-                elif photo.url:
-                    # If URL, would need to fetch - for now skip
-                    continue
-                else:
-                    continue
-                
-                photo_parts.append(types.Part.from_bytes(
-                    data=photo_data,
-                    mime_type="image/jpeg"
-                ))
-                photo_descriptions.append(f"Photo {i+1}: Taken during hike")
-            except Exception as e:
-                logger.warning(f"Could not load photo {photo.id}: {e}")
-                continue
+        discoveries_summary = inputs["discoveries_summary"]
+        photo_parts = inputs["photo_parts"]
         
         # Build comprehensive prompt
         prompt = f"""You are an expert hiking companion and naturalist. Analyze this completed hike and generate a comprehensive, engaging summary.
 
 HIKE INFORMATION:
-- Trail: {trail_name}
-- Location: {place_name}
-- Distance: {distance_info}
-- Elevation Gain: {elevation_info}
-- Duration: {hike_duration}
-- Date: {hike.start_time.strftime('%B %d, %Y') if hike.start_time else 'Unknown'}
+- Trail: {inputs["trail_name"]}
+- Location: {inputs["place_name"]}
+- Distance: {inputs["distance_info"]}
+- Elevation Gain: {inputs["elevation_info"]}
+- Duration: {inputs["hike_duration"]}
+- Date: {inputs["date"]}
 
 DISCOVERIES MADE:
 {chr(10).join([f"- {d['type']}: {d['description']}" for d in discoveries_summary]) if discoveries_summary else "No specific discoveries logged"}
@@ -164,7 +236,8 @@ Return as JSON:
         if photo_parts:
             contents.extend(photo_parts)
         
-        response = client.models.generate_content(
+        response = await asyncio.to_thread(
+            client.models.generate_content,
             model="gemini-2.0-flash",
             contents=contents,
             config={
@@ -193,7 +266,7 @@ Return as JSON:
             "summary": summary,
             "hike_id": hike_id,
             "photos_analyzed": len(photo_parts),
-            "discoveries_count": len(discoveries),
+            "discoveries_count": len(discoveries_summary),
             "generated_at": datetime.utcnow().isoformat()
         }
         
@@ -246,7 +319,8 @@ Return as JSON:
   "personal_reflection": "Reflection on the discovery moment"
 }}"""
 
-        response = client.models.generate_content(
+        response = await asyncio.to_thread(
+            client.models.generate_content,
             model="gemini-2.0-flash",
             contents=prompt,
             config={
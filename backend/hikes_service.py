@@ -6,7 +6,7 @@ import logging
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import desc, insert
 from backend.models import Hike, RoutePoint, SensorBatch, Trail, Place
 
 logger = logging.getLogger("EcoAtlas.Hikes")
@@ -120,19 +120,25 @@ def upload_route_points(hike_id: str, points: List[Dict[str, Any]], db: Session)
         if not hike:
             return False
         
+        rows = []
         for point_data in points:
-            point = RoutePoint(
-                id=str(uuid.uuid4()),
-                hike_id=hike_id,
-                segment_id=point_data.get("segment_id"),
-                timestamp=datetime.fromisoformat(point_data["timestamp"].replace("Z", "+00:00")),
-                latitude=point_data["latitude"],
-                longitude=point_data["longitude"],
-                altitude=point_data.get("altitude"),
-                accuracy=point_data.get("accuracy")
-            )
-            db.add(point)
+            timestamp = point_data["timestamp"]
+            if isinstance(timestamp, str):
+                timestamp = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+            rows.append({
+                "id": str(uuid.uuid4()),
+                "hike_id": hike_id,
+                "segment_id": point_data.get("segment_id"),
+                "timestamp": timestamp,
+                "latitude": point_data["latitude"],
+                "longitude": point_data["longitude"],
+                "altitude": point_data.get("altitude"),
+                "accuracy": point_data.get("accuracy"),
+            })
         
+        # Single executemany INSERT instead of one ORM object per point
+        if rows:
+            db.execute(insert(RoutePoint), rows)
         db.commit()
         return True
     except Exception as e:
@@ -0,0 +1,30 @@
+"""
+Shared requests session for synchronous outbound HTTP (NPS scraping, map downloads)
+Keeps pooled keep-alive connections so repeat calls to the same hosts skip DNS/TCP/TLS setup
+"""
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+USER_AGENT = "EcoTrails/1.0"
+
+
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    retry = Retry(
+        total=2,
+        backoff_factor=0.1,
+        status_forcelist=[502, 503, 504],
+        allowed_methods=["GET", "HEAD"],
+        # Hand the last response back so callers keep checking status_code themselves
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=20, pool_maxsize=50, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"User-Agent": USER_AGENT})
+    return session
+
+
+# Global session instance
+http_session = _build_session()
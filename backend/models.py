@@ -3,12 +3,19 @@ Database models for EcoAtlas production system
 """
 from datetime import datetime
 from typing import Optional, Dict, Any
-from sqlalchemy import Column, String, Integer, DateTime, JSON, Float, ForeignKey, Boolean, Text, BigInteger, Numeric
+from sqlalchemy import Column, String, Integer, DateTime, JSON, Float, ForeignKey, Boolean, Text, BigInteger, Numeric, Index, DDL, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
 Base = declarative_base()
 
+# Trigram indexes below need pg_trgm; SQLite skips both the extension and the indexes
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
 
 class User(Base):
     """User accounts"""
@@ -45,6 +52,14 @@ class Place(Base):
     # Relationships
     trails = relationship("Trail", back_populates="place", cascade="all, delete-orphan")
     offline_map_assets = relationship("OfflineMapAsset", back_populates="place", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Lets place search's ILIKE '%q%' use an index instead of a sequential scan
+        Index("ix_places_name_trgm", "name", postgresql_using="gin",
+              postgresql_ops={"name": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+        Index("ix_places_description_trgm", "description", postgresql_using="gin",
+              postgresql_ops={"description": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+    )
 
 
 class Trail(Base):
@@ -183,6 +198,11 @@ class HikeCheckpointProgress(Base):
     
     # Relationships
     checkpoint = relationship("TrailCheckpoint")
+    
+    __table_args__ = (
+        # One progress row per checkpoint per hike; lets first-reach writes use INSERT .. ON CONFLICT
+        Index("ix_hike_checkpoint_progress_hike_checkpoint", "hike_id", "checkpoint_id", unique=True),
+    )
 
 
 class Hike(Base):
@@ -216,6 +236,16 @@ class Hike(Base):
     mastery_records = relationship("MasteryRecord", back_populates="hike", cascade="all, delete-orphan")
     sensory_memories = relationship("SensoryMemory", back_populates="hike", cascade="all, delete-orphan")
     journal_entries = relationship("JournalEntry", back_populates="hike", cascade="all, delete-orphan")
+    
+    @property
+    def safe_meta(self) -> dict:
+        """meta_data as a dict; legacy rows may hold NULL or a non-object JSON value"""
+        return self.meta_data if isinstance(self.meta_data, dict) else {}
+    
+    __table_args__ = (
+        # Serves "latest hike for user with status X" (active hike, history) without a sort
+        Index("ix_hikes_user_status_start", "user_id", "status", start_time.desc()),
+    )
 
 
 class RoutePoint(Base):
@@ -313,7 +343,7 @@ class Achievement(Base):
     name = Column(String, nullable=False)
     description = Column(Text, nullable=True)
     icon = Column(String, nullable=True)
-    category = Column(String, nullable=True)  # 'distance', 'elevation', 'wildlife', etc.
+    category = Column(String, nullable=True, index=True)  # 'distance', 'elevation', 'wildlife', etc.
     meta_data = Column(JSON, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     
@@ -335,6 +365,10 @@ class UserAchievement(Base):
     # Relationships
     user = relationship("User", back_populates="achievements")
     achievement = relationship("Achievement", back_populates="user_achievements")
+    
+    __table_args__ = (
+        Index("ix_user_achievements_user_achievement", "user_id", "achievement_id"),
+    )
 
 
 class Insight(Base):
@@ -592,6 +626,11 @@ class SocialPost(Base):
     place = relationship("Place")
     comments = relationship("PostComment", back_populates="post", cascade="all, delete-orphan")
     likes = relationship("PostLike", back_populates="post", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Serves the feed's (created_at, id) keyset pagination without a sort
+        Index("ix_social_posts_created_id", created_at.desc(), id.desc()),
+    )
 
 
 class PostComment(Base):
@@ -5,7 +5,7 @@ import re
 from typing import Any, Dict, List, Optional, Tuple
 from urllib.parse import urljoin, urlparse
 
-import requests
+from backend.http_session import http_session
 from bs4 import BeautifulSoup
 
 logger = logging.getLogger("EcoAtlas.NPSScraper")
@@ -60,7 +60,7 @@ def _absolute_nps_url(base_url: str, href: str) -> Optional[str]:
 
 def _head_pdf_ok(url: str) -> Tuple[bool, int, str]:
     try:
-        r = requests.head(url, timeout=10, allow_redirects=True, headers={"User-Agent": "EcoTrails/1.0"})
+        r = http_session.head(url, timeout=10, allow_redirects=True, headers={"User-Agent": "EcoTrails/1.0"})
         ct = (r.headers.get("content-type") or "").split(";")[0].strip().lower()
         return (r.status_code == 200 and "application/pdf" in ct, int(r.status_code), ct)
     except Exception:
@@ -90,7 +90,7 @@ def scrape_state_parks(state_code: str) -> Dict[str, Any]:
     """
     sc = (state_code or "").strip().lower()
     url = f"{NPS_BASE}/state/{sc}/index.htm"
-    resp = requests.get(url, timeout=15, headers={"User-Agent": "EcoTrails/1.0"})
+    resp = http_session.get(url, timeout=15, headers={"User-Agent": "EcoTrails/1.0"})
     if resp.status_code != 200:
         return {"success": False, "stateCode": sc, "url": url, "parks": []}
 
@@ -170,7 +170,7 @@ def scrape_park_detail(park_code: str) -> Dict[str, Any]:
     }
 
     def _get(u: str) -> Tuple[int, bytes]:
-        r = requests.get(u, timeout=15, headers={"User-Agent": "EcoTrails/1.0"})
+        r = http_session.get(u, timeout=15, headers={"User-Agent": "EcoTrails/1.0"})
         return int(r.status_code), (r.content or b"")
 
     index_status, index_html = _get(pages["index"])
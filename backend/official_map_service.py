@@ -14,7 +14,7 @@ from datetime import datetime
 from urllib.parse import urljoin, urlparse
 import re
 from difflib import SequenceMatcher
-import requests
+from backend.http_session import http_session
 from bs4 import BeautifulSoup
 
 logger = logging.getLogger(__name__)
@@ -255,7 +255,7 @@ def scrape_park_map_urls(park_url: str, park_name: str) -> List[Dict[str, Any]]:
     Returns list of found maps with URLs and descriptions
     """
     try:
-        response = requests.get(park_url, timeout=15, headers={
+        response = http_session.get(park_url, timeout=15, headers={
             'User-Agent': 'EcoTrails/1.0 (Educational trail mapping app)'
         })
         response.raise_for_status()
@@ -277,7 +277,7 @@ def scrape_park_map_urls(park_url: str, park_name: str) -> List[Dict[str, Any]]:
                 
                 try:
                     # Verify PDF is accessible
-                    head_response = requests.head(full_url, timeout=5, allow_redirects=True)
+                    head_response = http_session.head(full_url, timeout=5, allow_redirects=True)
                     if head_response.status_code == 200:
                         size_bytes = int(head_response.headers.get('content-length', 0))
                         maps.append({
@@ -428,7 +428,7 @@ def _head_accepts_pdf(url: str) -> Tuple[bool, int, str]:
     Returns (ok, status_code, content_type_lower).
     """
     try:
-        r = requests.head(url, timeout=10, allow_redirects=True, headers={"User-Agent": "EcoTrails/1.0"})
+        r = http_session.head(url, timeout=10, allow_redirects=True, headers={"User-Agent": "EcoTrails/1.0"})
         ct = (r.headers.get("content-type") or "").split(";")[0].strip().lower()
         return (r.status_code == 200 and "application/pdf" in ct, int(r.status_code), ct)
     except Exception:
@@ -475,7 +475,7 @@ def discover_maps(park_code: str) -> List[str]:
     candidates: List[str] = []
     for page_url in pages:
         try:
-            resp = requests.get(page_url, timeout=15, headers={"User-Agent": "EcoTrails/1.0"})
+            resp = http_session.get(page_url, timeout=15, headers={"User-Agent": "EcoTrails/1.0"})
             if resp.status_code != 200:
                 logger.info(f"[OfficialMapDiscovery] parkCode={park_code} page={page_url} status={resp.status_code}")
                 continue
@@ -543,7 +543,7 @@ class OfficialMapService:
             if key in normalized or normalized in key:
                 # Verify URL still works
                 try:
-                    response = requests.head(data["map_url"], timeout=5, allow_redirects=True)
+                    response = http_session.head(data["map_url"], timeout=5, allow_redirects=True)
                     if response.status_code == 200:
                         result = {
                             "success": True,
@@ -567,7 +567,7 @@ class OfficialMapService:
         if nps_api_key:
             try:
                 # Get park code from NPS API
-                response = requests.get(
+                response = http_session.get(
                     "https://developer.nps.gov/api/v1/parks",
                     params={"q": park_name, "limit": 5, "api_key": nps_api_key},
                     timeout=10
@@ -698,11 +698,9 @@ class OfficialMapService:
         Fetch map URL from NPS API.
         This is a secondary method if curated list doesn't have the park.
         """
-        import requests
-        
         try:
             # Search for park
-            response = requests.get(
+            response = http_session.get(
                 "https://developer.nps.gov/api/v1/parks",
                 params={
                     "q": park_name,
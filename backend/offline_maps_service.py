@@ -13,14 +13,16 @@ import time
 import hashlib
 import logging
 import pathlib
+import uuid
 from dataclasses import dataclass
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
 
-import requests
+from backend.http_session import http_session
 from sqlalchemy.orm import Session
 from difflib import SequenceMatcher
 
+from backend.database import SessionLocal
 from backend.models import Place, OfflineMapAsset
 from backend.official_map_service import NPS_MAP_DATABASE, discover_best_pdf_url
 from backend.official_map_cache import get_cached_pdf_url, upsert_cached_pdf_url
@@ -47,6 +49,22 @@ def _get_storage_root() -> pathlib.Path:
     return pathlib.Path(DEFAULT_STORAGE_PATH_CANDIDATES[0]).expanduser().resolve()
 
 
+def accel_redirect_uri(local_path: str) -> Optional[str]:
+    """
+    Internal nginx URI for a stored asset when OFFLINE_MAPS_ACCEL_REDIRECT_PREFIX is set
+    (e.g. "/_protected_maps/" aliased to the storage root), so nginx can sendfile it.
+    Returns None when disabled or the file lives outside the storage root.
+    """
+    prefix = os.environ.get("OFFLINE_MAPS_ACCEL_REDIRECT_PREFIX")
+    if not prefix:
+        return None
+    try:
+        rel = pathlib.Path(local_path).resolve().relative_to(_get_storage_root())
+    except ValueError:
+        return None
+    return prefix.rstrip("/") + "/" + rel.as_posix()
+
+
 def _safe_ext_from_type(file_type: str) -> str:
     ft = (file_type or "").lower().strip()
     if ft == "pdf":
@@ -119,7 +137,7 @@ async def resolve_nps_park_code(place: Place) -> Optional[str]:
         return None
 
     try:
-        resp = requests.get(
+        resp = http_session.get(
             "https://developer.nps.gov/api/v1/parks",
             params={"q": place.name, "limit": 8, "api_key": nps_api_key},
             timeout=10,
@@ -233,6 +251,15 @@ def resolve_curated_assets(place_name: str) -> List[Dict[str, Any]]:
     return _dedupe_by_url(out)
 
 
+def offline_map_asset_id(park_id: str, url: str) -> str:
+    """Stable asset id for a park's map URL"""
+    return f"oma_{hashlib.md5((park_id + '|' + url).encode()).hexdigest()[:16]}"
+
+
+def _max_download_bytes() -> int:
+    return int(os.environ.get("OFFLINE_MAPS_MAX_BYTES", str(50 * 1024 * 1024)))
+
+
 def ensure_assets_for_park(place: Place, db: Session, resolved: List[Dict[str, Any]]) -> List[OfflineMapAsset]:
     """
     Upsert OfflineMapAsset rows for a park based on resolved URLs.
@@ -257,7 +284,7 @@ def ensure_assets_for_park(place: Place, db: Session, resolved: List[Dict[str, A
             continue
 
         a = OfflineMapAsset(
-            id=f"oma_{hashlib.md5((place.id + '|' + url).encode()).hexdigest()[:16]}",
+            id=offline_map_asset_id(place.id, url),
             park_id=place.id,
             title=title,
             source_url=url,
@@ -299,13 +326,13 @@ def _download_stream_to_file(
 
             # HEAD validate before downloading (best-effort)
             try:
-                head = requests.head(url, timeout=10, allow_redirects=True, headers={"User-Agent": "EcoTrails/1.0"})
+                head = http_session.head(url, timeout=10, allow_redirects=True, headers={"User-Agent": "EcoTrails/1.0"})
                 if head.status_code != 200:
                     raise ValueError(f"HEAD check failed (HTTP {head.status_code})")
             except Exception as he:
                 raise ValueError(f"HEAD check failed: {he}")
 
-            with requests.get(url, stream=True, timeout=timeout_seconds, headers={"User-Agent": "EcoTrails/1.0"}) as r:
+            with http_session.get(url, stream=True, timeout=timeout_seconds, headers={"User-Agent": "EcoTrails/1.0"}) as r:
                 r.raise_for_status()
                 content_type = (r.headers.get("content-type") or "").split(";")[0].strip()
 
@@ -332,6 +359,128 @@ def _download_stream_to_file(
     raise last_err or RuntimeError("Download failed")
 
 
+# (park_id, url) pairs currently being written by an OfflineMapTee in this process
+_tees_in_flight: set = set()
+
+
+class OfflineMapTee:
+    """
+    Persist a map body that is being relayed to a client, chunk by chunk, so the
+    park's OfflineMapAsset is downloaded as a side effect of the first request.
+
+    claim() registers the tee once the body actually starts streaming, so a
+    response that is never iterated leaves nothing behind in _tees_in_flight.
+    write/commit do blocking file and DB I/O; call them off the event loop.
+    A failed write only disables the tee, never the client's stream.
+    """
+
+    def __init__(self, park_id: str, url: str, content_type: str):
+        self.park_id = park_id
+        self.url = url
+        self.asset_id = offline_map_asset_id(park_id, url)
+        self.file_type = _guess_file_type_from_headers(content_type, url)
+        self.dest_path = _get_storage_root() / park_id / f"{self.asset_id}{_safe_ext_from_type(self.file_type)}"
+        # Unique temp name: another worker may be teeing the same file
+        self.tmp_path = self.dest_path.with_name(f"{self.dest_path.name}.{uuid.uuid4().hex}.part")
+        self.max_bytes = _max_download_bytes()
+        self.written = 0
+        self._hash = hashlib.sha256()
+        self._file = None
+        self._failed = False
+        self._claimed = False
+
+    def claim(self) -> bool:
+        """Register this park/url as being written; False if another tee already is"""
+        key = (self.park_id, self.url)
+        if key in _tees_in_flight:
+            return False
+        _tees_in_flight.add(key)
+        self._claimed = True
+        return True
+
+    def _release(self) -> None:
+        if self._claimed:
+            _tees_in_flight.discard((self.park_id, self.url))
+            self._claimed = False
+
+    def write(self, chunk: bytes) -> None:
+        if self._failed:
+            return
+        try:
+            if self._file is None:
+                self.tmp_path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = self.tmp_path.open("wb")
+            self.written += len(chunk)
+            if self.written > self.max_bytes:
+                raise ValueError(f"File too large (> {self.max_bytes} bytes)")
+            self._hash.update(chunk)
+            self._file.write(chunk)
+        except Exception as e:
+            logger.warning(f"[OfflineMaps] tee disabled for {self.url}: {e}")
+            self._discard()
+
+    def commit(self) -> None:
+        """Move the finished file into place and mark the asset downloaded"""
+        try:
+            if self._failed or self._file is None:
+                return
+            self._file.close()
+            self.tmp_path.replace(self.dest_path)
+            self._save_asset()
+        except Exception as e:
+            logger.warning(f"[OfflineMaps] tee commit failed for {self.url}: {e}")
+            self._discard()
+        finally:
+            self._release()
+
+    def abort(self) -> None:
+        self._discard()
+        self._release()
+
+    def _discard(self) -> None:
+        self._failed = True
+        if self._file is not None:
+            self._file.close()
+        self.tmp_path.unlink(missing_ok=True)
+
+    def _save_asset(self) -> None:
+        # Runs after the response has been sent; the request's session is gone
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            asset = db.get(OfflineMapAsset, self.asset_id)
+            if asset is None:
+                asset = OfflineMapAsset(
+                    id=self.asset_id,
+                    park_id=self.park_id,
+                    title="Official map",
+                    source_url=self.url,
+                    created_at=now,
+                )
+                db.add(asset)
+            asset.file_type = self.file_type
+            asset.local_path = str(self.dest_path)
+            asset.bytes = self.written
+            asset.checksum = self._hash.hexdigest()
+            asset.status = "downloaded"
+            asset.error = None
+            asset.downloaded_at = now
+            asset.updated_at = now
+            db.commit()
+        finally:
+            db.close()
+
+
+def start_offline_map_tee(park_id: str, url: str, content_type: str) -> Optional[OfflineMapTee]:
+    """
+    An unclaimed tee for this park/url, or None if this process is already
+    writing it. The streaming side calls claim() before the first write.
+    """
+    if (park_id, url) in _tees_in_flight:
+        return None
+    return OfflineMapTee(park_id, url, content_type)
+
+
 async def download_offline_maps_for_park(park_id: str, db: Session) -> Dict[str, Any]:
     place = db.query(Place).filter(Place.id == park_id).first()
     if not place:
@@ -361,7 +510,7 @@ async def download_offline_maps_for_park(park_id: str, db: Session) -> Dict[str,
     assets = ensure_assets_for_park(place, db, resolved)
 
     storage_root = _get_storage_root()
-    max_bytes = int(os.environ.get("OFFLINE_MAPS_MAX_BYTES", str(50 * 1024 * 1024)))
+    max_bytes = _max_download_bytes()
 
     updated_assets: List[OfflineMapAsset] = []
     for asset in assets:
@@ -70,6 +70,34 @@ class MediaResponse(BaseModel):
         from_attributes = True
 
 
+# Discovery Schema
+class DiscoveryResponse(BaseModel):
+    id: str
+    hike_id: str
+    segment_id: Optional[str] = None
+    discovery_type: str  # 'wildlife', 'plant', 'geology', 'feature', 'cultural'
+    timestamp: datetime
+    location: Optional[Dict[str, Any]] = None  # {lat, lng}
+    confidence: str  # 'Low', 'Medium', 'High'
+    description: Optional[str] = None
+    evidence_media_ids: Optional[List[str]] = None
+    notes: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+# Route point upload Schema
+class RoutePointCreate(BaseModel):
+    timestamp: datetime
+    latitude: float
+    longitude: float
+    altitude: Optional[float] = None
+    accuracy: Optional[float] = None
+    segment_id: Optional[str] = None
+
+
 # Hike Schema
 class HikeResponse(BaseModel):
     id: str
@@ -97,6 +125,21 @@ class HikeResponse(BaseModel):
         from_attributes = True
 
 
+# Active hike Schema (GET /api/v1/hikes/active)
+class HikeActiveResponse(BaseModel):
+    id: str
+    status: str
+    start_time: Optional[datetime] = None
+    trail_id: Optional[str] = None
+    place_id: Optional[str] = None
+    trail: Optional[TrailResponse] = None
+    discoveries: List[DiscoveryResponse] = []
+    media: List[MediaResponse] = []
+
+    class Config:
+        from_attributes = True
+
+
 # JournalEntry Schema
 class JournalEntryResponse(BaseModel):
     id: str
@@ -4,7 +4,7 @@ Search service
 import logging
 from typing import List, Dict, Any
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, func
+from sqlalchemy import or_, cast, String
 from backend.models import Hike, Place, Trail
 
 logger = logging.getLogger("EcoAtlas.Search")
@@ -19,9 +19,7 @@ def search_hikes(query: str, user_id: str, limit: int = 20, db: Session = None)
         # Search in hike metadata, or join with trails/places
         hikes = db.query(Hike).filter(
             Hike.user_id == user_id,
-            or_(
-                func.cast(Hike.meta_data, db.String).ilike(f"%{query}%")
-            )
+            cast(Hike.meta_data, String).ilike(f"%{query}%")
         ).limit(limit).all()
         
         return [{
@@ -2,11 +2,12 @@
 Social networking service for sharing hike experiences, discoveries, and plans
 """
 import uuid
+import base64
 import logging
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import desc, tuple_
 from backend.models import SocialPost, PostComment, PostLike, User, Hike, Place
 
 logger = logging.getLogger("EcoAtlas.Social")
@@ -45,27 +46,49 @@ def create_post(
     return post
 
 
+def encode_feed_cursor(post: Dict[str, Any]) -> str:
+    """Opaque keyset cursor pointing just past a serialized post"""
+    raw = f"{post['created_at']}|{post['id']}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_feed_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Inverse of encode_feed_cursor; raises ValueError on a malformed cursor"""
+    try:
+        created_at, post_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(created_at), post_id
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid feed cursor: {cursor}") from e
+
+
 def get_feed(
     db: Session,
     limit: int = 20,
     offset: int = 0,
     post_type: Optional[str] = None,
     place_id: Optional[str] = None,
+    cursor: Optional[str] = None,
 ) -> List[Dict[str, Any]]:
-    """Get the community feed with enriched user/place data"""
+    """
+    Get the community feed with enriched user/place data.
+    With a cursor (from encode_feed_cursor) pages by (created_at, id) instead of
+    offset, so deep pages don't scan and discard every earlier post.
+    """
     query = db.query(SocialPost).filter(SocialPost.is_public == True)
 
     if post_type:
         query = query.filter(SocialPost.post_type == post_type)
     if place_id:
         query = query.filter(SocialPost.place_id == place_id)
+    if cursor:
+        query = query.filter(
+            tuple_(SocialPost.created_at, SocialPost.id) < decode_feed_cursor(cursor)
+        )
 
-    posts = (
-        query.order_by(desc(SocialPost.created_at))
-        .offset(offset)
-        .limit(limit)
-        .all()
-    )
+    query = query.order_by(desc(SocialPost.created_at), desc(SocialPost.id))
+    if offset and not cursor:
+        query = query.offset(offset)
+    posts = query.limit(limit).all()
 
     result = []
     for post in posts:
@@ -2,9 +2,10 @@
 Local file storage service (no S3 required)
 """
 import os
+import shutil
 import logging
 from pathlib import Path
-from typing import Optional
+from typing import Optional, BinaryIO
 from datetime import datetime, timedelta
 
 logger = logging.getLogger("EcoAtlas.Storage")
@@ -14,6 +15,9 @@ STORAGE_TYPE = os.getenv("STORAGE_TYPE", "local")
 STORAGE_PATH = os.getenv("STORAGE_PATH", "./uploads")
 BASE_URL = os.getenv("BASE_URL", "http://localhost:8000")
 
+# Chunk size used when copying upload streams to disk
+STREAM_CHUNK_SIZE = 1 << 20  # 1 MB
+
 # Create uploads directory if it doesn't exist
 uploads_dir = Path(STORAGE_PATH)
 uploads_dir.mkdir(parents=True, exist_ok=True)
@@ -47,6 +51,21 @@ def save_local_file(key: str, data: bytes) -> bool:
         return False
 
 
+def save_local_stream(key: str, fileobj: BinaryIO) -> Optional[int]:
+    """Copy a file-like object to local storage in chunks. Returns bytes written, or None on failure."""
+    try:
+        file_path = uploads_dir / key
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(file_path, "wb") as out:
+            shutil.copyfileobj(fileobj, out, STREAM_CHUNK_SIZE)
+            size = out.tell()
+        logger.info(f"Saved file: {key} ({size} bytes)")
+        return size
+    except Exception as e:
+        logger.error(f"Error saving file {key}: {e}")
+        return None
+
+
 def get_local_file(key: str) -> Optional[bytes]:
     """Get file from local storage"""
     try:
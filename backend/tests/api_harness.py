@@ -0,0 +1,48 @@
+"""Shared setup for tests that drive the FastAPI app against an in-memory database"""
+import unittest
+
+from fastapi import Depends
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+
+class ApiTestCase(unittest.TestCase):
+    """Runs main.app with get_db bound to a fresh SQLite database and a signed-in user"""
+
+    user_id = "u1"
+
+    def setUp(self):
+        import main
+        from backend.database import get_db
+        from backend.models import Base, User
+
+        self.engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        Base.metadata.create_all(bind=self.engine)
+        self.Session = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.db = self.Session()
+        self.db.add(User(id=self.user_id, email=f"{self.user_id}@example.com"))
+        self.db.commit()
+
+        def override_get_db():
+            db = self.Session()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        def override_current_user(db=Depends(get_db)):
+            return db.get(User, self.user_id)
+
+        self.app = main.app
+        self.app.dependency_overrides[get_db] = override_get_db
+        self.app.dependency_overrides[main.get_current_user] = override_current_user
+        self.client = TestClient(self.app)
+
+    def tearDown(self):
+        self.app.dependency_overrides.clear()
+        self.db.close()
+        self.engine.dispose()
@@ -0,0 +1,54 @@
+import unittest
+from unittest import mock
+
+from backend.tests.api_harness import ApiTestCase
+
+
+class AiEndpointErrorOrderTests(ApiTestCase):
+    """Auth and existence errors win over a missing API key or a disabled feature"""
+
+    def setUp(self):
+        super().setUp()
+        import main
+
+        for name, value in (("API_KEY", None), ("FEATURE_AI_JOURNAL_NARRATIVE", False)):
+            patcher = mock.patch.object(main, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _sign_out(self):
+        import main
+
+        self.app.dependency_overrides[main.get_current_user] = lambda: None
+
+    def test_narrative_checks_auth_then_feature_flag(self):
+        self.assertEqual(self.client.post("/api/v1/hikes/h1/generate-narrative").status_code, 403)
+        self._sign_out()
+        self.assertEqual(self.client.post("/api/v1/hikes/h1/generate-narrative").status_code, 401)
+
+    def test_vegetation_missing_trail_is_not_found(self):
+        self.assertEqual(self.client.get("/api/v1/trails/missing/vegetation").status_code, 404)
+
+    def test_summary_missing_hike_is_not_found(self):
+        self.assertEqual(self.client.post("/api/v1/hikes/missing/generate-summary").status_code, 404)
+        self._sign_out()
+        self.assertEqual(self.client.post("/api/v1/hikes/missing/generate-summary").status_code, 401)
+
+    def test_media_enhance_missing_media_is_not_found(self):
+        response = self.client.post("/api/v1/media/missing/enhance", json={})
+        self.assertEqual(response.status_code, 404)
+
+    def test_insights_for_another_user_is_unauthorized(self):
+        self.assertEqual(self.client.get("/api/v1/users/someone-else/insights").status_code, 401)
+
+    def test_missing_key_reported_once_checks_pass(self):
+        from backend.models import Place, Trail
+
+        self.db.add(Place(id="p1", name="Glacier National Park", place_type="park"))
+        self.db.add(Trail(id="t1", place_id="p1", name="Highline"))
+        self.db.commit()
+        self.assertEqual(self.client.get("/api/v1/trails/t1/vegetation").status_code, 503)
+
+
+if __name__ == "__main__":
+    unittest.main()
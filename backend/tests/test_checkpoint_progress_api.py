@@ -0,0 +1,88 @@
+import unittest
+
+from backend.tests.api_harness import ApiTestCase
+
+
+class CheckpointProgressApiTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        from backend.models import Hike, Place, Trail, TrailCheckpoint
+
+        self.db.add(Place(id="p1", name="Glacier National Park", place_type="park"))
+        self.db.add(Trail(id="t1", place_id="p1", name="Highline"))
+        self.db.add(Hike(id="h1", user_id=self.user_id, trail_id="t1"))
+        self.db.add(TrailCheckpoint(
+            id="c1", trail_id="t1", sequence_order=1, name="Haystack Pass", location={},
+            activities=[{"id": "a1", "xp": 10}],
+        ))
+        self.db.commit()
+
+    def _progress_rows(self):
+        from backend.models import HikeCheckpointProgress
+
+        self.db.expire_all()
+        return self.db.query(HikeCheckpointProgress).filter_by(hike_id="h1", checkpoint_id="c1").all()
+
+    def test_reach_stores_progress_before_responding(self):
+        response = self.client.post("/api/v1/hikes/h1/checkpoints/c1/reach")
+
+        self.assertEqual(response.status_code, 200)
+        rows = self._progress_rows()
+        self.assertEqual(len(rows), 1)
+        body = response.json()["checkpoint_progress"]
+        self.assertEqual(body["reached_at"], rows[0].reached_at.isoformat())
+        self.assertEqual(body["xp_earned"], 0)
+
+    def test_reach_then_complete_activity(self):
+        reach = self.client.post("/api/v1/hikes/h1/checkpoints/c1/reach")
+        complete = self.client.post(
+            "/api/v1/hikes/h1/checkpoints/c1/complete-activity",
+            json={"activity_id": "a1", "proof": {"photo_url": "https://example.com/a1.jpg"}},
+        )
+
+        self.assertEqual(reach.status_code, 200)
+        self.assertEqual(complete.status_code, 200)
+        self.assertEqual(complete.json()["checkpoint_progress"]["activities_completed"], ["a1"])
+        self.assertEqual(complete.json()["checkpoint_progress"]["xp_earned"], 10)
+        rows = self._progress_rows()
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0].photos_taken, ["https://example.com/a1.jpg"])
+
+        again = self.client.post("/api/v1/hikes/h1/checkpoints/c1/reach")
+        self.assertEqual(again.json()["checkpoint_progress"]["activities_completed"], ["a1"])
+        self.assertEqual(again.json()["checkpoint_progress"]["xp_earned"], 10)
+
+    def test_complete_activity_reuses_row_created_concurrently(self):
+        from backend.models import HikeCheckpointProgress
+        import main
+
+        # The reach row lands between complete-activity's lookup and its insert
+        real_insert = main._insert_checkpoint_progress
+
+        def insert_after_concurrent_reach(db, hike_id, checkpoint_id, now):
+            other = self.Session()
+            other.add(HikeCheckpointProgress(
+                id="from-reach", hike_id=hike_id, checkpoint_id=checkpoint_id, reached_at=now,
+                activities_completed=[], xp_earned=0, photos_taken=[],
+            ))
+            other.commit()
+            other.close()
+            return real_insert(db, hike_id, checkpoint_id, now)
+
+        main._insert_checkpoint_progress = insert_after_concurrent_reach
+        try:
+            complete = self.client.post(
+                "/api/v1/hikes/h1/checkpoints/c1/complete-activity", json={"activity_id": "a1"}
+            )
+        finally:
+            main._insert_checkpoint_progress = real_insert
+
+        self.assertEqual(complete.status_code, 200)
+        rows = self._progress_rows()
+        self.assertEqual([r.id for r in rows], ["from-reach"])
+        self.assertEqual(rows[0].activities_completed, ["a1"])
+        self.assertEqual(rows[0].xp_earned, 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
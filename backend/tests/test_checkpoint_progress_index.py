@@ -0,0 +1,109 @@
+import json
+import unittest
+from datetime import datetime
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.pool import StaticPool
+
+
+INDEX_NAME = "ix_hike_checkpoint_progress_hike_checkpoint"
+
+
+class CheckpointProgressIndexTests(unittest.TestCase):
+    def setUp(self):
+        from backend.models import Base
+
+        self.engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        Base.metadata.create_all(bind=self.engine)
+        # Simulate a database created before the unique index existed
+        with self.engine.begin() as conn:
+            conn.execute(text(f"DROP INDEX {INDEX_NAME}"))
+            conn.execute(text(
+                "INSERT INTO trail_checkpoints (id, trail_id, sequence_order, name, location, activities) "
+                "VALUES ('c1', 't1', 1, 'Haystack Pass', '{}', :activities)"
+            ), {"activities": json.dumps([{"id": "a1", "xp": 10}, {"id": "a2", "xp": 25}])})
+
+    def _add_progress(self, row_id, checkpoint_id="c1", activities=(), xp=0, photos=(), minute=0):
+        at = datetime(2026, 6, 1, 8, minute)
+        with self.engine.begin() as conn:
+            conn.execute(text(
+                "INSERT INTO hike_checkpoint_progress "
+                "(id, hike_id, checkpoint_id, reached_at, activities_completed, xp_earned, photos_taken, "
+                "created_at, updated_at) "
+                "VALUES (:id, 'h1', :checkpoint_id, :at, :activities, :xp, :photos, :at, :at)"
+            ), {
+                "id": row_id, "checkpoint_id": checkpoint_id, "at": at, "xp": xp,
+                "activities": json.dumps(list(activities)), "photos": json.dumps(list(photos)),
+            })
+
+    def _rows(self):
+        with self.engine.connect() as conn:
+            return conn.execute(text(
+                "SELECT id, checkpoint_id, activities_completed, xp_earned, photos_taken, reached_at "
+                "FROM hike_checkpoint_progress ORDER BY id"
+            )).all()
+
+    def _index_names(self):
+        return {ix["name"] for ix in inspect(self.engine).get_indexes("hike_checkpoint_progress")}
+
+    def test_keeps_progress_when_lowest_id_row_is_empty(self):
+        from backend.database import ensure_checkpoint_progress_index
+
+        # "a-..." sorts first: the empty row the old reach race inserted
+        self._add_progress("a-reach", minute=0)
+        self._add_progress("b-activity", activities=["a1"], xp=10, photos=["https://example.com/a1.jpg"], minute=5)
+        self._add_progress("c-other", checkpoint_id="c2")
+
+        self.assertNotIn(INDEX_NAME, self._index_names())
+        ensure_checkpoint_progress_index(self.engine)
+
+        self.assertIn(INDEX_NAME, self._index_names())
+        rows = self._rows()
+        self.assertEqual([(r.id, r.checkpoint_id) for r in rows], [("b-activity", "c1"), ("c-other", "c2")])
+        self.assertEqual(json.loads(rows[0].activities_completed), ["a1"])
+        self.assertEqual(rows[0].xp_earned, 10)
+        self.assertEqual(json.loads(rows[0].photos_taken), ["https://example.com/a1.jpg"])
+        # First reach time survives the merge
+        self.assertTrue(str(rows[0].reached_at).startswith("2026-06-01 08:00"))
+
+    def test_merges_activities_from_every_duplicate(self):
+        from backend.database import ensure_checkpoint_progress_index
+
+        self._add_progress("p1", activities=["a1"], xp=10, photos=["one.jpg"], minute=1)
+        self._add_progress("p2", activities=["a2"], xp=25, photos=["two.jpg"], minute=2)
+        self._add_progress("p3", minute=0)
+
+        ensure_checkpoint_progress_index(self.engine)
+
+        rows = self._rows()
+        self.assertEqual([r.id for r in rows], ["p2"])
+        self.assertEqual(json.loads(rows[0].activities_completed), ["a1", "a2"])
+        self.assertEqual(rows[0].xp_earned, 35)
+        self.assertEqual(json.loads(rows[0].photos_taken), ["one.jpg", "two.jpg"])
+
+    def test_on_conflict_insert_works_after_index_created(self):
+        from backend.database import ensure_checkpoint_progress_index
+        from backend.models import HikeCheckpointProgress
+
+        self._add_progress("p1")
+        self._add_progress("p2")
+        ensure_checkpoint_progress_index(self.engine)
+        # Running again is a no-op
+        ensure_checkpoint_progress_index(self.engine)
+
+        with self.engine.begin() as conn:
+            result = conn.execute(
+                sqlite_insert(HikeCheckpointProgress)
+                .values(id="p4", hike_id="h1", checkpoint_id="c1", xp_earned=0)
+                .on_conflict_do_nothing(index_elements=["hike_id", "checkpoint_id"])
+            )
+            self.assertEqual(result.rowcount, 0)
+            count = conn.execute(text("SELECT COUNT(*) FROM hike_checkpoint_progress")).scalar()
+        self.assertEqual(count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
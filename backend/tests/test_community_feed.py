@@ -0,0 +1,90 @@
+import unittest
+from datetime import datetime, timedelta
+
+from backend.tests.api_harness import ApiTestCase
+
+
+class CommunityFeedTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        from backend.models import SocialPost
+
+        start = datetime(2026, 6, 1, 8, 0, 0)
+        for i in range(5):
+            self.db.add(SocialPost(
+                id=f"post{i}", user_id=self.user_id, content=f"Trail note {i}",
+                created_at=start + timedelta(minutes=i),
+            ))
+        self.db.commit()
+
+    def test_feed_is_revalidated_with_etag(self):
+        first = self.client.get("/api/v1/community/feed")
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.headers["cache-control"], "no-cache")
+        etag = first.headers["etag"]
+
+        again = self.client.get("/api/v1/community/feed", headers={"If-None-Match": etag})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.content, b"")
+
+    def test_new_post_changes_etag(self):
+        from backend.models import SocialPost
+
+        etag = self.client.get("/api/v1/community/feed").headers["etag"]
+        self.db.add(SocialPost(id="post-new", user_id=self.user_id, content="Fresh snow"))
+        self.db.commit()
+
+        response = self.client.get("/api/v1/community/feed", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["etag"], etag)
+        self.assertEqual(response.json()["posts"][0]["id"], "post-new")
+
+    def test_cursor_pages_through_feed_once(self):
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            page = self.client.get("/api/v1/community/feed", params=params).json()
+            seen.extend(p["id"] for p in page["posts"])
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+
+        self.assertEqual(seen, ["post4", "post3", "post2", "post1", "post0"])
+
+    def test_cursor_is_stable_when_posts_are_added(self):
+        from backend.models import SocialPost
+
+        first = self.client.get("/api/v1/community/feed", params={"limit": 2}).json()
+        self.db.add(SocialPost(id="post-new", user_id=self.user_id, content="Fresh snow"))
+        self.db.commit()
+
+        second = self.client.get(
+            "/api/v1/community/feed", params={"limit": 2, "cursor": first["next_cursor"]}
+        ).json()
+        self.assertEqual([p["id"] for p in second["posts"]], ["post2", "post1"])
+
+    def test_cursor_breaks_created_at_ties_by_id(self):
+        from backend.models import SocialPost
+
+        tie = datetime(2026, 6, 2, 8, 0, 0)
+        for post_id in ("tie-a", "tie-b", "tie-c"):
+            self.db.add(SocialPost(id=post_id, user_id=self.user_id, content=post_id, created_at=tie))
+        self.db.commit()
+
+        first = self.client.get("/api/v1/community/feed", params={"limit": 2}).json()
+        second = self.client.get(
+            "/api/v1/community/feed", params={"limit": 2, "cursor": first["next_cursor"]}
+        ).json()
+        self.assertEqual(
+            [p["id"] for p in first["posts"] + second["posts"]], ["tie-c", "tie-b", "tie-a", "post4"]
+        )
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get("/api/v1/community/feed", params={"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,22 @@
+import unittest
+
+
+class DiscoveryNodeLayoutTests(unittest.TestCase):
+    def test_layout_for_existing_trail_is_unchanged(self):
+        from main import generate_discovery_nodes
+
+        # Pinned from the original md5-seeded generator; existing trails must keep their nodes
+        nodes = generate_discovery_nodes("h1", "t1", None, 48.0, -113.0)
+
+        self.assertEqual([n["title"] for n in nodes], [
+            "Deer Crossing", "Wildflower Meadow", "Fossil Bed", "Historic Trail Marker",
+            "Native American Site", "Seasonal Creek", "Valley Overlook", "Deer Crossing",
+            "Wildflower Meadow", "Serpentine Outcrop", "Historic Trail Marker", "Pioneer Homestead",
+        ])
+        self.assertAlmostEqual(nodes[0]["lat"], 47.99968491091652)
+        self.assertAlmostEqual(nodes[0]["lng"], -112.99705172271696)
+        self.assertEqual((nodes[0]["rarity"], nodes[0]["xp"]), ("uncommon", 35))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import csv
+import io
+import json
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from backend.tests.api_harness import ApiTestCase
+
+
+class ExportServiceTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        from backend.models import Discovery, Hike, RoutePoint
+
+        start = datetime(2026, 6, 1, 8, 0, 0)
+        self.db.add(Hike(id="h1", user_id=self.user_id, status="completed", start_time=start, distance_miles=4.2))
+        self.db.add(Hike(id="h2", user_id="someone-else"))
+        for i in range(7):
+            self.db.add(RoutePoint(
+                id=f"rp{i}", hike_id="h1", timestamp=start + timedelta(minutes=i),
+                latitude=48.0 + i / 1000, longitude=-113.0,
+            ))
+        self.db.add(Discovery(
+            id="d1", hike_id="h1", discovery_type="species", description='Bear, "grizzly"',
+            confidence="High", timestamp=start,
+        ))
+        self.db.commit()
+
+    def test_streamed_json_parses(self):
+        # Small batches so the array spans several yielded chunks
+        with mock.patch("backend.export_service.EXPORT_BATCH_SIZE", 2):
+            response = self.client.get("/api/v1/hikes/h1/export?format=json")
+
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content)
+        self.assertEqual(data["hike"]["id"], "h1")
+        self.assertEqual(data["hike"]["distance_miles"], 4.2)
+        self.assertEqual([p["latitude"] for p in data["route_points"]], [48.0 + i / 1000 for i in range(7)])
+        self.assertEqual(data["sensor_batches"], [])
+        self.assertEqual(data["media"], [])
+        self.assertEqual(data["discoveries"][0]["description"], 'Bear, "grizzly"')
+
+    def test_streamed_csv_parses(self):
+        with mock.patch("backend.export_service.EXPORT_BATCH_SIZE", 2):
+            response = self.client.get("/api/v1/hikes/h1/export?format=csv")
+
+        self.assertEqual(response.status_code, 200)
+        rows = list(csv.reader(io.StringIO(response.text)))
+        self.assertEqual(rows[1], ["Hike ID", "h1"])
+        self.assertIn(["Discoveries"], rows)
+        self.assertEqual(rows[-1][:3], ["species", 'Bear, "grizzly"', "High"])
+        route_header = rows.index(["Timestamp", "Latitude", "Longitude", "Altitude", "Accuracy"])
+        self.assertEqual(len(rows[route_header + 1:rows.index(["Discoveries"]) - 1]), 7)
+
+    def test_other_users_hike_is_not_found(self):
+        response = self.client.get("/api/v1/hikes/h2/export?format=json")
+        self.assertEqual(response.status_code, 404)
+
+    def test_errors_while_streaming_propagate(self):
+        from backend.database import get_db
+        from backend.export_service import export_hike_data
+
+        db = next(self.app.dependency_overrides[get_db]())
+        with mock.patch("backend.export_service._route_point_dict", side_effect=RuntimeError("boom")):
+            chunks = export_hike_data("h1", self.user_id, "json", db)
+            with self.assertRaises(RuntimeError):
+                b"".join(chunks)
+        db.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
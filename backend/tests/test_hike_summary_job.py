@@ -0,0 +1,130 @@
+import asyncio
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.tests.api_harness import ApiTestCase
+
+
+class _FakeModels:
+    def __init__(self, text=None, error=None):
+        self.text = text
+        self.error = error
+        self.threads = []
+
+    def generate_content(self, **kwargs):
+        self.threads.append(threading.get_ident())
+        if self.error:
+            raise self.error
+        return SimpleNamespace(text=self.text)
+
+
+class HikeSummaryJobTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        from backend.models import Base, Hike, Place, Trail, User
+
+        self.engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        Base.metadata.create_all(bind=self.engine)
+        self.Session = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        db = self.Session()
+        db.add(User(id="u1", email="u1@example.com"))
+        db.add(Place(id="p1", name="Glacier National Park", place_type="park"))
+        db.add(Trail(id="t1", place_id="p1", name="Highline"))
+        db.add(Hike(id="h1", user_id="u1", trail_id="t1", distance_miles=11.8, duration_minutes=395))
+        db.commit()
+        db.close()
+        self.addCleanup(self.engine.dispose)
+
+    async def _run_job(self, models, hike_id="h1"):
+        from backend import hike_summary_service as service
+
+        fake_client = SimpleNamespace(models=models)
+        with mock.patch.object(service, "SessionLocal", self.Session), \
+                mock.patch.object(service.genai, "Client", return_value=fake_client):
+            job = service.start_hike_summary_job(hike_id, "test-key")
+            self.assertEqual(job["status"], "queued")
+            self.assertEqual(len(service._summary_tasks), 1)
+            await asyncio.gather(*service._summary_tasks)
+        # Finished tasks drop out of the reference set
+        await asyncio.sleep(0)
+        self.assertEqual(service._summary_tasks, set())
+        return service.get_hike_summary_job(hike_id)
+
+    async def test_completed_job_stores_result(self):
+        from backend import hike_summary_service as service
+
+        load_threads = []
+        real_load = service._load_summary_inputs
+
+        def load(*args):
+            load_threads.append(threading.get_ident())
+            return real_load(*args)
+
+        models = _FakeModels(text='{"hike_narrative": "A long day on the Highline"}')
+        with mock.patch.object(service, "_load_summary_inputs", load):
+            job = await self._run_job(models)
+
+        self.assertEqual(job["status"], "completed")
+        self.assertEqual(job["result"]["summary"]["hike_narrative"], "A long day on the Highline")
+        # DB work and the Gemini call both ran off the event loop thread
+        self.assertEqual(len(load_threads), 1)
+        self.assertNotIn(threading.get_ident(), load_threads + models.threads)
+
+    async def test_generation_error_marks_job_failed(self):
+        job = await self._run_job(_FakeModels(error=RuntimeError("quota exceeded")))
+
+        self.assertEqual(job["status"], "failed")
+        self.assertIn("quota exceeded", job["error"])
+
+    async def test_unexpected_error_marks_job_failed(self):
+        from backend import hike_summary_service as service
+
+        with mock.patch.object(service, "generate_hike_summary", side_effect=RuntimeError("db down")):
+            job = await self._run_job(_FakeModels(text="{}"))
+
+        self.assertEqual(job["status"], "failed")
+        self.assertEqual(job["error"], "db down")
+
+
+class GenerateSummaryEndpointTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        import main
+        from backend.models import Hike
+
+        self.db.add(Hike(id="h1", user_id=self.user_id))
+        self.db.add(Hike(id="h2", user_id="someone-else"))
+        self.db.commit()
+        patcher = mock.patch.object(main, "API_KEY", "test-key")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_returns_202_with_status_url(self):
+        import main
+
+        job = {"id": "job-1", "status": "queued"}
+        with mock.patch.object(main, "start_hike_summary_job", return_value=job) as start:
+            response = self.client.post("/api/v1/hikes/h1/generate-summary")
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json(), {
+            "job_id": "job-1",
+            "status": "queued",
+            "status_url": "/api/v1/hikes/h1/summary/status",
+        })
+        start.assert_called_once_with("h1", "test-key")
+
+    def test_other_users_hike_is_not_found(self):
+        response = self.client.post("/api/v1/hikes/h2/generate-summary")
+        self.assertEqual(response.status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
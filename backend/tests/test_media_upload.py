@@ -0,0 +1,62 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from backend.tests.api_harness import ApiTestCase
+
+
+ISSUED_KEY = "hikes/h1/0f8fad5b-d9cb-469f-a165-70867728950e.jpg"
+
+
+class MediaUploadTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        from backend.models import Hike, Media
+
+        self.db.add(Hike(id="h1", user_id=self.user_id))
+        self.db.add(Hike(id="h2", user_id="someone-else"))
+        self.db.add(Media(
+            id="m1", hike_id="h1", type="photo", storage_key=ISSUED_KEY,
+            url=f"/api/v1/media/{ISSUED_KEY}", mime_type="image/jpeg", size_bytes=0,
+        ))
+        self.db.commit()
+        td = tempfile.TemporaryDirectory()
+        self.addCleanup(td.cleanup)
+        patcher = mock.patch("backend.storage.uploads_dir", Path(td.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _upload(self, key, content=b"photo"):
+        return self.client.post(
+            f"/api/v1/media/upload/{key}", files={"file": ("photo.jpg", content, "image/jpeg")}
+        )
+
+    def test_issued_key_is_served_as_immutable(self):
+        self.assertEqual(self._upload(ISSUED_KEY).status_code, 200)
+
+        response = self.client.get(f"/api/v1/media/{ISSUED_KEY}")
+        self.assertEqual(response.content, b"photo")
+        self.assertIn("immutable", response.headers["cache-control"])
+
+    def test_issued_key_cannot_be_overwritten(self):
+        self._upload(ISSUED_KEY)
+
+        response = self._upload(ISSUED_KEY, content=b"replacement")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.client.get(f"/api/v1/media/{ISSUED_KEY}").content, b"photo")
+
+    def test_caller_chosen_hike_key_is_rejected(self):
+        for key in ("hikes/h1/cover.jpg", "hikes/h2/0f8fad5b-d9cb-469f-a165-70867728950f.jpg"):
+            self.assertEqual(self._upload(key).status_code, 403, key)
+
+    def test_other_keys_are_not_marked_immutable(self):
+        self.assertEqual(self._upload("avatars/u1.jpg").status_code, 200)
+
+        response = self.client.get("/api/v1/media/avatars/u1.jpg")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("cache-control", response.headers)
+
+
+if __name__ == "__main__":
+    unittest.main()
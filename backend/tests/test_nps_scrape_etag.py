@@ -0,0 +1,43 @@
+import unittest
+from unittest import mock
+
+from backend.tests.api_harness import ApiTestCase
+
+
+class NpsScrapeEtagTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        from backend.redis_client import redis_client
+
+        self.redis = redis_client
+        for key in ("nps:state:mt", "nps:park:glac"):
+            self.redis.delete(key)
+            self.addCleanup(self.redis.delete, key)
+
+    def test_cached_state_read_matches_fresh_scrape_etag(self):
+        import main
+
+        parks = {"state": "mt", "parks": [{"parkCode": "glac", "name": "Glacier"}]}
+        with mock.patch.object(main, "scrape_state_parks", return_value=dict(parks)) as scrape:
+            fresh = self.client.get("/api/nps/state/MT")
+            cached = self.client.get("/api/nps/state/MT", headers={"If-None-Match": fresh.headers["etag"]})
+
+        self.assertFalse(fresh.json()["from_cache"])
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(scrape.call_count, 1)
+
+    def test_cached_park_detail_matches_fresh_scrape_etag(self):
+        import main
+
+        detail = {"parkCode": "glac", "name": "Glacier National Park", "mapAssets": []}
+        with mock.patch.object(main, "scrape_park_detail", return_value=dict(detail)) as scrape:
+            fresh = self.client.get("/api/nps/parks/glac")
+            cached = self.client.get("/api/nps/parks/glac", headers={"If-None-Match": fresh.headers["etag"]})
+
+        self.assertFalse(fresh.json()["from_cache"])
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(scrape.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -47,8 +47,8 @@ class NPSScraperTests(unittest.TestCase):
                 return _Resp(200, b"", headers={"content-type": "text/html"})
             return _Resp(404, b"", headers={"content-type": "text/html"})
 
-        with mock.patch("backend.nps_scraper.requests.get", side_effect=_fake_get):
-            with mock.patch("backend.nps_scraper.requests.head", side_effect=_fake_head):
+        with mock.patch("backend.nps_scraper.http_session.get", side_effect=_fake_get):
+            with mock.patch("backend.nps_scraper.http_session.head", side_effect=_fake_head):
                 data = scrape_park_detail("dena")
 
         assets = data.get("mapAssets") or []
@@ -84,8 +84,8 @@ class NPSScraperTests(unittest.TestCase):
         def _fake_head(url, *args, **kwargs):
             return _Resp(200, b"", headers={"content-type": "application/pdf"})
 
-        with mock.patch("backend.nps_scraper.requests.get", side_effect=_fake_get):
-            with mock.patch("backend.nps_scraper.requests.head", side_effect=_fake_head):
+        with mock.patch("backend.nps_scraper.http_session.get", side_effect=_fake_get):
+            with mock.patch("backend.nps_scraper.http_session.head", side_effect=_fake_head):
                 detail = scrape_park_detail("dena")
 
         pdf = pick_best_pdf(detail.get("mapAssets") or [], "dena")
@@ -33,7 +33,7 @@ class OfficialMapDiscoveryTests(unittest.TestCase):
                 self.status_code = status
                 self.headers = {"content-type": ct}
 
-        with mock.patch("backend.official_map_service.requests.head") as mhead:
+        with mock.patch("backend.official_map_service.http_session.head") as mhead:
             mhead.return_value = _R(404, "application/pdf")
             ok, status, ct = _head_accepts_pdf("https://www.nps.gov/x/y.pdf")
             self.assertFalse(ok)
@@ -64,7 +64,7 @@ class OfficialMapDiscoveryTests(unittest.TestCase):
             # Return minimal HTML with no PDFs; discovery should just return []
             return _Resp(200, b"<html><body>No pdfs</body></html>")
 
-        with mock.patch("backend.official_map_service.requests.get", side_effect=_fake_get):
+        with mock.patch("backend.official_map_service.http_session.get", side_effect=_fake_get):
             urls = discover_maps("glac")
             self.assertEqual(urls, [])
 
@@ -96,8 +96,8 @@ class OfficialMapDiscoveryTests(unittest.TestCase):
                 return _Resp(200, b"", headers={"content-type": "application/pdf"})
             return _Resp(404, b"", headers={"content-type": "text/html"})
 
-        with mock.patch("backend.official_map_service.requests.get", side_effect=_fake_get):
-            with mock.patch("backend.official_map_service.requests.head", side_effect=_fake_head):
+        with mock.patch("backend.official_map_service.http_session.get", side_effect=_fake_get):
+            with mock.patch("backend.official_map_service.http_session.head", side_effect=_fake_head):
                 pdf = discover_best_pdf_url("romo")
 
         self.assertIsNotNone(pdf)
@@ -132,7 +132,7 @@ class OfficialMapDiscoveryTests(unittest.TestCase):
 
             import os
             with mock.patch.dict(os.environ, {"NPS_API_KEY": "test"}):
-                with mock.patch("backend.offline_maps_service.requests.get", return_value=_Resp(200, parks_data)):
+                with mock.patch("backend.offline_maps_service.http_session.get", return_value=_Resp(200, parks_data)):
                     code = await resolve_nps_park_code(_Place())
                     self.assertEqual(code, "crla")
 
@@ -0,0 +1,157 @@
+import os
+import unittest
+from unittest import mock
+
+import httpx
+
+from backend.tests.api_harness import ApiTestCase
+
+
+PDF_URL = "https://www.nps.gov/glac/planyourvisit/upload/glac-map.pdf"
+
+
+class OfflineMapPdfCacheTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        from backend.models import Place
+        from backend.redis_client import redis_client
+
+        self.db.add(Place(id="p-glac", name="Glacier National Park", place_type="park"))
+        self.db.commit()
+        self.redis = redis_client
+        self.cache_key = "offlinepdf:resolve:p-glac"
+        self.redis.delete(self.cache_key)
+        self.addCleanup(self.redis.delete, self.cache_key)
+
+    def _get_pdf(self, handler, place_id="p-glac"):
+        import main
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        with mock.patch.object(main, "get_http_client", return_value=client), \
+                mock.patch.object(main, "_resolve_official_pdf_url_for_place", mock.AsyncMock(return_value=PDF_URL)):
+            return self.client.get(f"/api/v1/places/{place_id}/offline-map/pdf")
+
+    def test_upstream_server_error_is_not_cached(self):
+        for status in (429, 500, 503):
+            response = self._get_pdf(lambda request: httpx.Response(status, text="busy"))
+            self.assertEqual(response.json()["reason"], "download_failed")
+            self.assertIsNone(self.redis.get(self.cache_key), status)
+
+    def test_upstream_not_found_is_cached(self):
+        response = self._get_pdf(lambda request: httpx.Response(404, text="missing"))
+
+        self.assertEqual(response.json()["reason"], "no_pdf_found")
+        self.assertEqual(self.redis.get(self.cache_key)["reason"], "no_pdf_found")
+
+    def test_first_download_is_stored_and_served_from_disk(self):
+        import tempfile
+
+        body = b"%PDF-1.4\n" + b"x" * 300_000 + b"\n%%EOF"
+        td = tempfile.TemporaryDirectory()
+        self.addCleanup(td.cleanup)
+        with mock.patch.dict(os.environ, {"OFFLINE_MAPS_STORAGE_PATH": td.name}), \
+                mock.patch("backend.offline_maps_service.SessionLocal", self.Session):
+            first = self._get_pdf(
+                lambda request: httpx.Response(200, content=body, headers={"content-type": "application/pdf"})
+            )
+
+            def upstream_not_expected(request):
+                raise AssertionError("stored PDF should be served from disk")
+
+            second = self._get_pdf(upstream_not_expected)
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.content, body)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.content, body)
+        self.assertEqual(second.headers["content-type"], "application/pdf")
+
+    def test_stored_asset_is_served_with_its_file_type(self):
+        import tempfile
+        from backend.models import OfflineMapAsset
+        from backend.offline_maps_service import offline_map_asset_id
+
+        td = tempfile.TemporaryDirectory()
+        self.addCleanup(td.cleanup)
+        path = os.path.join(td.name, "glac-map.png")
+        with open(path, "wb") as f:
+            f.write(b"\x89PNG\r\n")
+        self.db.add(OfflineMapAsset(
+            id=offline_map_asset_id("p-glac", PDF_URL), park_id="p-glac", title="Official map",
+            source_url=PDF_URL, file_type="png", local_path=path, status="downloaded",
+        ))
+        self.db.commit()
+
+        response = self._get_pdf(lambda request: httpx.Response(500))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["content-type"], "application/octet-stream")
+
+    def test_unstarted_stream_leaves_no_tee_registered(self):
+        import asyncio
+        import main
+        from backend.offline_maps_service import _tees_in_flight, start_offline_map_tee
+
+        async def drop_before_streaming():
+            client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200)))
+            r = await client.send(client.build_request("GET", PDF_URL), stream=True)
+            body = main._iter_upstream(r, tee=start_offline_map_tee("p-glac", PDF_URL, "application/pdf"))
+            # The client went away before the body generator ran
+            await body.aclose()
+            await r.aclose()
+
+        asyncio.run(drop_before_streaming())
+        self.assertNotIn(("p-glac", PDF_URL), _tees_in_flight)
+        self.assertIsNotNone(start_offline_map_tee("p-glac", PDF_URL, "application/pdf"))
+
+
+class OfflineMapPdfNpsSearchCacheTests(ApiTestCase):
+    """Places outside the curated park map fall back to the NPS parks search"""
+
+    def setUp(self):
+        super().setUp()
+        from backend.models import Place
+        from backend.redis_client import redis_client
+
+        self.db.add(Place(id="p-local", name="Riverside Nature Preserve", place_type="park"))
+        self.db.commit()
+        self.redis = redis_client
+        self.cache_key = "offlinepdf:resolve:p-local"
+        self.redis.delete(self.cache_key)
+        self.addCleanup(self.redis.delete, self.cache_key)
+
+    def _get_pdf(self, handler, api_key="test-key"):
+        import main
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        with mock.patch.dict(os.environ), mock.patch.object(main, "get_http_client", return_value=client):
+            if api_key:
+                os.environ["NPS_API_KEY"] = api_key
+            else:
+                os.environ.pop("NPS_API_KEY", None)
+            return self.client.get("/api/v1/places/p-local/offline-map/pdf")
+
+    def test_missing_api_key_is_not_cached(self):
+        response = self._get_pdf(lambda request: httpx.Response(200, json={"data": []}), api_key=None)
+
+        self.assertEqual(response.json()["reason"], "no_nps_match")
+        self.assertIsNone(self.redis.get(self.cache_key))
+
+    def test_failed_search_is_not_cached(self):
+        def handler(request):
+            raise httpx.ConnectError("unreachable", request=request)
+
+        for h in (handler, lambda request: httpx.Response(503)):
+            response = self._get_pdf(h)
+            self.assertEqual(response.json()["reason"], "no_nps_match")
+            self.assertIsNone(self.redis.get(self.cache_key))
+
+    def test_search_without_match_is_cached(self):
+        response = self._get_pdf(lambda request: httpx.Response(200, json={"data": []}))
+
+        self.assertEqual(response.json()["reason"], "no_nps_match")
+        self.assertEqual(self.redis.get(self.cache_key)["reason"], "no_nps_match")
+
+
+if __name__ == "__main__":
+    unittest.main()
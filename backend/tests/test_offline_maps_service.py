@@ -47,9 +47,9 @@ class OfflineMapsServiceTests(unittest.TestCase):
         with tempfile.TemporaryDirectory() as td:
             dest = pathlib.Path(td) / "test.pdf"
 
-            with mock.patch("backend.offline_maps_service.requests.get") as mget:
+            with mock.patch("backend.offline_maps_service.http_session.get") as mget:
                 mget.return_value = _FakeResponse(fake_pdf)
-                with mock.patch("backend.offline_maps_service.requests.head") as mhead:
+                with mock.patch("backend.offline_maps_service.http_session.head") as mhead:
                     mhead.return_value = _FakeResponse(b"", content_type="application/pdf", status_code=200)
 
                     written, checksum, content_type = _download_stream_to_file(
@@ -73,6 +73,99 @@ class OfflineMapsServiceTests(unittest.TestCase):
                 _download_stream_to_file("ftp://example.test/x.pdf", dest, max_bytes=1024, retries=1)
 
 
+
+class OfflineMapTeeTests(unittest.TestCase):
+    def setUp(self):
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from sqlalchemy.pool import StaticPool
+        from backend.models import Base
+
+        self.td = tempfile.TemporaryDirectory()
+        self.addCleanup(self.td.cleanup)
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(bind=engine)
+        self.addCleanup(engine.dispose)
+        self.Session = sessionmaker(bind=engine)
+        for patcher in (
+            mock.patch.dict(os.environ, {"OFFLINE_MAPS_STORAGE_PATH": self.td.name}),
+            mock.patch("backend.offline_maps_service.SessionLocal", self.Session),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_commit_moves_file_and_marks_asset_downloaded(self):
+        import hashlib
+        from backend.models import OfflineMapAsset
+        from backend.offline_maps_service import _tees_in_flight, start_offline_map_tee
+
+        tee = start_offline_map_tee("p1", "https://example.test/map.pdf", "application/pdf")
+        self.assertTrue(tee.claim())
+        # A second request for the same file while the first is still writing doesn't tee
+        self.assertIsNone(start_offline_map_tee("p1", "https://example.test/map.pdf", "application/pdf"))
+
+        for chunk in (b"%PDF-1.4\n", b"page one\n", b"%%EOF"):
+            tee.write(chunk)
+        tee.commit()
+
+        body = b"%PDF-1.4\npage one\n%%EOF"
+        self.assertEqual(tee.dest_path.read_bytes(), body)
+        self.assertFalse(tee.tmp_path.exists())
+        self.assertNotIn(("p1", "https://example.test/map.pdf"), _tees_in_flight)
+        db = self.Session()
+        asset = db.get(OfflineMapAsset, tee.asset_id)
+        self.assertEqual(asset.status, "downloaded")
+        self.assertEqual(asset.bytes, len(body))
+        self.assertEqual(asset.checksum, hashlib.sha256(body).hexdigest())
+        self.assertEqual(asset.local_path, str(tee.dest_path))
+        db.close()
+
+    def test_oversized_body_disables_tee(self):
+        from backend.models import OfflineMapAsset
+        from backend.offline_maps_service import start_offline_map_tee
+
+        with mock.patch.dict(os.environ, {"OFFLINE_MAPS_MAX_BYTES": "8"}):
+            tee = start_offline_map_tee("p1", "https://example.test/big.pdf", "application/pdf")
+        tee.write(b"%PDF-1.4")
+        tee.write(b"more than the limit")
+        tee.commit()
+
+        self.assertFalse(tee.tmp_path.exists())
+        self.assertFalse(tee.dest_path.exists())
+        db = self.Session()
+        self.assertIsNone(db.get(OfflineMapAsset, tee.asset_id))
+        db.close()
+
+    def test_abort_removes_partial_file(self):
+        from backend.offline_maps_service import _tees_in_flight, start_offline_map_tee
+
+        tee = start_offline_map_tee("p1", "https://example.test/cut.pdf", "application/pdf")
+        tee.claim()
+        tee.write(b"%PDF-1.4")
+        self.assertTrue(tee.tmp_path.exists())
+        tee.abort()
+
+        self.assertFalse(tee.tmp_path.exists())
+        self.assertNotIn(("p1", "https://example.test/cut.pdf"), _tees_in_flight)
+
+    def test_tee_is_registered_only_once_claimed(self):
+        from backend.offline_maps_service import _tees_in_flight, start_offline_map_tee
+
+        key = ("p1", "https://example.test/late.pdf")
+        first = start_offline_map_tee(*key, "application/pdf")
+        second = start_offline_map_tee(*key, "application/pdf")
+        # Neither response has started streaming yet
+        self.assertNotIn(key, _tees_in_flight)
+
+        self.assertTrue(first.claim())
+        self.assertFalse(second.claim())
+        # The loser backing out must not release the writer's claim
+        second.abort()
+        self.assertIn(key, _tees_in_flight)
+        first.abort()
+        self.assertNotIn(key, _tees_in_flight)
+
+
 if __name__ == "__main__":
     unittest.main()
 
@@ -0,0 +1,60 @@
+import itertools
+import unittest
+from unittest import mock
+
+from backend.tests.api_harness import ApiTestCase
+
+
+class ParkOfficialMapTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        from backend.models import Place
+        from backend.redis_client import redis_client
+
+        self.db.add(Place(id="p-glac", name="Glacier National Park", place_type="park"))
+        self.db.commit()
+        self.redis = redis_client
+        self.cache_key = "park:officialmap:p-glac"
+        self.redis.delete(self.cache_key)
+        self.addCleanup(self.redis.delete, self.cache_key)
+
+        # Like the real service: every scrape stamps a new fetched_at
+        stamps = (f"2026-06-01T08:00:{i:02d}" for i in itertools.count())
+        patcher = mock.patch(
+            "backend.official_map_service.OfficialMapService.fetch_official_map_asset",
+            side_effect=lambda *args, **kwargs: {
+                "success": True,
+                "map_url": "https://www.nps.gov/glac/planyourvisit/upload/glac-map.pdf",
+                "asset_type": "pdf",
+                "source": "NPS",
+                "map_type": "overview",
+                "fetched_at": next(stamps),
+            },
+        )
+        self.fetch = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_repeat_request_with_etag_gets_304_without_scraping(self):
+        first = self.client.get("/api/v1/parks/p-glac/official-map")
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.json()["mapUrl"], "https://www.nps.gov/glac/planyourvisit/upload/glac-map.pdf")
+
+        again = self.client.get("/api/v1/parks/p-glac/official-map", headers={"If-None-Match": first.headers["etag"]})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(self.fetch.call_count, 1)
+
+    def test_rescrape_keeps_etag_when_only_fetch_time_changes(self):
+        first = self.client.get("/api/v1/parks/p-glac/official-map")
+        self.redis.delete(self.cache_key)
+
+        again = self.client.get("/api/v1/parks/p-glac/official-map", headers={"If-None-Match": first.headers["etag"]})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(self.fetch.call_count, 2)
+
+    def test_unknown_park_is_not_found(self):
+        response = self.client.get("/api/v1/parks/missing/official-map")
+        self.assertEqual(response.status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+
+from backend.tests.api_harness import ApiTestCase
+
+
+def _park_badge(park_id, name):
+    return {"parkId": park_id, "parkName": name}
+
+
+class ProfileBadgesTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        from backend.models import Hike
+
+        hikes = [
+            ("h1", {"earned_badges": ["first_hike"], "park_badge": _park_badge("glac", "Glacier")}),
+            ("h2", {"earned_badges": ["ten_miles", "early_bird"], "park_badge": _park_badge("glac", "Glacier")}),
+            ("h3", {"park_badge": _park_badge("yose", "Yosemite")}),
+            ("h4", {"earned_badges": "not-a-list"}),
+            ("h5", None),
+        ]
+        for hike_id, meta in hikes:
+            self.db.add(Hike(id=hike_id, user_id=self.user_id, meta_data=meta))
+        self.db.add(Hike(
+            id="other", user_id="someone-else",
+            meta_data={"earned_badges": ["theirs"], "park_badge": _park_badge("zion", "Zion")},
+        ))
+        self.db.commit()
+
+    def test_park_badges_are_deduplicated_per_park(self):
+        response = self.client.get("/api/v1/profile/badges")
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertCountEqual(data["badges"], ["first_hike", "ten_miles", "early_bird"])
+        self.assertEqual(sorted(b["parkId"] for b in data["parkBadges"]), ["glac", "yose"])
+        self.assertEqual(data["totalCount"], 5)
+
+    def test_user_without_hikes_has_no_badges(self):
+        from backend.models import Hike
+
+        self.db.query(Hike).filter(Hike.user_id == self.user_id).delete()
+        self.db.commit()
+
+        data = self.client.get("/api/v1/profile/badges").json()
+        self.assertEqual(data, {"badges": [], "parkBadges": [], "totalCount": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
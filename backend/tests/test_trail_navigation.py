@@ -0,0 +1,45 @@
+import unittest
+
+from backend.tests.api_harness import ApiTestCase
+
+
+class TrailNavigationCacheTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        from backend.models import Place, Trail
+
+        self.db.add(Place(id="p1", name="Glacier National Park", place_type="park", location={"lat": 48.7, "lng": -113.7}))
+        self.db.add(Trail(id="t1", place_id="p1", name="Highline", meta_data={}))
+        self.db.commit()
+
+    def _trailhead(self):
+        response = self.client.get("/api/v1/trails/t1/navigation")
+        self.assertEqual(response.status_code, 200)
+        return response.json()["trailhead"]
+
+    def test_trail_coordinate_edit_is_not_served_stale(self):
+        from backend.models import Trail
+
+        self.assertEqual(self._trailhead(), {"lat": 48.7, "lng": -113.7})
+        trail = self.db.get(Trail, "t1")
+        trail.meta_data = {"trailhead_lat": 48.69, "trailhead_lng": -113.72}
+        self.db.commit()
+
+        self.assertEqual(self._trailhead(), {"lat": 48.69, "lng": -113.72})
+
+    def test_place_coordinate_edit_is_not_served_stale(self):
+        from backend.models import Place
+
+        self.assertEqual(self._trailhead(), {"lat": 48.7, "lng": -113.7})
+        place = self.db.get(Place, "p1")
+        place.location = {"lat": 48.75, "lng": -113.8}
+        self.db.commit()
+
+        self.assertEqual(self._trailhead(), {"lat": 48.75, "lng": -113.8})
+
+    def test_unknown_trail_is_not_found(self):
+        self.assertEqual(self.client.get("/api/v1/trails/missing/navigation").status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
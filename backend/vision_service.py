@@ -5,9 +5,9 @@ Real-time species/object identification for hiking discovery mode.
 Uses Gemini's vision capabilities to identify wildlife, plants, geology, and landmarks.
 """
 
+import io
 import os
 import json
-import base64
 import logging
 import asyncio
 from typing import Optional, Dict, Any, List
@@ -17,6 +17,47 @@ from google.genai import types
 
 logger = logging.getLogger(__name__)
 
+# SIMD-accelerated decoding for multi-megabyte camera frames; same API as the stdlib module
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
+
+PNG_SIGNATURE = b"\x89PNG"
+JPEG_QUALITY = 85
+# Longest side sent to Gemini; full-resolution camera frames add upload and tokens, not accuracy
+MAX_IMAGE_DIMENSION = 1024
+
+
+def decode_image_data(image_data: str) -> bytes:
+    """
+    Decode a base64 (or data-URL) camera frame to JPEG bytes.
+    Clients send JPEG; PNG frames and frames larger than MAX_IMAGE_DIMENSION
+    are re-encoded (downscaled) at JPEG_QUALITY. CPU-bound: call via asyncio.to_thread.
+    """
+    if ',' in image_data:
+        image_data = image_data.split(',')[1]
+    image_bytes = base64.b64decode(image_data)
+    try:
+        from PIL import Image
+    except ImportError:
+        return image_bytes
+    try:
+        # Image.open only parses the header; pixels are decoded if we re-encode
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            oversized = max(img.size) > MAX_IMAGE_DIMENSION
+            if not oversized and not image_bytes.startswith(PNG_SIGNATURE):
+                return image_bytes
+            if oversized:
+                img.thumbnail((MAX_IMAGE_DIMENSION, MAX_IMAGE_DIMENSION), Image.LANCZOS)
+            buf = io.BytesIO()
+            img.convert("RGB").save(buf, "JPEG", quality=JPEG_QUALITY)
+        return buf.getvalue()
+    except Exception as e:
+        # Let Gemini judge anything Pillow can't read
+        logger.warning(f"Could not preprocess image: {e}")
+        return image_bytes
+
 # Rarity determination based on species type
 RARITY_KEYWORDS = {
     'legendary': [
@@ -81,12 +122,8 @@ class VisionService:
         try:
             client = self._get_client()
             
-            # Clean base64 data
-            if ',' in image_data:
-                image_data = image_data.split(',')[1]
-            
             # Create image part
-            image_bytes = base64.b64decode(image_data)
+            image_bytes = await asyncio.to_thread(decode_image_data, image_data)
             
             # Build location context
             location_context = ""
@@ -177,10 +214,10 @@ Be accurate and educational. Avoid wild guesses - express uncertainty in your co
             
         except json.JSONDecodeError as e:
             logger.error(f"[VisionService] JSON parse error: {e}")
-            return self._fallback_result()
+            return self.fallback_result()
         except Exception as e:
             logger.error(f"[VisionService] Identification failed: {e}")
-            return self._fallback_result()
+            return self.fallback_result()
     
     def _determine_rarity(self, name: str) -> str:
         """Determine rarity based on species name"""
@@ -193,7 +230,7 @@ Be accurate and educational. Avoid wild guesses - express uncertainty in your co
         
         return "common"
     
-    def _fallback_result(self) -> Dict[str, Any]:
+    def fallback_result(self) -> Dict[str, Any]:
         """Return a fallback result when API fails"""
         return {
             "success": True,
@@ -295,9 +332,7 @@ Include a mix of common and rare species. Make it feel like a treasure hunt!
             agents = EcoAtlasAgents(api_key=self.api_key)
             
             # Prepare image
-            if ',' in image_data:
-                image_data = image_data.split(',')[1]
-            image_bytes = base64.b64decode(image_data)
+            image_bytes = await asyncio.to_thread(decode_image_data, image_data)
             image_part = types.Part.from_bytes(data=image_bytes, mime_type="image/jpeg")
             
             # Task 1: Observer - Visual analysis
@@ -392,8 +427,8 @@ Write 2-3 sentences that:
             
         except Exception as e:
             logger.error(f"[VisionService] Enhanced identification failed: {e}")
-            # Fallback to basic identification
-            return await self.identify_image(image_data, location)
+            # No second Gemini round trip: during an outage it would only double latency and quota
+            return self.fallback_result()
 
 
 # Singleton instance
@@ -16,6 +16,40 @@ import uuid
 
 logger = logging.getLogger("EcoAtlas.WebSocket")
 
+# Session rows are read far more often than they change; keep a short-lived copy
+SESSION_CACHE_TTL = 60
+
+
+def _session_cache_key(session_id: str) -> str:
+    return f"sess:{session_id}"
+
+
+def get_session_cached(db: Session, session_id: str) -> Optional[Dict[str, Any]]:
+    """Session fields as a plain dict, from redis when fresh; None if the session doesn't exist"""
+    cache_key = _session_cache_key(session_id)
+    cached = redis_client.get(cache_key)
+    if cached is not None:
+        return cached
+    session = db.get(HikeSession, session_id)
+    if not session:
+        return None
+    summary = {
+        "id": session.id,
+        "user_id": session.user_id,
+        "park_name": session.park_name,
+        "status": session.status,
+        "start_time": session.start_time.isoformat() if session.start_time else None,
+        "end_time": session.end_time.isoformat() if session.end_time else None,
+        "device_id": session.device_id,
+    }
+    redis_client.set(cache_key, summary, ttl=SESSION_CACHE_TTL)
+    return summary
+
+
+def invalidate_session(session_id: str) -> None:
+    """Drop the cached session after its row changes"""
+    redis_client.delete(_session_cache_key(session_id))
+
 
 class ConnectionManager:
     """Manages WebSocket connections"""
@@ -225,6 +259,7 @@ async def handle_ecodroid_stream(
                 session.status = 'completed'
                 session.end_time = datetime.utcnow()
                 db.commit()
+                invalidate_session(session_id)
                 
                 if device:
                     device.status = 'online'
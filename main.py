@@ -5,18 +5,32 @@ from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv('/app/backend/.env')
 
-import json
+import re
 import base64
+import hashlib
+import random
+import time
+import orjson
+import httpx
+import numpy as np
 import logging
 import asyncio
-from typing import List, Optional, Dict, Any, Union
+from functools import cached_property
+from itertools import islice
+from typing import List, Optional, Dict, Any, Union, Tuple
 from pydantic import BaseModel as PydanticBaseModel, Field
 from pydantic import BaseModel, Field
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form, WebSocket, Depends, Query
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, WebSocket, Depends, Query, BackgroundTasks, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from backend.database import get_db, init_db
-from backend.websocket_handler import handle_ecodroid_stream
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select, and_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload, selectinload
+from backend.database import get_db, init_db, SessionLocal
+from backend.websocket_handler import handle_ecodroid_stream, get_session_cached, invalidate_session
 from backend.redis_client import redis_client
 from backend.models import (
     HikeSession, RealtimeObservation, EnvironmentalRecord,
@@ -24,7 +38,7 @@ from backend.models import (
     User, Hike, Place, Trail, Media, Discovery, Achievement, Device, UserFavoritePlace,
     TrailCheckpoint, HikeCheckpointProgress,
     SocialPost, PostComment, PostLike,
-    OfflineMapAsset,
+    OfflineMapAsset, UserAchievement,
 )
 from backend.auth_service import generate_token, verify_token, send_magic_link, verify_magic_link
 from backend.places_service import search_places, get_place_details, get_nearby_places, get_trail_details, search_trails
@@ -34,28 +48,45 @@ from backend.hikes_service import (
 )
 from backend.media_service import get_signed_upload_url, register_uploaded_media, get_hike_media
 from backend.insights_service import start_analysis, get_insight_status, get_insight_report
-from backend.achievements_service import compute_achievements, get_user_achievements, get_all_achievements
+from backend.achievements_service import (
+    compute_achievements, get_user_achievements, get_all_achievements, get_park_badge_info,
+    get_user_stats as get_achievement_stats,
+)
 from backend.devices_service import register_device, update_device_status, get_user_devices, remove_device
 from backend.export_service import export_hike_data
+from backend.offline_maps_service import (
+    accel_redirect_uri, offline_map_asset_id, start_offline_map_tee, OfflineMapTee,
+    serialize_asset, download_offline_maps_for_park,
+)
+from backend.nps_scraper import scrape_state_parks, scrape_park_detail, pick_best_pdf
+from backend.vision_service import vision_service
+from backend.favorites_service import add_favorite_place, remove_favorite_place, is_favorite, get_user_favorites
+from backend.social_service import (
+    get_feed, encode_feed_cursor, create_post, get_post, add_comment, toggle_like, check_liked, delete_post, get_user_posts
+)
+from backend.hike_summary_service import start_hike_summary_job, get_hike_summary_job
+from backend.photo_3d_service import start_photo_3d_job, get_photo_3d_job, get_placeholder_obj
 from backend.journal_service import create_journal_entry, get_journal_entries, update_journal_entry, delete_journal_entry
 from backend.narrative_service import generate_hike_narrative
 from backend.enhancement_service import start_enhancement_job, get_enhancement_job_status, cancel_enhancement_job, get_media_enhancement_jobs
-from backend.stats_service import get_user_stats, get_hike_stats
+from backend.stats_service import get_user_stats, get_hike_stats, get_dashboard_stats
 from backend.sync_service import sync_offline_data, get_sync_status
 from backend.search_service import search_hikes, search_places as search_places_service
-from backend.storage import save_local_file, get_local_file, get_local_file_path
-from fastapi.responses import FileResponse, StreamingResponse, JSONResponse
+from backend.storage import save_local_stream, get_local_file, get_local_file_path, delete_local_file
+from fastapi.responses import FileResponse, StreamingResponse, JSONResponse, ORJSONResponse
 from fastapi.responses import PlainTextResponse
 import pathlib
+from stat import S_ISREG
 from backend.realtime_processor import RealtimeProcessor
 from backend.google_maps_service import get_google_maps_service
+from backend.companion_service import get_companion_service
 from pydantic import BaseModel as PydanticBaseModel
 from typing import Optional
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 from google import genai
 from google.genai import types
-from backend.schemas import MediaResponse, HikeResponse, JournalEntryResponse
+from backend.schemas import MediaResponse, HikeResponse, HikeActiveResponse, JournalEntryResponse, RoutePointCreate
 
 # --- ATLAS SYSTEM CONFIG ---
 ATLAS_SYSTEM_INSTRUCTION = (
@@ -72,15 +103,165 @@ ATLAS_SYSTEM_INSTRUCTION = (
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("EcoAtlas")
 
+# Read once at import; load_dotenv() has already run above
+API_KEY = os.environ.get("API_KEY")
+FEATURE_AI_JOURNAL_NARRATIVE = os.environ.get("FEATURE_AI_JOURNAL_NARRATIVE", "false").lower() == "true"
+
+
+def require_api_key() -> str:
+    """
+    Dependency: the Gemini API key, or 503 when the AI service isn't configured.
+    Endpoints whose body does its own 401/404 checks call it after those
+    instead, so a missing key doesn't mask them.
+    """
+    if not API_KEY:
+        raise HTTPException(status_code=503, detail="AI service not configured")
+    return API_KEY
+
+
+def require_narrative_enabled() -> None:
+    """Dependency: 403 unless the AI journal narrative feature flag is on"""
+    if not FEATURE_AI_JOURNAL_NARRATIVE:
+        raise HTTPException(status_code=403, detail="AI journal narrative feature is not enabled")
+
+
+def _get_owned_hike(db: Session, hike_id: str, user_id: str) -> Optional[Hike]:
+    """Primary-key lookup via the identity map; None unless the hike belongs to user_id"""
+    hike = db.get(Hike, hike_id)
+    if hike is None or hike.user_id != user_id:
+        return None
+    return hike
+
+
+def _utcnow() -> datetime:
+    """Current UTC time as a naive datetime (DB DateTime columns are timezone-naive UTC)"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _parse_iso8601(value: str) -> datetime:
+    """Parse an ISO-8601 timestamp, accepting a trailing 'Z' on any Python version"""
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def _parse_location(value: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Parse a JSON-encoded {lat, lng} query parameter; returns None if missing or invalid"""
+    if not value:
+        return None
+    try:
+        loc = orjson.loads(value)
+    except orjson.JSONDecodeError:
+        return None
+    return loc if isinstance(loc, dict) else None
+
+
+def _first_set(d: Dict[str, Any], *keys: str) -> Any:
+    """First of keys present in d with a non-None value (0.0 counts, unlike an `or` chain)"""
+    for key in keys:
+        value = d.get(key)
+        if value is not None:
+            return value
+    return None
+
 
 def _safe_filename(name: str) -> str:
-    import re
     s = (name or "offline-map").strip().lower()
     s = re.sub(r"[^a-z0-9]+", "-", s)
     s = re.sub(r"-+", "-", s).strip("-")
     return s or "offline-map"
 
 
+# Shared outbound HTTP client: pooled keep-alive connections to NPS and PDF hosts
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Process-wide httpx.AsyncClient, (re)created on first use"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=10),
+            timeout=httpx.Timeout(20.0, connect=5.0),
+            headers={"User-Agent": "EcoTrails/1.0"},
+            follow_redirects=True,
+        )
+    return _http_client
+
+
+async def _iter_upstream(
+    r: httpx.Response, log_prefix: Optional[str] = None, tee: Optional[OfflineMapTee] = None
+):
+    """Relay an upstream streamed response body, closing it when done (optionally saving a copy via tee)"""
+    total = 0
+    # Claimed only once the body is being iterated; a response dropped before
+    # streaming starts must not leave the tee registered
+    if tee and not tee.claim():
+        tee = None
+    try:
+        async for chunk in r.aiter_bytes(1024 * 128):
+            total += len(chunk)
+            if tee:
+                await asyncio.to_thread(tee.write, chunk)
+            yield chunk
+    except BaseException:
+        if tee:
+            tee.abort()
+        raise
+    finally:
+        await r.aclose()
+    if tee:
+        await asyncio.to_thread(tee.commit)
+    if log_prefix:
+        logger.info(f"{log_prefix} streamed_bytes={total}")
+
+
+async def _read_preview(r: httpx.Response, size: int) -> bytes:
+    """First chunk of an upstream body (for logging), then close it"""
+    try:
+        async for chunk in r.aiter_bytes(size):
+            return chunk
+        return b""
+    except Exception:
+        return b""
+    finally:
+        await r.aclose()
+
+
+def _etag_json_response(
+    request: Request, payload: Any, cache_control: Optional[str] = None, etag_source: Any = None
+) -> Response:
+    """
+    Serialize payload once and tag it with a weak ETag over the bytes;
+    answer 304 when the client's If-None-Match already has this version.
+    Pass etag_source when the payload carries per-response fields (fetch
+    timestamps, cache flags) that shouldn't count as a new version.
+    """
+    body = orjson.dumps(payload)
+    tagged = body if etag_source is None else orjson.dumps(etag_source)
+    headers = {"ETag": 'W/"' + hashlib.blake2b(tagged, digest_size=16).hexdigest() + '"'}
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def _json_object_body(request: Request) -> Dict[str, Any]:
+    """
+    Free-form JSON object body parsed with orjson, for endpoints that take a
+    plain dict and gain nothing from FastAPI's body validation pass.
+    """
+    try:
+        body = orjson.loads(await request.body())
+    except orjson.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Request body must be valid JSON")
+    if not isinstance(body, dict):
+        raise HTTPException(status_code=400, detail="Request body must be a JSON object")
+    return body
+
+
 def _select_best_nps_park_code(place_name: str, parks: list) -> tuple[Optional[str], Optional[str], Optional[int]]:
     """
     Select best park match from NPS API /parks results using a 0-100 fullName match score.
@@ -174,6 +355,21 @@ class SensorPacket(BaseModel):
     lng: Optional[float] = None
     timestamp: int
 
+def _parse_json_response(text: str) -> Any:
+    """Parse a JSON-mode model response; strips a stray ```json fence only if plain parsing fails"""
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        text = text.strip()
+        if text.startswith("```json"): text = text[7:]
+        if text.endswith("```"): text = text[:-3]
+        return orjson.loads(text.strip())
+
+# Cap in-flight agent calls across concurrent synthesis stages and requests; each holds a
+# default-executor thread for the whole Gemini round trip
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "5"))
+_llm_semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+
 class Agent:
     def __init__(self, name: str, role: str, goal: str, backstory: str, model_name: str = "gemini-3-pro-preview", tools: List[Any] = None):
         self.name = name
@@ -205,19 +401,20 @@ class Agent:
         )
 
         try:
-            api_client = genai.Client(api_key=os.environ.get("API_KEY"), http_options={'api_version': 'v1alpha'})
-            response = await asyncio.to_thread(
-                api_client.models.generate_content,
-                model=self.model_name,
-                contents=contents,
-                config=config
-            )
+            # Shared process-wide client: keeps its connection pool warm across agent calls
+            api_client = get_client()
+            if api_client is None:
+                raise ValueError("API_KEY not set for Gemini client.")
+            async with _llm_semaphore:
+                response = await asyncio.to_thread(
+                    api_client.models.generate_content,
+                    model=self.model_name,
+                    contents=contents,
+                    config=config
+                )
             
             if response_schema:
-                text = response.text.strip()
-                if text.startswith("```json"): text = text[7:]
-                if text.endswith("```"): text = text[:-3]
-                return json.loads(text.strip())
+                return _parse_json_response(response.text)
             return response.text
         except Exception as e:
             logger.error(f"Agent {self.name} failed: {str(e)}")
@@ -225,7 +422,9 @@ class Agent:
 
 # --- AGENT REGISTRY ---
 class EcoAtlasAgents:
-    @property
+    """Registry of synthesis agents; agents are stateless, so each is built once and reused"""
+
+    @cached_property
     def telemetry(self) -> Agent:
         return Agent(
             "Telemetry", 
@@ -235,7 +434,7 @@ class EcoAtlasAgents:
             "gemini-3-flash-preview"
         )
 
-    @property
+    @cached_property
     def observer(self) -> Agent:
         return Agent(
             "Observer", 
@@ -244,7 +443,7 @@ class EcoAtlasAgents:
             "Expert field biologist focused on subtle ecological shifts and visual patterns."
         )
 
-    @property
+    @cached_property
     def listener(self) -> Agent:
         return Agent(
             "Listener",
@@ -254,7 +453,7 @@ class EcoAtlasAgents:
             "gemini-2.5-flash-native-audio-preview-12-2025"
         )
     
-    @property
+    @cached_property
     def fusionist(self) -> Agent:
         return Agent(
             "Fusionist",
@@ -264,11 +463,11 @@ class EcoAtlasAgents:
             "gemini-3-pro-preview"
         )
 
-    @property
+    @cached_property
     def spatial(self) -> Agent:
         return Agent("Spatial", "Geospatial Grounding Specialist", "Verify landmarks and terrain features.", "Master cartographer with deep knowledge of global trails.", "gemini-2.5-flash", tools=[types.Tool(google_maps=types.GoogleMaps())])
 
-    @property
+    @cached_property
     def historian(self) -> Agent:
         return Agent(
             "Historian", 
@@ -278,7 +477,7 @@ class EcoAtlasAgents:
             "gemini-3-pro-preview"
         )
 
-    @property
+    @cached_property
     def bard(self) -> Agent:
         return Agent(
             "Bard", 
@@ -288,65 +487,78 @@ class EcoAtlasAgents:
             "gemini-3-pro-preview"
         )
 
+_atlas_agents = EcoAtlasAgents()
+
+
+def _json_text(value: Any) -> str:
+    """Compact JSON for embedding in agent prompts (orjson, several times faster than json.dumps)"""
+    return orjson.dumps(value).decode()
+
 # --- ORCHESTRATOR ---
 class EcoAtlasCrew:
     def __init__(self, history: List[Dict[str, Any]]):
         self.history = history
-        self.agents = EcoAtlasAgents()
+        self.agents = _atlas_agents
 
-    async def run_mission(self, image_b64_list: List[str], mime_type: str, park_name: str, sensor_data: List[Dict[str, Any]]) -> Dict[str, Any]:
-        media_parts = [types.Part.from_bytes(data=base64.b64decode(b64), mime_type=mime_type) for b64 in image_b64_list]
+    async def run_mission(self, images: List[bytes], mime_type: str, park_name: str, sensor_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+        media_parts = [types.Part.from_bytes(data=image, mime_type=mime_type) for image in images]
         
-        # Step 0: Telemetry
-        telemetry_events = await self.agents.telemetry.execute(
-            "TASK: Process passive sensor data\nGOAL: Identify meaningful movement/environmental events.",
-            context=f"Raw Sensor Stream: {json.dumps(sensor_data)}",
-            response_schema=TELEMETRY_SCHEMA
+        # Each stage is a Gemini round trip and waits only on the stages its context uses
+        # Step 0 + 2: Telemetry and Acoustic (both need only the raw inputs)
+        telemetry_events, acoustic = await asyncio.gather(
+            self.agents.telemetry.execute(
+                "TASK: Process passive sensor data\nGOAL: Identify meaningful movement/environmental events.",
+                context=f"Raw Sensor Stream: {_json_text(sensor_data)}",
+                response_schema=_TELEMETRY_SCHEMA_COMPILED
+            ),
+            self.agents.listener.execute(
+                "TASK: Ambient environmental audio analysis\nGOAL: Infer environmental soundscape characteristics.",
+                context=f"Location: {park_name}.",
+                media_parts=media_parts,
+                response_schema=_ACOUSTIC_SCHEMA_COMPILED
+            ),
         )
+        # Serialize each stage's output once; later stages embed the same text
+        telemetry_json = _json_text(telemetry_events)
+        acoustic_json = _json_text(acoustic)
 
         # Step 1: Perception
         perception = await self.agents.observer.execute(
             "TASK: Visual environmental reasoning\nGOAL: Infer environmental characteristics from visual data. REASON ACROSS TIME.",
-            context=f"Park: {park_name}. Telemetry Context: {json.dumps(telemetry_events)}",
+            context=f"Park: {park_name}. Telemetry Context: {telemetry_json}",
             media_parts=media_parts,
-            response_schema=PERCEPTION_SCHEMA
-        )
-
-        # Step 2: Acoustic
-        acoustic = await self.agents.listener.execute(
-            "TASK: Ambient environmental audio analysis\nGOAL: Infer environmental soundscape characteristics.",
-            context=f"Location: {park_name}.",
-            media_parts=media_parts,
-            response_schema=ACOUSTIC_SCHEMA
+            response_schema=_PERCEPTION_SCHEMA_COMPILED
         )
+        perception_json = _json_text(perception)
 
         # Step 3: Perspective Fusion
         fusion = await self.agents.fusionist.execute(
             "TASK: Satellite and ground perspective fusion\nGOAL: Compare large-scale patterns with ground observations.",
-            context=f"Location: {park_name}. Ground Perception: {json.dumps(perception)}",
+            context=f"Location: {park_name}. Ground Perception: {perception_json}",
             media_parts=media_parts,
-            response_schema=FUSION_SCHEMA
+            response_schema=_FUSION_SCHEMA_COMPILED
         )
-
-        # Step 4: Spatial Grounding
-        spatial = await self.agents.spatial.execute(f"Ground signals in reality: {json.dumps(perception)}, {json.dumps(acoustic)}, and orbital fusion: {json.dumps(fusion)}")
-
-        # Step 5: Historical Comparison (Historian)
-        temporal = await self.agents.historian.execute(
-            "TASK: Temporal environmental comparison\n"
-            "INPUTS: current observations, historical visit data, seasonal context\n"
-            "GOAL: Identify long-term environmental patterns.\n"
-            "INSTRUCTIONS:\n"
-            "- Compare gently.\n"
-            "- Avoid strong conclusions.\n"
-            "- Highlight gradual trends.\n"
-            "- Note uncertainty clearly.\n"
-            "OUTPUT FORMAT: Short narrative comparison using language like: 'Compared to previous visits...' or 'This area appears slightly different than before...'", 
-            context=f"History: {json.dumps(self.history)}\n"
-                    f"Current Signals: {json.dumps(perception)}\n"
-                    f"Orbital Perspective: {json.dumps(fusion)}\n"
-                    f"Park: {park_name}",
-            response_schema=TEMPORAL_SCHEMA
+        fusion_json = _json_text(fusion)
+
+        # Step 4 + 5: Spatial Grounding and Historical Comparison (Historian)
+        spatial, temporal = await asyncio.gather(
+            self.agents.spatial.execute(f"Ground signals in reality: {perception_json}, {acoustic_json}, and orbital fusion: {fusion_json}"),
+            self.agents.historian.execute(
+                "TASK: Temporal environmental comparison\n"
+                "INPUTS: current observations, historical visit data, seasonal context\n"
+                "GOAL: Identify long-term environmental patterns.\n"
+                "INSTRUCTIONS:\n"
+                "- Compare gently.\n"
+                "- Avoid strong conclusions.\n"
+                "- Highlight gradual trends.\n"
+                "- Note uncertainty clearly.\n"
+                "OUTPUT FORMAT: Short narrative comparison using language like: 'Compared to previous visits...' or 'This area appears slightly different than before...'", 
+                context=f"History: {_json_text(self.history)}\n"
+                        f"Current Signals: {perception_json}\n"
+                        f"Orbital Perspective: {fusion_json}\n"
+                        f"Park: {park_name}",
+                response_schema=_TEMPORAL_SCHEMA_COMPILED
+            ),
         )
 
         # Step 6: Final Narrative Synthesis (Bard)
@@ -355,13 +567,13 @@ class EcoAtlasCrew:
             "INPUTS: motion timeline, visual observations, audio observations, elevation profile, satellite comparison, temporal deltas\n"
             "GOAL: Create a coherent environmental narrative.\n"
             "TONE: Reflective and calm.",
-            context=f"Motion: {json.dumps(telemetry_events)}\n"
-                    f"Visual: {json.dumps(perception)}\n"
-                    f"Audio: {json.dumps(acoustic)}\n"
-                    f"Fusion: {json.dumps(fusion)}\n"
-                    f"Temporal Narrative: {json.dumps(temporal)}\n"
+            context=f"Motion: {telemetry_json}\n"
+                    f"Visual: {perception_json}\n"
+                    f"Audio: {acoustic_json}\n"
+                    f"Fusion: {fusion_json}\n"
+                    f"Temporal Narrative: {_json_text(temporal)}\n"
                     f"Spatial Context: {spatial}",
-            response_schema=NARRATIVE_SCHEMA
+            response_schema=_NARRATIVE_SCHEMA_COMPILED
         )
 
         return {
@@ -453,9 +665,34 @@ NARRATIVE_SCHEMA = {
     "required": ["consistent", "different", "changing", "uncertain"]
 }
 
-app = FastAPI(title="EcoAtlas API", version="2.0.0")
+# Validated into SDK Schema objects once; a plain dict is re-converted on every agent call
+_TELEMETRY_SCHEMA_COMPILED = types.Schema.model_validate(TELEMETRY_SCHEMA)
+_PERCEPTION_SCHEMA_COMPILED = types.Schema.model_validate(PERCEPTION_SCHEMA)
+_ACOUSTIC_SCHEMA_COMPILED = types.Schema.model_validate(ACOUSTIC_SCHEMA)
+_FUSION_SCHEMA_COMPILED = types.Schema.model_validate(FUSION_SCHEMA)
+_TEMPORAL_SCHEMA_COMPILED = types.Schema.model_validate(TEMPORAL_SCHEMA)
+_NARRATIVE_SCHEMA_COMPILED = types.Schema.model_validate(NARRATIVE_SCHEMA)
+
+app = FastAPI(title="EcoAtlas API", version="2.0.0", default_response_class=ORJSONResponse)
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
 
+
+class JSONGZipMiddleware(GZipMiddleware):
+    """GZip API responses, but pass binary downloads (media, PDFs) through untouched so they keep sendfile"""
+    SKIP_PREFIXES = ("/api/v1/media/", "/api/v1/offline-maps/", "/uploads/")
+    SKIP_SUFFIXES = ("/pdf", "/official-map", "/model.obj", "/photo")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            path = scope.get("path", "")
+            if path.startswith(self.SKIP_PREFIXES) or path.endswith(self.SKIP_SUFFIXES):
+                await self.app(scope, receive, send)
+                return
+        await super().__call__(scope, receive, send)
+
+
+app.add_middleware(JSONGZipMiddleware, minimum_size=1024)
+
 # Authentication
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 security = HTTPBearer(auto_error=False)
@@ -473,7 +710,13 @@ async def get_current_user(
     user_id = payload.get("sub")
     if not user_id:
         return None
-    return db.query(User).filter(User.id == user_id).first()
+    return db.get(User, user_id)
+
+async def require_user(user: Optional[User] = Depends(get_current_user)) -> User:
+    """Current user, or 401 for anonymous requests"""
+    if not user:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    return user
 
 # Root endpoint
 @app.get("/")
@@ -491,6 +734,11 @@ async def startup_event():
         logger.info("Redis not available - using in-memory storage")
     logger.info("EcoAtlas backend started")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    if _http_client is not None:
+        await _http_client.aclose()
+
 # Initialize real-time processor
 realtime_processor = RealtimeProcessor(api_key=os.environ.get("API_KEY"))
 
@@ -502,17 +750,15 @@ async def run_synthesis(
     sensor_json: str = Form("[]")
 ):
     try:
-        image_b64_list = []
-        mime_type = "image/jpeg"
-        for img in images:
-            content = await img.read()
-            image_b64_list.append(base64.b64encode(content).decode('utf-8'))
-            mime_type = img.content_type
+        # Raw bytes go straight into Gemini parts; no base64 round trip. Uploads
+        # spooled to disk are read in threads, so read them all at once
+        image_bytes_list = list(await asyncio.gather(*(img.read() for img in images)))
+        mime_type = images[-1].content_type if images else "image/jpeg"
             
-        history = json.loads(history_json)
-        sensors = json.loads(sensor_json)
+        history = orjson.loads(history_json)
+        sensors = orjson.loads(sensor_json)
         crew = EcoAtlasCrew(history)
-        result = await crew.run_mission(image_b64_list, mime_type, park_name, sensors)
+        result = await crew.run_mission(image_bytes_list, mime_type, park_name, sensors)
         return {"status": "success", "data": result}
     except Exception as e:
         logger.error(f"Synthesis failed: {str(e)}")
@@ -544,7 +790,7 @@ class CreateSessionRequest(BaseModel):
     device_id: Optional[str] = None
 
 @app.post("/api/v1/sessions")
-async def create_session(
+def create_session(
     request: CreateSessionRequest,
     db: Session = Depends(get_db)
 ):
@@ -573,17 +819,17 @@ async def create_session(
     return {"session_id": session_id, "status": "created"}
 
 @app.get("/api/v1/sessions/{session_id}")
-async def get_session(session_id: str, db: Session = Depends(get_db)):
+def get_session(session_id: str, db: Session = Depends(get_db)):
     """Get session details"""
-    session = db.query(HikeSession).filter(HikeSession.id == session_id).first()
+    session = get_session_cached(db, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     return {
-        "id": session.id,
-        "park_name": session.park_name,
-        "status": session.status,
-        "start_time": session.start_time.isoformat() if session.start_time else None,
-        "device_id": session.device_id
+        "id": session["id"],
+        "park_name": session["park_name"],
+        "status": session["status"],
+        "start_time": session["start_time"],
+        "device_id": session["device_id"]
     }
 
 class EndSessionRequest(BaseModel):
@@ -592,13 +838,13 @@ class EndSessionRequest(BaseModel):
     route_path: Optional[List[Dict[str, Any]]] = None
 
 @app.post("/api/v1/sessions/{session_id}/end")
-async def end_session(
+def end_session(
     session_id: str,
     request: EndSessionRequest,
     db: Session = Depends(get_db)
 ):
     """End an active session"""
-    session = db.query(HikeSession).filter(HikeSession.id == session_id).first()
+    session = db.get(HikeSession, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     session.status = 'completed'
@@ -608,11 +854,12 @@ async def end_session(
     logger.info(f"Session {session_id} ended: {request.distance_miles} miles, {request.duration_minutes} minutes")
     
     db.commit()
+    invalidate_session(session_id)
     return {"status": "completed", "session_id": session_id}
 
 # Device Management
 @app.post("/api/v1/devices/ecodroid")
-async def register_ecodroid_device(
+def register_ecodroid_device(
     device_id: str,
     device_name: Optional[str] = None,
     firmware_version: Optional[str] = None,
@@ -645,7 +892,7 @@ async def register_ecodroid_device(
     return {"device_id": device_id, "status": "registered"}
 
 @app.get("/api/v1/devices/ecodroid/{device_id}")
-async def get_ecodroid_device(device_id: str, db: Session = Depends(get_db)):
+def get_ecodroid_device(device_id: str, db: Session = Depends(get_db)):
     """Get EcoDroid device status"""
     device = db.query(EcoDroidDevice).filter(EcoDroidDevice.id == device_id).first()
     if not device:
@@ -660,7 +907,7 @@ async def get_ecodroid_device(device_id: str, db: Session = Depends(get_db)):
 
 # Wearable Integration
 @app.post("/api/v1/wearables/alert")
-async def send_wearable_alert(
+def send_wearable_alert(
     user_id: str,
     alert_type: str,
     message: str,
@@ -685,7 +932,7 @@ async def send_wearable_alert(
     return {"alert_id": alert.id, "status": "queued"}
 
 @app.get("/api/v1/wearables/alerts/{user_id}")
-async def get_pending_alerts(user_id: str, db: Session = Depends(get_db)):
+def get_pending_alerts(user_id: str, db: Session = Depends(get_db)):
     """Get pending alerts for user"""
     alerts = db.query(WearableAlert).filter(
         WearableAlert.user_id == user_id,
@@ -701,7 +948,7 @@ async def get_pending_alerts(user_id: str, db: Session = Depends(get_db)):
 
 # Real-time Observations
 @app.get("/api/v1/sessions/{session_id}/observations")
-async def get_session_observations(
+def get_session_observations(
     session_id: str,
     limit: int = 50,
     db: Session = Depends(get_db)
@@ -727,9 +974,9 @@ async def get_session_context(session_id: str):
     return context
 
 @app.get("/api/v1/sessions/{session_id}/record")
-async def get_session_record(session_id: str, db: Session = Depends(get_db)):
+def get_session_record(session_id: str, db: Session = Depends(get_db)):
     """Get environmental record for a completed session"""
-    session = db.query(HikeSession).filter(HikeSession.id == session_id).first()
+    session = get_session_cached(db, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
@@ -741,9 +988,9 @@ async def get_session_record(session_id: str, db: Session = Depends(get_db)):
     if not record:
         # Return session data as fallback
         return {
-            "park_name": session.park_name,
-            "timestamp": session.start_time.isoformat() if session.start_time else None,
-            "status": session.status,
+            "park_name": session["park_name"],
+            "timestamp": session["start_time"],
+            "status": session["status"],
             "summary": "Environmental record not yet generated",
             "tags": [],
             "multimodal_evidence": []
@@ -1386,7 +1633,7 @@ class MagicLinkRequest(BaseModel):
     email: str
 
 @app.post("/api/v1/auth/magic-link")
-async def request_magic_link(request: MagicLinkRequest, db: Session = Depends(get_db)):
+def request_magic_link(request: MagicLinkRequest, db: Session = Depends(get_db)):
     """Request magic link"""
     success = send_magic_link(request.email, db)
     if success:
@@ -1394,7 +1641,7 @@ async def request_magic_link(request: MagicLinkRequest, db: Session = Depends(ge
     raise HTTPException(status_code=500, detail="Failed to send magic link")
 
 @app.get("/api/v1/auth/verify")
-async def verify_magic_link_token(token: str = Query(...), db: Session = Depends(get_db)):
+def verify_magic_link_token(token: str = Query(...), db: Session = Depends(get_db)):
     """Verify magic link token"""
     try:
         user = verify_magic_link(token, db)
@@ -1778,14 +2025,13 @@ async def get_place_trails(place_id: str, db: Session = Depends(get_db)):
 
 # Favorites/Likes endpoints
 @app.post("/api/v1/places/{place_id}/favorite")
-async def favorite_place(
+def favorite_place(
     place_id: str,
     planned_visit_date: Optional[str] = Query(None),
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Add a place to user's favorites"""
-    from backend.favorites_service import add_favorite_place
     from datetime import datetime as dt
     
     visit_date = None
@@ -1801,36 +2047,33 @@ async def favorite_place(
     raise HTTPException(status_code=400, detail="Failed to add favorite")
 
 @app.delete("/api/v1/places/{place_id}/favorite")
-async def unfavorite_place(
+def unfavorite_place(
     place_id: str,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Remove a place from user's favorites"""
-    from backend.favorites_service import remove_favorite_place
     
     if remove_favorite_place(user.id, place_id, db):
         return {"success": True}
     raise HTTPException(status_code=404, detail="Favorite not found")
 
 @app.get("/api/v1/places/{place_id}/favorite")
-async def check_favorite(
+def check_favorite(
     place_id: str,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Check if a place is favorited"""
-    from backend.favorites_service import is_favorite
     
     return {"is_favorite": is_favorite(user.id, place_id, db)}
 
 @app.get("/api/v1/favorites")
-async def get_favorites(
+def get_favorites(
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get all user's favorite places"""
-    from backend.favorites_service import get_user_favorites
     
     return {"favorites": get_user_favorites(user.id, db)}
 
@@ -1849,6 +2092,7 @@ async def plan_trip(
     place_data = await get_place_details(place_id, db)
     if not place_data:
         raise HTTPException(status_code=404, detail="Place not found")
+    api_key = require_api_key()
     
     # Get weather if available
     try:
@@ -1862,10 +2106,6 @@ async def plan_trip(
         pass
     
     # Generate trip plan
-    api_key = os.getenv("API_KEY")
-    if not api_key:
-        raise HTTPException(status_code=503, detail="AI service not configured")
-    
     trip_plan = await generate_trip_plan(
         place_data.get("name", "Unknown Place"),
         visit_date,
@@ -1905,7 +2145,6 @@ async def get_trail_map(
     """
     from backend.trail_map_service import generate_trail_map
     from backend.official_map_service import OfficialMapService
-    from backend.redis_client import redis_client
     
     CACHE_TTL = 86400  # 24 hours
     cache_key = f"trail_map:{trail_id}"
@@ -2000,9 +2239,9 @@ class OfflineMapRequest(BaseModel):
     trailId: Optional[str] = None
 
 @app.post("/api/v1/maps/offline")
-async def download_offline_map(
+def download_offline_map(
     request: OfflineMapRequest,
-    user: User = Depends(get_current_user),
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -2012,8 +2251,6 @@ async def download_offline_map(
     Note: Full offline tiles via Google Maps are not supported on web.
     This endpoint provides essential data for offline-lite mode.
     """
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     
     place = db.query(Place).filter(Place.id == request.placeId).first()
     if not place:
@@ -2067,14 +2304,12 @@ async def download_offline_map(
     }
 
 @app.get("/api/v1/maps/offline/{place_id}/status")
-async def get_offline_map_status(
+def get_offline_map_status(
     place_id: str,
-    user: User = Depends(get_current_user),
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
     """Check if offline map is available for a place"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     
     place = db.query(Place).filter(Place.id == place_id).first()
     if not place:
@@ -2097,23 +2332,12 @@ async def identify_discovery(
     image: UploadFile = File(...),
     location: Optional[str] = Form(None),
     trail_context: Optional[str] = Form(None),
-    user: User = Depends(get_current_user)
+    user: User = Depends(get_current_user),
+    api_key: str = Depends(require_api_key)
 ):
     """Identify what user is seeing from an image (simpler endpoint for discovery mode)"""
-    from backend.companion_service import get_companion_service
-    import json
-    
-    api_key = os.getenv("API_KEY")
-    if not api_key:
-        raise HTTPException(status_code=503, detail="AI service not configured")
-    
     image_data = await image.read()
-    loc = None
-    if location:
-        try:
-            loc = json.loads(location)
-        except:
-            pass
+    loc = _parse_location(location)
     
     companion = get_companion_service(api_key)
     result = await companion.identify_from_image(image_data, loc, trail_context)
@@ -2128,23 +2352,12 @@ async def identify_image(
     image: UploadFile = File(...),
     location: Optional[str] = Query(None),
     trail_context: Optional[str] = Query(None),
-    user: User = Depends(get_current_user)
+    user: User = Depends(get_current_user),
+    api_key: str = Depends(require_api_key)
 ):
     """Identify what user is seeing from an image"""
-    from backend.companion_service import get_companion_service
-    import json
-    
-    api_key = os.getenv("API_KEY")
-    if not api_key:
-        raise HTTPException(status_code=503, detail="AI service not configured")
-    
     image_data = await image.read()
-    loc = None
-    if location:
-        try:
-            loc = json.loads(location)
-        except:
-            pass
+    loc = _parse_location(location)
     
     companion = get_companion_service(api_key)
     result = await companion.identify_from_image(image_data, loc, trail_context)
@@ -2159,23 +2372,12 @@ async def identify_audio(
     audio: UploadFile = File(...),
     location: Optional[str] = Query(None),
     trail_context: Optional[str] = Query(None),
-    user: User = Depends(get_current_user)
+    user: User = Depends(get_current_user),
+    api_key: str = Depends(require_api_key)
 ):
     """Identify sounds from audio recording"""
-    from backend.companion_service import get_companion_service
-    import json
-    
-    api_key = os.getenv("API_KEY")
-    if not api_key:
-        raise HTTPException(status_code=503, detail="AI service not configured")
-    
     audio_data = await audio.read()
-    loc = None
-    if location:
-        try:
-            loc = json.loads(location)
-        except:
-            pass
+    loc = _parse_location(location)
     
     companion = get_companion_service(api_key)
     result = await companion.identify_from_audio(audio_data, loc, trail_context)
@@ -2191,21 +2393,18 @@ async def get_trail_vegetation(
     db: Session = Depends(get_db)
 ):
     """Get vegetation and habitat information for a trail"""
-    from backend.companion_service import get_companion_service
-    
-    trail = db.query(Trail).filter(Trail.id == trail_id).first()
-    if not trail:
+    # Fetch trail + place in one round trip; the outer join keeps the
+    # "Trail not found" vs "Place not found" distinction.
+    row = db.query(Trail, Place).outerjoin(Place, Place.id == Trail.place_id).filter(Trail.id == trail_id).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Trail not found")
     
-    place = db.query(Place).filter(Place.id == trail.place_id).first()
+    trail, place = row
     if not place:
         raise HTTPException(status_code=404, detail="Place not found")
     
-    api_key = os.getenv("API_KEY")
-    if not api_key:
-        raise HTTPException(status_code=503, detail="AI service not configured")
-    
-    companion = get_companion_service(api_key)
+    # Checked after the lookups so a missing trail is still a 404
+    companion = get_companion_service(require_api_key())
     loc = place.location if isinstance(place.location, dict) else None
     result = await companion.get_trail_vegetation_info(trail.name, place.name, loc)
     
@@ -2220,19 +2419,12 @@ async def suggest_next_action(
     trail_progress: float = Query(...),
     time_of_day: str = Query(...),
     trail_context: Optional[str] = Query(None),
-    user: User = Depends(get_current_user)
+    user: User = Depends(get_current_user),
+    api_key: str = Depends(require_api_key)
 ):
     """Get suggestion for next best action"""
-    from backend.companion_service import get_companion_service
-    import json
-    
-    api_key = os.getenv("API_KEY")
-    if not api_key:
-        raise HTTPException(status_code=503, detail="AI service not configured")
-    
-    try:
-        loc = json.loads(current_location)
-    except:
+    loc = _parse_location(current_location)
+    if loc is None:
         raise HTTPException(status_code=400, detail="Invalid location format")
     
     companion = get_companion_service(api_key)
@@ -2265,102 +2457,112 @@ async def get_trail_details_endpoint(trail_id: str, db: Session = Depends(get_db
 
 # Hikes Routes
 @app.post("/api/v1/hikes")
-async def create_hike(
+def create_hike(
     trail_id: Optional[str] = None,
     place_id: Optional[str] = None,
-    user: User = Depends(get_current_user),
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
     """Create a new hike session"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     result = create_hike_session(user.id, trail_id, place_id, db)
     if not result:
         raise HTTPException(status_code=500, detail="Failed to create hike")
     return result
 
 @app.post("/api/v1/hikes/{hike_id}/start")
-async def start_hike_endpoint(
+def start_hike_endpoint(
     hike_id: str,
-    user: User = Depends(get_current_user),
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
     """Start a hike"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     if start_hike(hike_id, db):
         return {"status": "started"}
     raise HTTPException(status_code=404, detail="Hike not found")
 
 @app.post("/api/v1/hikes/{hike_id}/pause")
-async def pause_hike_endpoint(
+def pause_hike_endpoint(
     hike_id: str,
-    user: User = Depends(get_current_user),
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
     """Pause a hike"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     if pause_hike(hike_id, db):
         return {"status": "paused"}
     raise HTTPException(status_code=404, detail="Hike not found")
 
+def _compute_achievements_task(user_id: str, hike_id: str) -> None:
+    """Background task: compute achievements with a dedicated session"""
+    db = SessionLocal()
+    try:
+        compute_achievements(user_id, hike_id, db)
+    finally:
+        db.close()
+    invalidate_user_stats_cache(user_id)
+
 @app.post("/api/v1/hikes/{hike_id}/end")
-async def end_hike_endpoint(
+def end_hike_endpoint(
     hike_id: str,
+    background_tasks: BackgroundTasks,
     distance_miles: Optional[float] = None,
     duration_minutes: Optional[int] = None,
-    user: User = Depends(get_current_user),
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
     """End a hike"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     if end_hike(hike_id, distance_miles, duration_minutes, db):
-        # Compute achievements
-        compute_achievements(user.id, hike_id, db)
+        invalidate_user_stats_cache(user.id)
+        # Compute achievements after the response is sent
+        background_tasks.add_task(_compute_achievements_task, user.id, hike_id)
         return {"status": "completed"}
     raise HTTPException(status_code=404, detail="Hike not found")
 
-@app.post("/api/v1/hikes/{hike_id}/generate-summary")
+@app.post("/api/v1/hikes/{hike_id}/generate-summary", status_code=202)
 async def generate_hike_summary_endpoint(
     hike_id: str,
-    user: User = Depends(get_current_user),
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
-    """Generate comprehensive hike summary using Gemini Vision"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
+    """
+    Queue comprehensive hike summary generation using Gemini Vision.
+    Poll GET /api/v1/hikes/{hike_id}/summary/status for the result.
+    """
     
-    from backend.hike_summary_service import generate_hike_summary
-    api_key = os.environ.get("API_KEY")
-    if not api_key:
-        raise HTTPException(status_code=500, detail="API key not configured")
+    if not db.query(Hike.id).filter(Hike.id == hike_id, Hike.user_id == user.id).first():
+        raise HTTPException(status_code=404, detail="Hike not found")
     
-    result = await generate_hike_summary(hike_id, db, api_key)
-    if not result.get("success"):
-        raise HTTPException(status_code=500, detail=result.get("error", "Failed to generate summary"))
+    job = start_hike_summary_job(hike_id, require_api_key())
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "status_url": f"/api/v1/hikes/{hike_id}/summary/status",
+    }
+
+@app.get("/api/v1/hikes/{hike_id}/summary/status")
+def get_hike_summary_status_endpoint(
+    hike_id: str,
+    user: User = Depends(require_user),
+    db: Session = Depends(get_db)
+):
+    """Get the status (and result, once completed) of the latest summary job"""
     
-    return result
+    if not db.query(Hike.id).filter(Hike.id == hike_id, Hike.user_id == user.id).first():
+        raise HTTPException(status_code=404, detail="Hike not found")
+    
+    job = get_hike_summary_job(hike_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="No summary job found")
+    return job
 
 @app.post("/api/v1/hikes/{hike_id}/generate-narrative")
 async def generate_hike_narrative_endpoint(
     hike_id: str,
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    user: User = Depends(require_user),
+    db: Session = Depends(get_db),
+    _narrative_enabled: None = Depends(require_narrative_enabled),
+    api_key: str = Depends(require_api_key)
 ):
     """Generate AI journal narrative for a completed hike"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    
-    # Check feature flag
-    feature_enabled = os.environ.get("FEATURE_AI_JOURNAL_NARRATIVE", "false").lower() == "true"
-    if not feature_enabled:
-        raise HTTPException(status_code=403, detail="AI journal narrative feature is not enabled")
-    
-    api_key = os.environ.get("API_KEY")
-    if not api_key:
-        raise HTTPException(status_code=500, detail="API key not configured")
     
     result = await generate_hike_narrative(hike_id, db, api_key)
     if not result.get("success"):
@@ -2369,56 +2571,52 @@ async def generate_hike_narrative_endpoint(
     return result
 
 @app.post("/api/v1/hikes/{hike_id}/route")
-async def upload_route_points_endpoint(
+def upload_route_points_endpoint(
     hike_id: str,
-    points: List[Dict[str, Any]],
-    user: User = Depends(get_current_user),
+    points: List[RoutePointCreate],
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
     """Upload route points"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    if upload_route_points(hike_id, points, db):
+    if upload_route_points(hike_id, [p.model_dump() for p in points], db):
         return {"status": "uploaded", "count": len(points)}
     raise HTTPException(status_code=404, detail="Hike not found")
 
 @app.post("/api/v1/hikes/{hike_id}/sensors")
-async def upload_sensor_batch_endpoint(
+def upload_sensor_batch_endpoint(
     hike_id: str,
     batch: Dict[str, Any],
-    user: User = Depends(get_current_user),
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
     """Upload sensor batch"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     if upload_sensor_batch(hike_id, batch, db):
         return {"status": "uploaded"}
     raise HTTPException(status_code=404, detail="Hike not found")
 
 @app.get("/api/v1/hikes")
-async def get_hikes_endpoint(
-    user: User = Depends(get_current_user),
+def get_hikes_endpoint(
+    user: User = Depends(require_user),
     status: Optional[str] = None,
     limit: int = 50,
     offset: int = 0,
     db: Session = Depends(get_db)
 ):
     """Get user's hike history"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     return {"hikes": get_hike_history(user.id, limit, db, status)}
 
 @app.get("/api/v1/hikes/active")
-async def get_active_hike_endpoint(
-    user: User = Depends(get_current_user),
+def get_active_hike_endpoint(
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
     """Get the current active hike for the user (if any)"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     
-    active_hike = db.query(Hike).filter(
+    active_hike = db.query(Hike).options(
+        joinedload(Hike.trail).joinedload(Trail.place),
+        selectinload(Hike.discoveries),
+        selectinload(Hike.media),
+    ).filter(
         Hike.user_id == user.id,
         Hike.status == "active"
     ).order_by(Hike.start_time.desc()).first()
@@ -2427,26 +2625,15 @@ async def get_active_hike_endpoint(
         raise HTTPException(status_code=404, detail="No active hike found")
     
     logger.info(f"Retrieved active hike {active_hike.id} for user {user.id}")
-    return {
-        "id": active_hike.id,
-        "status": active_hike.status,
-        "start_time": active_hike.start_time.isoformat() if active_hike.start_time else None,
-        "trail_id": active_hike.trail_id,
-        "place_id": active_hike.place_id,
-        "trail": active_hike.trail,
-        "discoveries": active_hike.discoveries or [],
-        "media": active_hike.media or []
-    }
+    return HikeActiveResponse.model_validate(active_hike)
 
 @app.get("/api/v1/hikes/{hike_id}")
-async def get_hike_endpoint(
+def get_hike_endpoint(
     hike_id: str,
-    user: User = Depends(get_current_user),
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
     """Get hike details"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     result = get_hike_details(hike_id, user.id, db)
     if not result:
         raise HTTPException(status_code=404, detail="Hike not found")
@@ -2465,17 +2652,15 @@ class JournalSearchRequest(BaseModel):
     filters: Optional[Dict[str, Any]] = None
 
 @app.patch("/api/v1/hikes/{hike_id}")
-async def update_hike_endpoint(
+def update_hike_endpoint(
     hike_id: str,
     update_data: HikeUpdateRequest,
-    user: User = Depends(get_current_user),
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
     """Update hike (e.g., rename, update metadata)"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     
-    hike = db.query(Hike).filter(Hike.id == hike_id, Hike.user_id == user.id).first()
+    hike = _get_owned_hike(db, hike_id, user.id)
     if not hike:
         raise HTTPException(status_code=404, detail="Hike not found")
     
@@ -2489,83 +2674,121 @@ async def update_hike_endpoint(
     if update_data.duration_minutes is not None:
         hike.duration_minutes = update_data.duration_minutes
     if update_data.end_time is not None:
-        from datetime import datetime
-        hike.end_time = datetime.fromisoformat(update_data.end_time.replace('Z', '+00:00'))
+        hike.end_time = _parse_iso8601(update_data.end_time)
     if update_data.elevation_gain_feet is not None:
         hike.elevation_gain_feet = update_data.elevation_gain_feet
     
-    hike.updated_at = datetime.utcnow()
+    hike.updated_at = _utcnow()
     db.commit()
-    db.refresh(hike)
     
+    # get_hike_details re-queries the hike, so no refresh is needed here
     return get_hike_details(hike_id, user.id, db)
 
 # Media Routes
 @app.post("/api/v1/hikes/{hike_id}/media/upload-url")
-async def get_upload_url_endpoint(
+def get_upload_url_endpoint(
     hike_id: str,
     content_type: str,
     category: Optional[str] = None,
-    user: User = Depends(get_current_user),
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
     """Get signed upload URL"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     result = get_signed_upload_url(user.id, hike_id, content_type, category, db)
     if not result:
         raise HTTPException(status_code=404, detail="Hike not found")
     return result
 
+# Keys the server hands out for hike media: hikes/{hike_id}/{uuid}.{ext} or {uuid}_{filename}.
+# They are written once, so get_media_file can let clients cache them forever.
+_HIKE_MEDIA_KEY_RE = re.compile(
+    r"hikes/[^/]+/[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}[._][^/]+"
+)
+
+
 @app.post("/api/v1/media/upload/{key:path}")
 async def upload_media_file(
     key: str,
     file: UploadFile = File(...),
-    user: User = Depends(get_current_user)
+    user: User = Depends(require_user),
+    db: Session = Depends(get_db)
 ):
     """Upload media file to local storage"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    data = await file.read()
-    if save_local_file(key, data):
+    if key.startswith("hikes/"):
+        # Only keys issued by get_signed_upload_url for the caller's own hike, and only once
+        issued = db.query(Media.id).join(Hike, Hike.id == Media.hike_id).filter(
+            Media.storage_key == key, Hike.user_id == user.id
+        ).first()
+        if not issued:
+            raise HTTPException(status_code=403, detail="Upload key was not issued for this user")
+        if await asyncio.to_thread(get_local_file_path(key).exists):
+            raise HTTPException(status_code=409, detail="Media already uploaded")
+    # Starlette spools uploads to a temp file; copy it in chunks off the event loop
+    if await asyncio.to_thread(save_local_stream, key, file.file) is not None:
         return {"success": True, "key": key}
+    # Don't leave a partial file behind to block the retry
+    await asyncio.to_thread(delete_local_file, key)
     raise HTTPException(status_code=500, detail="Failed to save file")
 
 @app.get("/api/v1/media/{key:path}")
-async def get_media_file(key: str):
+async def get_media_file(key: str, request: Request):
     """Get media file from local storage"""
     file_path = get_local_file_path(key)
-    if not file_path.exists():
+    try:
+        stat_result = await asyncio.to_thread(os.stat, file_path)
+    except OSError:
         raise HTTPException(status_code=404, detail="File not found")
-    return FileResponse(str(file_path))
+    if not S_ISREG(stat_result.st_mode):
+        raise HTTPException(status_code=404, detail="File not found")
+    # Server-issued hike media keys embed a UUID and are write-once, so their content never changes
+    headers = {"Cache-Control": "public, max-age=31536000, immutable"} if _HIKE_MEDIA_KEY_RE.fullmatch(key) else None
+    response = FileResponse(str(file_path), headers=headers, stat_result=stat_result)
+    etag = response.headers.get("etag")
+    if etag and request.headers.get("if-none-match") == etag:
+        not_modified_headers = {"ETag": etag}
+        if headers:
+            not_modified_headers.update(headers)
+        return Response(status_code=304, headers=not_modified_headers)
+    return response
 
 @app.post("/api/v1/media/{media_id}/register")
-async def register_media_endpoint(
+def register_media_endpoint(
     media_id: str,
     size_bytes: int,
     metadata: Optional[Dict[str, Any]] = None,
-    user: User = Depends(get_current_user),
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
     """Register uploaded media"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     result = register_uploaded_media(media_id, user.id, size_bytes, metadata, db)
     if not result:
         raise HTTPException(status_code=404, detail="Media not found")
     return {"id": result.id, "url": result.url}
 
 
+def _authorize_media(db: Session, media_id: Optional[str], user_id: str) -> Media:
+    """
+    Load a media item and verify it belongs to one of the user's hikes, in a single query.
+    Raises 404 if the media doesn't exist and 403 if it belongs to someone else.
+    """
+    row = db.query(Media, Hike.user_id).outerjoin(
+        Hike, Hike.id == Media.hike_id
+    ).filter(Media.id == media_id).first() if media_id else None
+    if not row:
+        raise HTTPException(status_code=404, detail="Media not found")
+    media, owner_id = row
+    if owner_id != user_id:
+        raise HTTPException(status_code=403, detail="Access denied")
+    return media
+
+
 @app.post("/api/v1/media/{media_id}/3d")
 async def start_media_3d_endpoint(
     media_id: str,
-    user: User = Depends(get_current_user),
+    user: User = Depends(require_user),
     db: Session = Depends(get_db),
 ):
     """Start a photo-to-3D job for a media item (DEV stub)."""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    from backend.photo_3d_service import start_photo_3d_job
     result = start_photo_3d_job(media_id, user.id, db)
     if not result.get("success"):
         raise HTTPException(status_code=400, detail=result.get("error", "Failed to start 3D job"))
@@ -2573,53 +2796,35 @@ async def start_media_3d_endpoint(
 
 
 @app.get("/api/v1/3d-jobs/{job_id}")
-async def get_3d_job_status_endpoint(
+def get_3d_job_status_endpoint(
     job_id: str,
-    user: User = Depends(get_current_user),
+    user: User = Depends(require_user),
     db: Session = Depends(get_db),
 ):
     """Get status of a 3D job (DEV stub)."""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    from backend.photo_3d_service import get_photo_3d_job
     job = get_photo_3d_job(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
 
     # Access control: ensure job belongs to the current user via hike ownership
-    media_id = job.get("media_id")
-    media = db.query(Media).filter(Media.id == media_id).first() if media_id else None
-    if not media:
-        raise HTTPException(status_code=404, detail="Media not found")
-    hike = db.query(Hike).filter(Hike.id == media.hike_id, Hike.user_id == user.id).first()
-    if not hike:
-        raise HTTPException(status_code=403, detail="Access denied")
+    _authorize_media(db, job.get("media_id"), user.id)
 
     return job
 
 
 @app.get("/api/v1/3d-jobs/{job_id}/model.obj")
-async def get_3d_job_model_obj(
+def get_3d_job_model_obj(
     job_id: str,
-    user: User = Depends(get_current_user),
+    user: User = Depends(require_user),
     db: Session = Depends(get_db),
 ):
     """Download placeholder OBJ for a completed 3D job (DEV stub)."""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    from backend.photo_3d_service import get_photo_3d_job, get_placeholder_obj
     job = get_photo_3d_job(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
 
     # Access control via hike ownership
-    media_id = job.get("media_id")
-    media = db.query(Media).filter(Media.id == media_id).first() if media_id else None
-    if not media:
-        raise HTTPException(status_code=404, detail="Media not found")
-    hike = db.query(Hike).filter(Hike.id == media.hike_id, Hike.user_id == user.id).first()
-    if not hike:
-        raise HTTPException(status_code=403, detail="Access denied")
+    _authorize_media(db, job.get("media_id"), user.id)
 
     if job.get("status") != "completed":
         raise HTTPException(status_code=409, detail=f"Job not completed (status={job.get('status')})")
@@ -2627,16 +2832,14 @@ async def get_3d_job_model_obj(
     return PlainTextResponse(get_placeholder_obj(), media_type="text/plain")
 
 @app.get("/api/v1/hikes/{hike_id}/media")
-async def get_hike_media_endpoint(
+def get_hike_media_endpoint(
     hike_id: str,
     type: Optional[str] = None,
     category: Optional[str] = None,
-    user: User = Depends(get_current_user),
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
     """Get hike media"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     return {"media": get_hike_media(hike_id, user.id, type, category, db)}
 
 @app.post("/api/v1/hikes/{hike_id}/media")
@@ -2644,31 +2847,27 @@ async def upload_hike_media_endpoint(
     hike_id: str,
     file: UploadFile = File(...),
     type: str = Form(...),
-    user: User = Depends(get_current_user),
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
     """Upload media directly to a hike"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     
     # Verify hike exists and belongs to user
-    hike = db.query(Hike).filter(Hike.id == hike_id, Hike.user_id == user.id).first()
+    hike = _get_owned_hike(db, hike_id, user.id)
     if not hike:
         raise HTTPException(status_code=404, detail="Hike not found")
     
-    # Save file locally
-    import uuid
-    file_key = f"hikes/{hike_id}/{uuid.uuid4()}_{file.filename}"
-    file_data = await file.read()
-    file_size = len(file_data)
-    
-    if not save_local_file(file_key, file_data):
+    # Save file locally; one UUID serves as both the media id and the key prefix
+    media_id = str(uuid.uuid4())
+    filename = os.path.basename(file.filename or "") or "upload"
+    file_key = f"hikes/{hike_id}/{media_id}_{filename}"
+    file_size = await asyncio.to_thread(save_local_stream, file_key, file.file)
+    if file_size is None:
         raise HTTPException(status_code=500, detail="Failed to save file")
     
     # Create media record
-    from backend.models import Media
     media = Media(
-        id=str(uuid.uuid4()),
+        id=media_id,
         hike_id=hike_id,
         type=type,
         storage_key=file_key,
@@ -2677,128 +2876,78 @@ async def upload_hike_media_endpoint(
         size_bytes=file_size
     )
     db.add(media)
+    # Flush applies column defaults (created_at) to the instance; serialize
+    # before commit expires it, so no refresh SELECT is needed
+    db.flush()
+    response = MediaResponse.model_validate(media)
     db.commit()
-    db.refresh(media)
     
     # Return full media object with created_at using Pydantic schema
-    return MediaResponse(
-        id=media.id,
-        hike_id=media.hike_id,
-        segment_id=media.segment_id,
-        type=media.type,
-        category=media.category,
-        storage_key=media.storage_key,
-        url=media.url,
-        mime_type=media.mime_type,
-        size_bytes=media.size_bytes,
-        width=media.width,
-        height=media.height,
-        duration_ms=media.duration_ms,
-        location=media.location,
-        meta_data=media.meta_data,
-        synced_at=media.synced_at,
-        created_at=media.created_at
-    )
+    return response
 
 @app.post("/api/v1/media/{media_id}/enhance")
 async def start_media_enhancement_endpoint(
     media_id: str,
     options: Dict[str, Any],
-    user: User = Depends(get_current_user),
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
     """Start enhancement job for a media item (opt-in)"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     
     # Verify media belongs to user's hike
-    media = db.query(Media).filter(Media.id == media_id).first()
-    if not media:
-        raise HTTPException(status_code=404, detail="Media not found")
+    _authorize_media(db, media_id, user.id)
     
-    hike = db.query(Hike).filter(Hike.id == media.hike_id, Hike.user_id == user.id).first()
-    if not hike:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
-    api_key = os.environ.get("API_KEY")
-    if not api_key:
-        raise HTTPException(status_code=500, detail="API key not configured")
-    
-    result = await start_enhancement_job(media_id, options, api_key, db)
+    result = await start_enhancement_job(media_id, options, require_api_key(), db)
     if not result.get("success"):
         raise HTTPException(status_code=500, detail=result.get("error", "Failed to start enhancement"))
     
     return result
 
 @app.get("/api/v1/media/{media_id}/enhancement-jobs")
-async def get_media_enhancement_jobs_endpoint(
+def get_media_enhancement_jobs_endpoint(
     media_id: str,
-    user: User = Depends(get_current_user),
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
     """Get enhancement jobs for a media item"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     
     # Verify media belongs to user's hike
-    media = db.query(Media).filter(Media.id == media_id).first()
-    if not media:
-        raise HTTPException(status_code=404, detail="Media not found")
-    
-    hike = db.query(Hike).filter(Hike.id == media.hike_id, Hike.user_id == user.id).first()
-    if not hike:
-        raise HTTPException(status_code=403, detail="Access denied")
+    _authorize_media(db, media_id, user.id)
     
     jobs = get_media_enhancement_jobs(media_id)
     return {"jobs": jobs}
 
 @app.get("/api/v1/enhancement-jobs/{job_id}")
-async def get_enhancement_job_status_endpoint(
+def get_enhancement_job_status_endpoint(
     job_id: str,
-    user: User = Depends(get_current_user),
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
     """Get status of an enhancement job"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     
     job = get_enhancement_job_status(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
     # Verify job belongs to user's media
-    media = db.query(Media).filter(Media.id == job.get("media_id")).first()
-    if not media:
-        raise HTTPException(status_code=404, detail="Media not found")
-    
-    hike = db.query(Hike).filter(Hike.id == media.hike_id, Hike.user_id == user.id).first()
-    if not hike:
-        raise HTTPException(status_code=403, detail="Access denied")
+    _authorize_media(db, job.get("media_id"), user.id)
     
     return job
 
 @app.post("/api/v1/enhancement-jobs/{job_id}/cancel")
-async def cancel_enhancement_job_endpoint(
+def cancel_enhancement_job_endpoint(
     job_id: str,
-    user: User = Depends(get_current_user),
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
     """Cancel an enhancement job"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     
     job = get_enhancement_job_status(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
     # Verify job belongs to user's media
-    media = db.query(Media).filter(Media.id == job.get("media_id")).first()
-    if not media:
-        raise HTTPException(status_code=404, detail="Media not found")
-    
-    hike = db.query(Hike).filter(Hike.id == media.hike_id, Hike.user_id == user.id).first()
-    if not hike:
-        raise HTTPException(status_code=403, detail="Access denied")
+    _authorize_media(db, job.get("media_id"), user.id)
     
     success = cancel_enhancement_job(job_id)
     if not success:
@@ -2808,41 +2957,35 @@ async def cancel_enhancement_job_endpoint(
 
 # Insights Routes
 @app.post("/api/v1/hikes/{hike_id}/insights/start")
-async def start_insights_endpoint(
+def start_insights_endpoint(
     hike_id: str,
-    user: User = Depends(get_current_user),
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
     """Start hike analysis"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     if start_analysis(hike_id, db):
         return {"status": "started"}
     raise HTTPException(status_code=404, detail="Hike not found")
 
 @app.get("/api/v1/hikes/{hike_id}/insights/status")
-async def get_insights_status_endpoint(
+def get_insights_status_endpoint(
     hike_id: str,
-    user: User = Depends(get_current_user),
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
     """Get insight status"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     result = get_insight_status(hike_id, db)
     if not result:
         return {"status": "pending"}
     return result
 
 @app.get("/api/v1/hikes/{hike_id}/insights/report")
-async def get_insights_report_endpoint(
+def get_insights_report_endpoint(
     hike_id: str,
-    user: User = Depends(get_current_user),
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
     """Get insight report"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     result = get_insight_report(hike_id, db)
     if not result:
         raise HTTPException(status_code=404, detail="Report not found")
@@ -2850,30 +2993,26 @@ async def get_insights_report_endpoint(
 
 # Achievements Routes
 @app.get("/api/v1/achievements")
-async def get_achievements_endpoint(db: Session = Depends(get_db)):
+def get_achievements_endpoint(db: Session = Depends(get_db)):
     """Get all achievements"""
     return {"achievements": get_all_achievements(db)}
 
 @app.get("/api/v1/achievements/user")
-async def get_user_achievements_endpoint(
-    user: User = Depends(get_current_user),
+def get_user_achievements_endpoint(
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
     """Get user achievements"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     return {"achievements": get_user_achievements(user.id, db)}
 
 @app.get("/api/v1/achievements/mine")
-async def get_my_achievements_endpoint(
+def get_my_achievements_endpoint(
     category: Optional[str] = None,
     limit: int = 100,
-    user: User = Depends(get_current_user),
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
     """Get current user's achievements (alias for /achievements/user)"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     achievements = get_user_achievements(user.id, db)
     # Filter by category if provided
     if category:
@@ -2884,42 +3023,72 @@ async def get_my_achievements_endpoint(
 
 @app.get("/api/v1/achievements/park-badges")
 async def get_park_badges_endpoint(
-    user: User = Depends(get_current_user),
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
     """
     Get user's park badges with official NPS imagery.
     Returns both unlocked and available park achievements.
     """
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     
-    from backend.achievements_service import get_user_achievements, get_park_badge_info
+    from sqlalchemy import and_
     
-    user_achievements = get_user_achievements(user.id, db)
+    # One pass over park achievements, outer-joined to this user's unlocks
+    rows = db.query(Achievement, UserAchievement).outerjoin(
+        UserAchievement,
+        and_(
+            UserAchievement.achievement_id == Achievement.id,
+            UserAchievement.user_id == user.id,
+        ),
+    ).filter(
+        Achievement.category.in_(["national_park", "state_park", "park_explorer"])
+    ).order_by(UserAchievement.unlocked_at.desc()).all()
     
-    # Separate park achievements from other achievements
     park_badges = []
-    other_achievements = []
+    locked_parks = []
+    national_parks = state_parks = 0
+    for ach, ua in rows:
+        if ua is None:
+            locked_parks.append({
+                "id": ach.id,
+                "code": ach.code,
+                "name": ach.name,
+                "description": ach.description,
+                "icon": ach.icon,
+                "category": ach.category,
+                "locked": True,
+            })
+            continue
+        national_parks += ach.category == "national_park"
+        state_parks += ach.category == "state_park"
+        park_badges.append({
+            "id": ua.id,
+            "achievement": {
+                "id": ach.id,
+                "code": ach.code,
+                "name": ach.name,
+                "description": ach.description,
+                "icon": ach.icon,
+                "category": ach.category
+            },
+            "unlocked_at": ua.unlocked_at.isoformat() if ua.unlocked_at else None,
+            "hike_id": ua.hike_id
+        })
     
-    for ua in user_achievements:
-        ach = ua.get("achievement", {})
-        cat = ach.get("category", "")
-        if cat in ("national_park", "state_park", "park_explorer"):
-            park_badges.append(ua)
-        else:
-            other_achievements.append(ua)
+    # Enrich park badges with NPS image data (lookups run concurrently)
+    park_names = [b.get("achievement", {}).get("name", "").replace(" Explorer", "") for b in park_badges]
+    unique_names = list(dict.fromkeys(park_names))
+    nps_results = await asyncio.gather(
+        *(get_park_badge_info(name) for name in unique_names),
+        return_exceptions=True,
+    )
+    nps_by_name = dict(zip(unique_names, nps_results))
     
-    # Enrich park badges with NPS image data
     enriched_badges = []
-    for badge in park_badges:
-        ach = badge.get("achievement", {})
-        park_name = ach.get("name", "").replace(" Explorer", "")
-        
-        # Try to get NPS badge info
-        try:
-            nps_info = await get_park_badge_info(park_name)
-        except Exception:
+    for badge, park_name in zip(park_badges, park_names):
+        nps_info = nps_by_name[park_name]
+        if isinstance(nps_info, Exception):
+            logger.warning(f"NPS badge lookup failed for {badge.get('achievement', {}).get('name')}: {nps_info}")
             nps_info = {"badge_image": None, "all_images": []}
         
         enriched_badges.append({
@@ -2932,214 +3101,194 @@ async def get_park_badges_endpoint(
             "all_images": nps_info.get("all_images", [])[:3],
         })
     
-    # Get all available park achievements (locked ones)
-    all_achievements = db.query(Achievement).filter(
-        Achievement.category.in_(["national_park", "state_park", "park_explorer"])
-    ).all()
-    
-    unlocked_ids = {b["achievement"]["id"] for b in park_badges}
-    locked_parks = []
-    for ach in all_achievements:
-        if ach.id not in unlocked_ids:
-            locked_parks.append({
-                "id": ach.id,
-                "code": ach.code,
-                "name": ach.name,
-                "description": ach.description,
-                "icon": ach.icon,
-                "category": ach.category,
-                "locked": True,
-            })
-    
     return {
         "unlocked": enriched_badges,
         "locked": locked_parks,
         "total_parks_visited": len(enriched_badges),
         "stats": {
-            "national_parks": len([b for b in enriched_badges if b.get("achievement", {}).get("category") == "national_park"]),
-            "state_parks": len([b for b in enriched_badges if b.get("achievement", {}).get("category") == "state_park"]),
+            "national_parks": national_parks,
+            "state_parks": state_parks,
         }
     }
 
 # Devices Routes
 @app.post("/api/v1/devices")
-async def register_device_endpoint(
+def register_device_endpoint(
     device_type: str,
     device_id: Optional[str] = None,
     device_name: Optional[str] = None,
     token: Optional[str] = None,
     capabilities: Optional[Dict[str, Any]] = None,
-    user: User = Depends(get_current_user),
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
     """Register device"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     result = register_device(user.id, device_type, device_id, device_name, token, capabilities, db)
     if not result:
         raise HTTPException(status_code=500, detail="Failed to register device")
     return result
 
 @app.post("/api/v1/devices/{device_id}/status")
-async def update_device_status_endpoint(
+def update_device_status_endpoint(
     device_id: str,
     status: str,
-    user: User = Depends(get_current_user),
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
     """Update device status"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     if update_device_status(device_id, user.id, status, db):
         return {"status": "updated"}
     raise HTTPException(status_code=404, detail="Device not found")
 
 @app.get("/api/v1/devices")
-async def get_devices_endpoint(
-    user: User = Depends(get_current_user),
+def get_devices_endpoint(
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
     """Get user devices"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     return {"devices": get_user_devices(user.id, db)}
 
 @app.delete("/api/v1/devices/{device_id}")
-async def remove_device_endpoint(
+def remove_device_endpoint(
     device_id: str,
-    user: User = Depends(get_current_user),
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
     """Remove device"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     if remove_device(device_id, user.id, db):
         return {"status": "removed"}
     raise HTTPException(status_code=404, detail="Device not found")
 
 # Export Routes
 @app.get("/api/v1/hikes/{hike_id}/export")
-async def export_hike_endpoint(
+def export_hike_endpoint(
     hike_id: str,
     format: str = "json",
-    user: User = Depends(get_current_user),
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
     """Export hike data"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    data = export_hike_data(hike_id, user.id, format, db)
-    if not data:
+    chunks = export_hike_data(hike_id, user.id, format, db)
+    if chunks is None:
         raise HTTPException(status_code=404, detail="Hike not found")
     
     content_type = "application/json" if format == "json" else "text/csv"
-    from fastapi.responses import Response
-    return Response(content=data, media_type=content_type)
+    return StreamingResponse(chunks, media_type=content_type)
 
 # Journal Routes
 @app.post("/api/v1/journal")
-async def create_journal_endpoint(
+def create_journal_endpoint(
     title: str,
     content: str,
     hike_id: Optional[str] = None,
     entry_type: str = "reflection",
     metadata: Optional[Dict[str, Any]] = None,
-    user: User = Depends(get_current_user),
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
     """Create journal entry"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     result = create_journal_entry(user.id, title, content, hike_id, entry_type, metadata, db)
     if not result:
         raise HTTPException(status_code=500, detail="Failed to create entry")
     return result
 
 @app.get("/api/v1/journal")
-async def get_journal_endpoint(
+def get_journal_endpoint(
     hike_id: Optional[str] = None,
     entry_type: Optional[str] = None,
     limit: int = 50,
-    user: User = Depends(get_current_user),
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
     """Get journal entries"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     return {"entries": get_journal_entries(user.id, hike_id, entry_type, limit, db)}
 
 @app.put("/api/v1/journal/{entry_id}")
-async def update_journal_endpoint(
+def update_journal_endpoint(
     entry_id: str,
     title: Optional[str] = None,
     content: Optional[str] = None,
     metadata: Optional[Dict[str, Any]] = None,
-    user: User = Depends(get_current_user),
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
     """Update journal entry"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     result = update_journal_entry(entry_id, user.id, title, content, metadata, db)
     if not result:
         raise HTTPException(status_code=404, detail="Entry not found")
     return result
 
 @app.delete("/api/v1/journal/{entry_id}")
-async def delete_journal_endpoint(
+def delete_journal_endpoint(
     entry_id: str,
-    user: User = Depends(get_current_user),
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
     """Delete journal entry"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     if delete_journal_entry(entry_id, user.id, db):
         return {"status": "deleted"}
     raise HTTPException(status_code=404, detail="Entry not found")
 
 # Stats Routes
 @app.get("/api/v1/stats")
-async def get_stats_endpoint(
-    user: User = Depends(get_current_user),
+def get_stats_endpoint(
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
     """Get user stats"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     return get_user_stats(user.id, db)
 
+# Aggregate stats only change when a hike ends or a discovery is captured
+STATS_CACHE_TTL = 60  # seconds
+STATS_CACHE_NAMES = ("profile", "dashboard")
+
+
+def _stats_cache_key(name: str, user_id: str) -> str:
+    return f"stats:{name}:{user_id}"
+
+
+def invalidate_user_stats_cache(user_id: Optional[str]) -> None:
+    """Drop cached profile/dashboard stats for a user"""
+    if not user_id:
+        return
+    for name in STATS_CACHE_NAMES:
+        redis_client.delete(_stats_cache_key(name, user_id))
+
 @app.get("/api/v1/profile/stats")
-async def get_profile_stats_endpoint(
-    user: User = Depends(get_current_user),
+def get_profile_stats_endpoint(
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
     """Get comprehensive user profile statistics with achievements and park badges"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    from backend.achievements_service import get_user_stats as get_achievement_stats
-    return get_achievement_stats(user.id, db)
+    cache_key = _stats_cache_key("profile", user.id)
+    cached = redis_client.get(cache_key)
+    if cached is not None:
+        return cached
+    result = jsonable_encoder(get_achievement_stats(user.id, db))
+    redis_client.set(cache_key, result, ttl=STATS_CACHE_TTL)
+    return result
 
 @app.get("/api/v1/dashboard/stats")
-async def get_dashboard_stats_endpoint(
-    user: User = Depends(get_current_user),
+def get_dashboard_stats_endpoint(
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
     """Get comprehensive dashboard statistics for explore page"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    from backend.stats_service import get_dashboard_stats
-    return get_dashboard_stats(user.id, db)
+    cache_key = _stats_cache_key("dashboard", user.id)
+    cached = redis_client.get(cache_key)
+    if cached is not None:
+        return cached
+    result = jsonable_encoder(get_dashboard_stats(user.id, db))
+    redis_client.set(cache_key, result, ttl=STATS_CACHE_TTL)
+    return result
 
 @app.get("/api/v1/hikes/{hike_id}/stats")
-async def get_hike_stats_endpoint(
+def get_hike_stats_endpoint(
     hike_id: str,
-    user: User = Depends(get_current_user),
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
     """Get hike stats"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     result = get_hike_stats(hike_id, user.id, db)
     if not result:
         raise HTTPException(status_code=404, detail="Hike not found")
@@ -3147,44 +3296,38 @@ async def get_hike_stats_endpoint(
 
 # Sync Routes
 @app.post("/api/v1/hikes/{hike_id}/sync")
-async def sync_hike_endpoint(
+def sync_hike_endpoint(
     hike_id: str,
     route_points: Optional[List[Dict[str, Any]]] = None,
     sensor_batches: Optional[List[Dict[str, Any]]] = None,
-    user: User = Depends(get_current_user),
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
     """Sync offline data"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     return sync_offline_data(hike_id, user.id, route_points, sensor_batches, db)
 
 @app.get("/api/v1/hikes/{hike_id}/sync/status")
-async def get_sync_status_endpoint(
+def get_sync_status_endpoint(
     hike_id: str,
-    user: User = Depends(get_current_user),
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
     """Get sync status"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     return get_sync_status(hike_id, user.id, db)
 
 # Search Routes
 @app.get("/api/v1/search/hikes")
-async def search_hikes_endpoint(
+def search_hikes_endpoint(
     query: str = Query(...),
-    user: User = Depends(get_current_user),
+    user: User = Depends(require_user),
     limit: int = 20,
     db: Session = Depends(get_db)
 ):
     """Search hikes"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     return {"hikes": search_hikes(query, user.id, limit, db)}
 
 @app.get("/api/v1/search/places")
-async def search_places_search_endpoint(
+def search_places_search_endpoint(
     query: str = Query(...),
     limit: int = 20,
     db: Session = Depends(get_db)
@@ -3206,20 +3349,14 @@ from backend.ai_services import (
 async def enhance_photo_endpoint(
     image: UploadFile = File(...),
     options: str = Form("{}"),
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    user: User = Depends(require_user),
+    db: Session = Depends(get_db),
+    api_key: str = Depends(require_api_key)
 ):
     """Enhance photo using Nano Banana Pro"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     
     image_data = await image.read()
-    options_dict = json.loads(options)
-    api_key = os.environ.get("API_KEY")
-    
-    if not api_key:
-        raise HTTPException(status_code=500, detail="API key not configured")
-    
+    options_dict = orjson.loads(options)
     result = await enhance_photo_nano_banana(image_data, options_dict, api_key)
     return result
 
@@ -3227,16 +3364,11 @@ async def enhance_photo_endpoint(
 async def generate_video_endpoint(
     hike_id: str,
     options: Dict[str, Any],
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    user: User = Depends(require_user),
+    db: Session = Depends(get_db),
+    api_key: str = Depends(require_api_key)
 ):
     """Generate trail recap video using Veo"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    
-    api_key = os.environ.get("API_KEY")
-    if not api_key:
-        raise HTTPException(status_code=500, detail="API key not configured")
     
     result = await generate_trail_video_veo(hike_id, options, db, api_key)
     return result
@@ -3248,21 +3380,14 @@ class StoryGenerationRequest(BaseModel):
 async def generate_story_endpoint(
     hike_id: str,
     request: StoryGenerationRequest,
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    user: User = Depends(require_user),
+    db: Session = Depends(get_db),
+    api_key: str = Depends(require_api_key)
 ):
     """Generate AI story for hike"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     
     style = request.style
     """Generate AI story for hike"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    
-    api_key = os.environ.get("API_KEY")
-    if not api_key:
-        raise HTTPException(status_code=500, detail="API key not configured")
     
     result = await generate_hike_story(hike_id, style, db, api_key)
     if not result.get("success"):
@@ -3272,16 +3397,11 @@ async def generate_story_endpoint(
 @app.post("/api/v1/hikes/{hike_id}/organize-photos")
 async def organize_photos_endpoint(
     hike_id: str,
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    user: User = Depends(require_user),
+    db: Session = Depends(get_db),
+    api_key: str = Depends(require_api_key)
 ):
     """Organize photos into smart albums"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    
-    api_key = os.environ.get("API_KEY")
-    if not api_key:
-        raise HTTPException(status_code=500, detail="API key not configured")
     
     result = await organize_photos_intelligently(hike_id, db, api_key)
     return result
@@ -3296,32 +3416,21 @@ async def get_insights_endpoint(
     if not user or user.id != user_id:
         raise HTTPException(status_code=401, detail="Unauthorized")
     
-    api_key = os.environ.get("API_KEY")
-    if not api_key:
-        raise HTTPException(status_code=500, detail="API key not configured")
-    
-    result = await get_predictive_insights(user_id, db, api_key)
+    result = await get_predictive_insights(user_id, db, require_api_key())
     return result
 
 @app.post("/api/v1/journal/search")
 async def search_journal_endpoint(
     request: JournalSearchRequest,
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    user: User = Depends(require_user),
+    db: Session = Depends(get_db),
+    api_key: str = Depends(require_api_key)
 ):
     """Natural language search through journal"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
     
     query = request.query
     filters = request.filters
     """Natural language search through journal"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    
-    api_key = os.environ.get("API_KEY")
-    if not api_key:
-        raise HTTPException(status_code=500, detail="API key not configured")
     
     result = await search_journal_natural_language(query, user.id, filters or {}, db, api_key)
     return result
@@ -3361,7 +3470,7 @@ class HikeCompleteRequest(PydanticBaseModel):
     route_points: Optional[List[Dict[str, Any]]] = None
 
 @app.post("/api/v1/hikes/{hike_id}/discoveries/bootstrap")
-async def bootstrap_discoveries(
+def bootstrap_discoveries(
     hike_id: str,
     db: Session = Depends(get_db)
 ):
@@ -3373,7 +3482,7 @@ async def bootstrap_discoveries(
     logger.info(f"[Discoveries] Bootstrapping for hike {hike_id}")
     
     # Get hike details
-    hike = db.query(Hike).filter(Hike.id == hike_id).first()
+    hike = db.get(Hike, hike_id)
     if not hike:
         raise HTTPException(status_code=404, detail="Hike not found")
     
@@ -3381,8 +3490,8 @@ async def bootstrap_discoveries(
     place_id = hike.place_id
     
     # Get trail and place data
-    trail = db.query(Trail).filter(Trail.id == trail_id).first() if trail_id else None
-    place = db.query(Place).filter(Place.id == place_id).first() if place_id else None
+    trail = db.get(Trail, trail_id) if trail_id else None
+    place = db.get(Place, place_id) if place_id else None
     
     # Get coordinates
     base_lat: Optional[float] = None
@@ -3419,76 +3528,77 @@ async def bootstrap_discoveries(
         "count": len(nodes)
     }
 
+# Discovery templates by category; shared by every bootstrap call
+_DISCOVERY_TEMPLATES = {
+    "wildlife": [
+        {"title": "Deer Crossing", "fact": "White-tailed deer are most active at dawn and dusk. Look for tracks in soft soil."},
+        {"title": "Bird Sanctuary", "fact": "Over 50 bird species have been spotted here including red-tailed hawks and blue jays."},
+        {"title": "Squirrel Cache", "fact": "Gray squirrels bury thousands of acorns each fall and can remember most hiding spots."},
+    ],
+    "plant": [
+        {"title": "Ancient Oak Grove", "fact": "These coast live oaks are over 200 years old and support entire ecosystems."},
+        {"title": "Wildflower Meadow", "fact": "California poppies bloom brightest in spring when daytime temperatures reach 60-70°F."},
+        {"title": "Fern Canyon", "fact": "Sword ferns are among the oldest plant families, dating back 300 million years."},
+        {"title": "Redwood Stand", "fact": "Coastal redwoods can live over 2,000 years and grow taller than 350 feet."},
+    ],
+    "geology": [
+        {"title": "Serpentine Outcrop", "fact": "This blue-green rock formed deep in the Earth and supports unique plant communities."},
+        {"title": "Glacial Boulder", "fact": "This erratic was deposited by glaciers during the last ice age, 15,000 years ago."},
+        {"title": "Fossil Bed", "fact": "Marine fossils here indicate this area was once beneath an ancient sea."},
+    ],
+    "landmark": [
+        {"title": "Historic Trail Marker", "fact": "This stone marker was placed by the Civilian Conservation Corps in the 1930s."},
+        {"title": "Scenic Overlook", "fact": "On clear days, visibility from this point can exceed 50 miles."},
+        {"title": "Old Growth Forest", "fact": "Less than 5% of original old-growth forests remain in California."},
+    ],
+    "history": [
+        {"title": "Native American Site", "fact": "This area was inhabited by indigenous peoples for thousands of years."},
+        {"title": "Pioneer Homestead", "fact": "Early settlers established farms here in the 1850s during the Gold Rush era."},
+        {"title": "Railroad Grade", "fact": "This flat section follows an old logging railroad built in the early 1900s."},
+    ],
+    "water": [
+        {"title": "Spring Source", "fact": "This natural spring flows year-round, fed by underground aquifers."},
+        {"title": "Seasonal Creek", "fact": "This creek supports spawning salmon in winter months."},
+        {"title": "Waterfall Vista", "fact": "The waterfall is most impressive after winter rains."},
+    ],
+    "viewpoint": [
+        {"title": "Summit View", "fact": "The highest point on this trail offers 360-degree panoramic views."},
+        {"title": "Valley Overlook", "fact": "From here you can see the entire watershed that feeds the local streams."},
+    ],
+}
+_DISCOVERY_CATEGORIES = tuple(_DISCOVERY_TEMPLATES)
+_DISCOVERY_RARITIES = ("common", "common", "common", "uncommon", "uncommon", "rare")
+_XP_BY_RARITY = {"common": 20, "uncommon": 35, "rare": 50}
+
 def generate_discovery_nodes(hike_id: str, trail_id: str, place: Optional[Place], base_lat: float, base_lng: float) -> List[Dict]:
     """Generate deterministic discovery nodes for a trail"""
-    import random
-    import hashlib
-    
     # Use trail_id for seeded random to be deterministic
     seed = int(hashlib.md5(trail_id.encode()).hexdigest()[:8], 16)
     rng = random.Random(seed)
     
     place_name = place.name if place else "Trail"
     
-    # Discovery templates by category
-    templates = {
-        "wildlife": [
-            {"title": "Deer Crossing", "fact": "White-tailed deer are most active at dawn and dusk. Look for tracks in soft soil."},
-            {"title": "Bird Sanctuary", "fact": "Over 50 bird species have been spotted here including red-tailed hawks and blue jays."},
-            {"title": "Squirrel Cache", "fact": "Gray squirrels bury thousands of acorns each fall and can remember most hiding spots."},
-        ],
-        "plant": [
-            {"title": "Ancient Oak Grove", "fact": "These coast live oaks are over 200 years old and support entire ecosystems."},
-            {"title": "Wildflower Meadow", "fact": "California poppies bloom brightest in spring when daytime temperatures reach 60-70°F."},
-            {"title": "Fern Canyon", "fact": "Sword ferns are among the oldest plant families, dating back 300 million years."},
-            {"title": "Redwood Stand", "fact": "Coastal redwoods can live over 2,000 years and grow taller than 350 feet."},
-        ],
-        "geology": [
-            {"title": "Serpentine Outcrop", "fact": "This blue-green rock formed deep in the Earth and supports unique plant communities."},
-            {"title": "Glacial Boulder", "fact": "This erratic was deposited by glaciers during the last ice age, 15,000 years ago."},
-            {"title": "Fossil Bed", "fact": "Marine fossils here indicate this area was once beneath an ancient sea."},
-        ],
-        "landmark": [
-            {"title": "Historic Trail Marker", "fact": "This stone marker was placed by the Civilian Conservation Corps in the 1930s."},
-            {"title": "Scenic Overlook", "fact": "On clear days, visibility from this point can exceed 50 miles."},
-            {"title": "Old Growth Forest", "fact": "Less than 5% of original old-growth forests remain in California."},
-        ],
-        "history": [
-            {"title": "Native American Site", "fact": "This area was inhabited by indigenous peoples for thousands of years."},
-            {"title": "Pioneer Homestead", "fact": "Early settlers established farms here in the 1850s during the Gold Rush era."},
-            {"title": "Railroad Grade", "fact": "This flat section follows an old logging railroad built in the early 1900s."},
-        ],
-        "water": [
-            {"title": "Spring Source", "fact": "This natural spring flows year-round, fed by underground aquifers."},
-            {"title": "Seasonal Creek", "fact": "This creek supports spawning salmon in winter months."},
-            {"title": "Waterfall Vista", "fact": "The waterfall is most impressive after winter rains."},
-        ],
-        "viewpoint": [
-            {"title": "Summit View", "fact": "The highest point on this trail offers 360-degree panoramic views."},
-            {"title": "Valley Overlook", "fact": "From here you can see the entire watershed that feeds the local streams."},
-        ],
-    }
-    
-    rarities = ["common", "common", "common", "uncommon", "uncommon", "rare"]
-    xp_by_rarity = {"common": 20, "uncommon": 35, "rare": 50}
-    
     nodes = []
-    categories = list(templates.keys())
+    categories = _DISCOVERY_CATEGORIES
+    num_categories = len(categories)
+    choice = rng.choice
+    uniform = rng.uniform
     
     # Generate 8-12 nodes
     num_nodes = rng.randint(8, 12)
+    last_index = num_nodes - 1
     
+    # Draw order matters: the layout per trail must stay the same
     for i in range(num_nodes):
-        category = categories[i % len(categories)]
-        template_list = templates[category]
-        template = rng.choice(template_list)
-        rarity = rng.choice(rarities)
+        category = categories[i % num_categories]
+        template = choice(_DISCOVERY_TEMPLATES[category])
+        rarity = choice(_DISCOVERY_RARITIES)
         
         # Distribute nodes along a simulated trail path
-        t = i / (num_nodes - 1) if num_nodes > 1 else 0.5
+        t = i / last_index
         # Create a winding path
-        offset_lat = (t * 0.02) + rng.uniform(-0.002, 0.002)
-        offset_lng = (rng.uniform(-0.01, 0.01)) + (t * 0.01)
+        offset_lat = (t * 0.02) + uniform(-0.002, 0.002)
+        offset_lng = uniform(-0.01, 0.01) + (t * 0.01)
         
         node = {
             "id": f"{hike_id}-node-{i}",
@@ -3500,7 +3610,7 @@ def generate_discovery_nodes(hike_id: str, trail_id: str, place: Optional[Place]
             "lng": base_lng + offset_lng,
             "shortFact": template["fact"],
             "rarity": rarity,
-            "xp": xp_by_rarity[rarity],
+            "xp": _XP_BY_RARITY[rarity],
             "source": "curated",
         }
         nodes.append(node)
@@ -3508,17 +3618,17 @@ def generate_discovery_nodes(hike_id: str, trail_id: str, place: Optional[Place]
     return nodes
 
 @app.get("/api/v1/hikes/{hike_id}/discoveries")
-async def get_hike_discoveries(
+def get_hike_discoveries(
     hike_id: str,
     db: Session = Depends(get_db)
 ):
     """Get discoveries for a hike with capture status"""
-    hike = db.query(Hike).filter(Hike.id == hike_id).first()
+    hike = db.get(Hike, hike_id)
     if not hike:
         raise HTTPException(status_code=404, detail="Hike not found")
     
     # Get all discoveries for this hike from meta_data or regenerate
-    meta = hike.meta_data if isinstance(hike.meta_data, dict) else {}
+    meta = hike.safe_meta
     nodes = meta.get("discovery_nodes", [])
     captures = meta.get("discovery_captures", [])
     
@@ -3547,28 +3657,29 @@ async def capture_discovery(
     """Capture a discovery during a hike"""
     logger.info(f"[Discoveries] Capturing node {node_id} for hike {hike_id}")
     
-    hike = db.query(Hike).filter(Hike.id == hike_id).first()
+    hike = db.get(Hike, hike_id)
     if not hike:
         raise HTTPException(status_code=404, detail="Hike not found")
     
+    now = _utcnow()
+    
     # Handle photo upload
     photo_url = None
     if photo:
-        try:
-            contents = await photo.read()
-            filename = f"captures/{hike_id}/{node_id}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.jpg"
-            save_local_file(filename, contents)
+        filename = f"captures/{hike_id}/{node_id}_{now.strftime('%Y%m%d_%H%M%S')}.jpg"
+        # Copy the spooled upload in chunks off the event loop instead of buffering it
+        if await asyncio.to_thread(save_local_stream, filename, photo.file) is not None:
             photo_url = f"/uploads/{filename}"
-        except Exception as e:
-            logger.warning(f"Failed to save capture photo: {e}")
+        else:
+            logger.warning(f"Failed to save capture photo for node {node_id}")
     
     # Create capture record
     capture = {
-        "id": f"capture-{hike_id}-{node_id}-{datetime.utcnow().timestamp()}",
+        "id": f"capture-{hike_id}-{node_id}-{time.time_ns()}",
         "nodeId": node_id,
         "hikeId": hike_id,
         "userId": str(hike.user_id) if hike.user_id else "anonymous",
-        "capturedAt": datetime.utcnow().isoformat(),
+        "capturedAt": now.isoformat(),
         "category": category,
         "note": note,
         "confidence": confidence,
@@ -3576,14 +3687,14 @@ async def capture_discovery(
         "photoUrl": photo_url,
     }
     
-    # Update hike meta_data
-    meta = hike.meta_data if isinstance(hike.meta_data, dict) else {}
-    captures = meta.get("discovery_captures", [])
-    captures.append(capture)
+    # Update hike meta_data with fresh containers; in-place edits are invisible to the ORM
+    meta = dict(hike.meta_data) if isinstance(hike.meta_data, dict) else {}
+    captures = meta.get("discovery_captures", []) + [capture]
     meta["discovery_captures"] = captures
     hike.meta_data = meta
     
     db.commit()
+    invalidate_user_stats_cache(hike.user_id)
     
     # Check for badges
     badges = check_discovery_badges(hike_id, captures, db)
@@ -3598,6 +3709,7 @@ async def capture_discovery(
 def check_discovery_badges(hike_id: str, captures: List[Dict], db: Session) -> List[Dict]:
     """Check if any badges should be awarded"""
     badges = []
+    earned_at = _utcnow().isoformat()
     
     # First capture badge
     if len(captures) == 1:
@@ -3608,7 +3720,7 @@ def check_discovery_badges(hike_id: str, captures: List[Dict], db: Session) -> L
             "description": "Made your first discovery!",
             "icon": "⭐",
             "xp": 50,
-            "earnedAt": datetime.utcnow().isoformat()
+            "earnedAt": earned_at
         })
     
     # Triple capture badge
@@ -3620,17 +3732,13 @@ def check_discovery_badges(hike_id: str, captures: List[Dict], db: Session) -> L
             "description": "Captured 3 discoveries in one hike",
             "icon": "🎯",
             "xp": 100,
-            "earnedAt": datetime.utcnow().isoformat()
+            "earnedAt": earned_at
         })
     
-    # Category master badge
-    category_counts: Dict[str, int] = {}
-    for c in captures:
-        cat = c.get("category", "unknown")
-        category_counts[cat] = category_counts.get(cat, 0) + 1
-    
-    for cat, count in category_counts.items():
-        if count == 3:
+    # Category master badge: only the newest capture's category can have just reached 3
+    if captures:
+        cat = captures[-1].get("category", "unknown")
+        if sum(1 for c in captures if c.get("category", "unknown") == cat) == 3:
             badges.append({
                 "id": f"badge-category-{cat}-{hike_id}",
                 "type": "category_master",
@@ -3638,38 +3746,39 @@ def check_discovery_badges(hike_id: str, captures: List[Dict], db: Session) -> L
                 "description": f"Captured 3 {cat} discoveries",
                 "icon": "🏆",
                 "xp": 150,
-                "earnedAt": datetime.utcnow().isoformat()
+                "earnedAt": earned_at
             })
     
     return badges
 
 @app.post("/api/v1/hikes/{hike_id}/complete")
-async def complete_hike(
+def complete_hike(
     hike_id: str,
     request: HikeCompleteRequest,
+    user: Optional[User] = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Complete a hike and award final badges"""
     logger.info(f"[Hike] Completing hike {hike_id}")
     
-    hike = db.query(Hike).filter(Hike.id == hike_id).first()
-    if not hike:
+    hike = db.get(Hike, hike_id)
+    if not hike or (hike.user_id and (not user or hike.user_id != user.id)):
         raise HTTPException(status_code=404, detail="Hike not found")
     
-    # Update hike stats
-    meta = hike.meta_data if isinstance(hike.meta_data, dict) else {}
+    now = _utcnow()
+    earned_at = now.isoformat()
+    
+    # Build a fresh dict: mutating the loaded JSON in place is invisible to the ORM
+    meta = dict(hike.meta_data) if isinstance(hike.meta_data, dict) else {}
     meta["distance_meters"] = request.distance_meters
     meta["duration_seconds"] = request.duration_seconds
     meta["elevation_gain_meters"] = request.elevation_gain_meters
     meta["captures_count"] = request.captures
-    meta["completed_at"] = datetime.utcnow().isoformat()
+    meta["completed_at"] = earned_at
     
     if request.route_points:
         meta["route_points"] = request.route_points
     
-    hike.meta_data = meta
-    hike.end_time = datetime.utcnow()
-    
     # Award completion badges
     badges = []
     badges.append({
@@ -3679,7 +3788,7 @@ async def complete_hike(
         "description": "Completed a hike",
         "icon": "🥾",
         "xp": 75,
-        "earnedAt": datetime.utcnow().isoformat()
+        "earnedAt": earned_at
     })
     
     # Distance milestone
@@ -3691,28 +3800,29 @@ async def complete_hike(
             "description": "Hiked more than 5 miles",
             "icon": "🏃",
             "xp": 100,
-            "earnedAt": datetime.utcnow().isoformat()
+            "earnedAt": earned_at
         })
     
-    # Store badges
     meta["earned_badges"] = meta.get("earned_badges", []) + badges
-    hike.meta_data = meta
     
     # Check for park badge
     park_badge = None
-    place = db.query(Place).filter(Place.id == hike.place_id).first() if hike.place_id else None
+    place = db.get(Place, hike.place_id) if hike.place_id else None
     if place:
         park_badge = {
             "id": f"park-badge-{place.id}",
             "parkId": place.id,
             "parkName": place.name,
             "badgeAssetUrl": "",
-            "unlockedAt": datetime.utcnow().isoformat()
+            "unlockedAt": earned_at
         }
         meta["park_badge"] = park_badge
-        hike.meta_data = meta
     
+    # Single assignment -> single UPDATE of meta_data and end_time
+    hike.meta_data = meta
+    hike.end_time = now
     db.commit()
+    invalidate_user_stats_cache(hike.user_id)
     
     return {
         "success": True,
@@ -3722,33 +3832,32 @@ async def complete_hike(
     }
 
 @app.get("/api/v1/hikes/{hike_id}/summary")
-async def get_hike_summary(
+def get_hike_summary(
     hike_id: str,
     db: Session = Depends(get_db)
 ):
     """Get hike summary for end screen"""
-    hike = db.query(Hike).filter(Hike.id == hike_id).first()
-    if not hike:
+    # One round trip for the hike and its (optional) trail and place
+    row = db.execute(
+        select(Hike, Trail, Place)
+        .outerjoin(Trail, Hike.trail_id == Trail.id)
+        .outerjoin(Place, Hike.place_id == Place.id)
+        .where(Hike.id == hike_id)
+    ).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Hike not found")
+    hike, trail, place = row
     
-    trail = db.query(Trail).filter(Trail.id == hike.trail_id).first() if hike.trail_id else None
-    place = db.query(Place).filter(Place.id == hike.place_id).first() if hike.place_id else None
-    
-    meta = hike.meta_data if isinstance(hike.meta_data, dict) else {}
+    meta = hike.safe_meta
     captures = meta.get("discovery_captures", [])
     nodes = meta.get("discovery_nodes", [])
     badges = meta.get("earned_badges", [])
     park_badge = meta.get("park_badge")
     
-    # Calculate total XP
+    # Calculate total XP; captures only score when they match a node (first wins)
     total_xp = sum(b.get("xp", 0) for b in badges)
-    for c in captures:
-        # Find matching node to get XP
-        node_id = c.get("nodeId")
-        for n in nodes:
-            if n.get("id") == node_id:
-                total_xp += n.get("xp", 20)
-                break
+    xp_by_node_id = {n.get("id"): n.get("xp", 20) for n in reversed(nodes)}
+    total_xp += sum(xp_by_node_id.get(c.get("nodeId"), 0) for c in captures)
     
     return {
         "hikeId": hike_id,
@@ -3768,45 +3877,45 @@ async def get_hike_summary(
     }
 
 @app.get("/api/v1/profile/badges")
-async def get_user_badges(
-    user: User = Depends(get_current_user),
+def get_user_badges(
+    user: User = Depends(require_user),
     db: Session = Depends(get_db)
 ):
     """Get all badges earned by user"""
-    if not user:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    
-    # Get all hikes for user
-    hikes = db.query(Hike).filter(Hike.user_id == user.id).all()
     
-    all_badges = []
-    park_badges = []
-    
-    for hike in hikes:
-        meta = hike.meta_data if isinstance(hike.meta_data, dict) else {}
-        badges = meta.get("earned_badges", [])
-        all_badges.extend(badges)
-        
-        park_badge = meta.get("park_badge")
-        if park_badge:
-            park_badges.append(park_badge)
+    # Pull only the earned_badges key out of each hike's meta_data instead of whole rows
+    badge_lists = db.scalars(
+        select(Hike.meta_data["earned_badges"])
+        .where(Hike.user_id == user.id, Hike.meta_data.isnot(None))
+    ).all()
+    all_badges = [b for badges in badge_lists if isinstance(badges, list) for b in badges]
     
-    # Deduplicate park badges
-    unique_park_badges = {b["parkId"]: b for b in park_badges}.values()
+    # One park badge per park, deduplicated by the database
+    park_id = Hike.meta_data["park_badge"]["parkId"].as_string()
+    park_query = select(Hike.meta_data["park_badge"]).where(Hike.user_id == user.id, park_id.isnot(None))
+    if db.get_bind().dialect.name == "postgresql":
+        park_query = park_query.distinct(park_id).order_by(park_id)
+    else:
+        park_query = park_query.group_by(park_id)
+    park_badges = db.scalars(park_query).all()
     
     return {
         "badges": all_badges,
-        "parkBadges": list(unique_park_badges),
-        "totalCount": len(all_badges) + len(list(unique_park_badges)),
+        "parkBadges": park_badges,
+        "totalCount": len(all_badges) + len(park_badges),
     }
 
 # ======================================
 # OFFLINE MAP PACK ENDPOINTS
 # ======================================
 
+OFFICIAL_MAP_CACHE_TTL = 12 * 60 * 60  # scraped official map URL per park
+
+
 @app.get("/api/v1/parks/{park_id}/official-map")
-async def get_park_official_map(
+def get_park_official_map(
     park_id: str,
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """
@@ -3815,48 +3924,58 @@ async def get_park_official_map(
     """
     from backend.official_map_service import OfficialMapService
     
-    place = db.query(Place).filter(Place.id == park_id).first()
-    if not place:
-        raise HTTPException(status_code=404, detail="Park not found")
-    
-    # Extract optional hints for better scraping/fallbacks
-    meta = place.meta_data if isinstance(place.meta_data, dict) else {}
-    website_url = meta.get("website") or meta.get("url") or meta.get("website_url")
-    loc = place.location if isinstance(place.location, dict) else {}
-    lat = loc.get("lat") or loc.get("latitude")
-    lng = loc.get("lng") or loc.get("longitude")
+    cache_key = f"park:officialmap:{park_id}"
+    result = redis_client.get(cache_key)
+    if result is None:
+        place = db.get(Place, park_id)
+        if not place:
+            raise HTTPException(status_code=404, detail="Park not found")
+        
+        # Extract optional hints for better scraping/fallbacks
+        meta = place.meta_data if isinstance(place.meta_data, dict) else {}
+        website_url = meta.get("website") or meta.get("url") or meta.get("website_url")
+        loc = place.location if isinstance(place.location, dict) else {}
+        lat = loc.get("lat") or loc.get("latitude")
+        lng = loc.get("lng") or loc.get("longitude")
 
-    try:
-        asset = OfficialMapService().fetch_official_map_asset(
-            place.name,
-            website_url=website_url,
-            lat=lat,
-            lng=lng,
-        )
-        if asset and asset.get("success") and asset.get("map_url"):
-            # Backwards compatible response: keep pdfUrl but also return mapUrl + assetType.
-            return {
-                "success": True,
-                "pdfUrl": asset.get("map_url"),
-                "mapUrl": asset.get("map_url"),
-                "assetType": asset.get("asset_type"),  # 'pdf' | 'image'
-                "sourceName": asset.get("source", "Offline Map"),
-                "mapType": asset.get("map_type", "overview"),
-                "method": asset.get("method"),
-                "lastFetchedAt": asset.get("fetched_at") or datetime.utcnow().isoformat(),
-                "parkName": asset.get("place_name") or place.name,
-            }
-    except Exception as e:
-        logger.warning(f"Failed to fetch offline map asset for {place.name}: {e}")
+        try:
+            asset = OfficialMapService().fetch_official_map_asset(
+                place.name,
+                website_url=website_url,
+                lat=lat,
+                lng=lng,
+            )
+            if asset and asset.get("success") and asset.get("map_url"):
+                # Backwards compatible response: keep pdfUrl but also return mapUrl + assetType.
+                result = {
+                    "success": True,
+                    "pdfUrl": asset.get("map_url"),
+                    "mapUrl": asset.get("map_url"),
+                    "assetType": asset.get("asset_type"),  # 'pdf' | 'image'
+                    "sourceName": asset.get("source", "Offline Map"),
+                    "mapType": asset.get("map_type", "overview"),
+                    "method": asset.get("method"),
+                    "lastFetchedAt": asset.get("fetched_at") or datetime.utcnow().isoformat(),
+                    "parkName": asset.get("place_name") or place.name,
+                }
+                # The scrape and its HEAD checks are the expensive part; reuse the result
+                redis_client.set(cache_key, result, ttl=OFFICIAL_MAP_CACHE_TTL)
+        except Exception as e:
+            logger.warning(f"Failed to fetch offline map asset for {place.name}: {e}")
 
-    return {
-        "success": False,
-        "pdfUrl": None,
-        "mapUrl": None,
-        "assetType": None,
-        "sourceName": None,
-        "message": "No offline map asset available for this park",
-    }
+    if result is None:
+        result = {
+            "success": False,
+            "pdfUrl": None,
+            "mapUrl": None,
+            "assetType": None,
+            "sourceName": None,
+            "message": "No offline map asset available for this park",
+        }
+    # lastFetchedAt moves on every re-scrape even when the map itself hasn't changed
+    return _etag_json_response(
+        request, result, etag_source={k: v for k, v in result.items() if k != "lastFetchedAt"}
+    )
 
 
 # ======================================
@@ -3864,30 +3983,31 @@ async def get_park_official_map(
 # ======================================
 
 @app.get("/api/v1/parks/{park_id}/offline-maps")
-async def list_offline_maps_for_park(
+def list_offline_maps_for_park(
     park_id: str,
     db: Session = Depends(get_db),
 ):
     """
     List offline map assets for a park (status + metadata).
     """
-    place = db.query(Place).filter(Place.id == park_id).first()
-    if not place:
+    # Park name and its assets in one round trip; a park without assets yields (name, None)
+    rows = db.execute(
+        select(Place.name, OfflineMapAsset)
+        .outerjoin(OfflineMapAsset, OfflineMapAsset.park_id == Place.id)
+        .where(Place.id == park_id)
+        .order_by(OfflineMapAsset.created_at.desc())
+    ).all()
+    if not rows:
         raise HTTPException(status_code=404, detail="Park not found")
 
-    assets = (
-        db.query(OfflineMapAsset)
-        .filter(OfflineMapAsset.park_id == park_id)
-        .order_by(OfflineMapAsset.created_at.desc())
-        .all()
-    )
-    from backend.offline_maps_service import serialize_asset
-    return {
+    assets = [asset for _, asset in rows if asset is not None]
+    # Returning a Response skips jsonable_encoder; the payload is already plain JSON
+    return ORJSONResponse({
         "success": True,
         "parkId": park_id,
-        "parkName": place.name,
+        "parkName": rows[0][0],
         "assets": [serialize_asset(a) for a in assets],
-    }
+    })
 
 
 @app.post("/api/v1/parks/{park_id}/offline-maps/download")
@@ -3899,237 +4019,278 @@ async def download_offline_maps_for_park_endpoint(
     Resolve + download official printable maps (PDF/JPG) for a park.
     Returns updated statuses.
     """
-    from backend.offline_maps_service import download_offline_maps_for_park
     return await download_offline_maps_for_park(park_id, db)
 
 
 @app.get("/api/v1/offline-maps/{asset_id}/file")
-async def get_offline_map_file(
+def get_offline_map_file(
     asset_id: str,
+    request: Request,
     db: Session = Depends(get_db),
 ):
     """
     Stream the downloaded offline map file.
     """
-    asset = db.query(OfflineMapAsset).filter(OfflineMapAsset.id == asset_id).first()
+    asset = db.get(OfflineMapAsset, asset_id)
     if not asset:
         raise HTTPException(status_code=404, detail="Offline map asset not found")
     if asset.status != "downloaded" or not asset.local_path:
         raise HTTPException(status_code=409, detail="Offline map not downloaded")
 
     file_path = pathlib.Path(asset.local_path)
-    if not file_path.exists():
+    try:
+        stat_result = file_path.stat()
+    except OSError:
         raise HTTPException(status_code=404, detail="Offline map file missing")
 
     media_type = "application/pdf" if asset.file_type == "pdf" else "application/octet-stream"
-    return FileResponse(str(file_path), media_type=media_type, filename=file_path.name)
+    accel_uri = accel_redirect_uri(asset.local_path)
+    if accel_uri:
+        # Hand the transfer to nginx (sendfile) instead of copying bytes through the worker
+        return Response(
+            status_code=200,
+            media_type=media_type,
+            headers={
+                "X-Accel-Redirect": accel_uri,
+                "Content-Disposition": f'attachment; filename="{file_path.name}"',
+            },
+        )
+    headers = {"Cache-Control": "public, max-age=86400"}
+    response = FileResponse(
+        str(file_path), media_type=media_type, filename=file_path.name, headers=headers, stat_result=stat_result
+    )
+    etag = response.headers.get("etag")
+    if etag and request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag, **headers})
+    return response
+
+
+# Common park names -> (NPS parkCode, NPS fullName) for major parks
+PARK_INFO_MAP = {
+    "yellowstone": ("yell", "Yellowstone National Park"),
+    "yosemite": ("yose", "Yosemite National Park"),
+    "grand canyon": ("grca", "Grand Canyon National Park"),
+    "zion": ("zion", "Zion National Park"),
+    "acadia": ("acad", "Acadia National Park"),
+    "glacier": ("glac", "Glacier National Park"),
+    "rocky mountain": ("romo", "Rocky Mountain National Park"),
+    "grand teton": ("grte", "Grand Teton National Park"),
+    "olympic": ("olym", "Olympic National Park"),
+    "joshua tree": ("jotr", "Joshua Tree National Park"),
+    "death valley": ("deva", "Death Valley National Park"),
+    "sequoia": ("sequ", "Sequoia & Kings Canyon National Parks"),
+    "kings canyon": ("kica", "Sequoia & Kings Canyon National Parks"),
+    "bryce canyon": ("brca", "Bryce Canyon National Park"),
+    "arches": ("arch", "Arches National Park"),
+    "canyonlands": ("cany", "Canyonlands National Park"),
+    "capitol reef": ("care", "Capitol Reef National Park"),
+    "mesa verde": ("meve", "Mesa Verde National Park"),
+    "great smoky mountains": ("grsm", "Great Smoky Mountains National Park"),
+    "shenandoah": ("shen", "Shenandoah National Park"),
+    "everglades": ("ever", "Everglades National Park"),
+    "big bend": ("bibe", "Big Bend National Park"),
+    "guadalupe mountains": ("gumo", "Guadalupe Mountains National Park"),
+    "carlsbad caverns": ("cave", "Carlsbad Caverns National Park"),
+    "hawaii volcanoes": ("havo", "Hawaiʻi Volcanoes National Park"),
+    "haleakala": ("hale", "Haleakalā National Park"),
+    "denali": ("dena", "Denali National Park & Preserve"),
+    "kenai fjords": ("kefj", "Kenai Fjords National Park"),
+    "redwood": ("redw", "Redwood National and State Parks"),
+    "lassen volcanic": ("lavo", "Lassen Volcanic National Park"),
+    "crater lake": ("crla", "Crater Lake National Park"),
+    "mount rainier": ("mora", "Mount Rainier National Park"),
+    "north cascades": ("noca", "North Cascades National Park"),
+    "badlands": ("badl", "Badlands National Park"),
+    "wind cave": ("wica", "Wind Cave National Park"),
+    "theodore roosevelt": ("thro", "Theodore Roosevelt National Park"),
+    "voyageurs": ("voya", "Voyageurs National Park"),
+    "isle royale": ("isro", "Isle Royale National Park"),
+    "mammoth cave": ("maca", "Mammoth Cave National Park"),
+    "hot springs": ("hosp", "Hot Springs National Park"),
+    "dry tortugas": ("drto", "Dry Tortugas National Park"),
+    "biscayne": ("bisc", "Biscayne National Park"),
+    "congaree": ("cong", "Congaree National Park"),
+    "great sand dunes": ("grsa", "Great Sand Dunes National Park & Preserve"),
+    "black canyon": ("blca", "Black Canyon Of The Gunnison National Park"),
+    "petrified forest": ("pefo", "Petrified Forest National Park"),
+    "saguaro": ("sagu", "Saguaro National Park"),
+    "channel islands": ("chis", "Channel Islands National Park"),
+    "pinnacles": ("pinn", "Pinnacles National Park"),
+}
 
 
-@app.get("/api/v1/places/{place_id}/offline-map/pdf")
-async def download_place_offline_map_pdf(
-    place_id: str,
-    db: Session = Depends(get_db),
-):
-    """
-    Download an official printable PDF map for a place.
+def _derive_park_info(place_name: str) -> Optional[Tuple[str, str]]:
+    """(parkCode, fullName) for the first known park name contained in place_name"""
+    name_lower = place_name.lower()
+    return next((info for park_name, info in PARK_INFO_MAP.items() if park_name in name_lower), None)
 
-    - Resolves an official PDF URL (NPS brochures/maps) when available
-    - Fetches server-side (avoids browser CORS issues)
-    - Streams bytes back to client with attachment headers
+
+OFFLINE_PDF_RESOLVE_TTL = 12 * 60 * 60  # resolved PDF URL whose GET looked like a PDF
+OFFLINE_PDF_MISS_TTL = 60 * 60  # parks with no official PDF
+# Upstream answers that mean the PDF is really gone; only these misses are cached
+OFFLINE_PDF_GONE_STATUSES = (404, 410)
+
+
+# One lookahead per category, tried in order at the start of the URL, so the
+# category priority holds (a URL containing both "sprite" and ".pdf" is a sprite)
+_UPSTREAM_URL_TYPES = ("style.json", "glyph", "sprite", "tile", "pdf", "image")
+_UPSTREAM_URL_TYPE_RE = re.compile(
+    r"(?:(?=.*(style\.json))|(?=.*(glyph))|(?=.*(sprite))"
+    r"|(?=.*(/\{z\}/|/tiles?/|/0/0/0|/1/1/1))|(?=.*(\.pdf))|(?=.*(\.(?:png|jpe?g)\Z)))",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+def _classify_upstream_url(u: str) -> str:
+    m = _UPSTREAM_URL_TYPE_RE.match(u or "")
+    return _UPSTREAM_URL_TYPES[m.lastindex - 1] if m else "unknown"
+
+
+async def _resolve_place_offline_pdf(place: Place, db: Session) -> Dict[str, Any]:
     """
-    place = db.query(Place).filter(Place.id == place_id).first()
-    if not place:
-        raise HTTPException(status_code=404, detail="Place not found")
+    Match a place to an NPS park and find its official PDF URL.
 
+    Returns {"available": True, "parkCode", "pdfUrl"} or the
+    {"available": False, "reason", ...} payload sent back to the client.
+    A miss carries "transient": True when the NPS search could not run
+    (no API key, request failed) and must not be cached.
+    """
+    place_id = place.id
     # Derive parkCode per request from the NPS parks API response
     park_code: Optional[str] = None
     full_name: Optional[str] = None
     match_score: Optional[int] = None
     
-    # Common park name to code mappings for major parks
-    PARK_CODE_MAP = {
-        "yellowstone": "yell",
-        "yosemite": "yose",
-        "grand canyon": "grca",
-        "zion": "zion",
-        "acadia": "acad",
-        "glacier": "glac",
-        "rocky mountain": "romo",
-        "grand teton": "grte",
-        "olympic": "olym",
-        "joshua tree": "jotr",
-        "death valley": "deva",
-        "sequoia": "sequ",
-        "kings canyon": "kica",
-        "bryce canyon": "brca",
-        "arches": "arch",
-        "canyonlands": "cany",
-        "capitol reef": "care",
-        "mesa verde": "meve",
-        "great smoky mountains": "grsm",
-        "shenandoah": "shen",
-        "everglades": "ever",
-        "big bend": "bibe",
-        "guadalupe mountains": "gumo",
-        "carlsbad caverns": "cave",
-        "hawaii volcanoes": "havo",
-        "haleakala": "hale",
-        "denali": "dena",
-        "kenai fjords": "kefj",
-        "redwood": "redw",
-        "lassen volcanic": "lavo",
-        "crater lake": "crla",
-        "mount rainier": "mora",
-        "north cascades": "noca",
-        "badlands": "badl",
-        "wind cave": "wica",
-        "theodore roosevelt": "thro",
-        "voyageurs": "voya",
-        "isle royale": "isro",
-        "mammoth cave": "maca",
-        "hot springs": "hosp",
-        "dry tortugas": "drto",
-        "biscayne": "bisc",
-        "congaree": "cong",
-        "great sand dunes": "grsa",
-        "black canyon": "blca",
-        "petrified forest": "pefo",
-        "saguaro": "sagu",
-        "channel islands": "chis",
-        "pinnacles": "pinn",
-    }
-    
-    try:
-        nps_api_key = os.environ.get("NPS_API_KEY")
-        if nps_api_key and place.name:
-            import requests
-            
-            # First try to derive park code from our local name mapping (faster, more reliable)
-            place_name_lower = place.name.lower()
-            derived_code = None
-            for park_name, code in PARK_CODE_MAP.items():
-                if park_name in place_name_lower:
-                    derived_code = code
-                    break
-            
-            if derived_code:
-                # Verify the derived code is valid by checking NPS API
-                try:
-                    resp = requests.get(
-                        "https://developer.nps.gov/api/v1/parks",
-                        params={"parkCode": derived_code, "api_key": nps_api_key},
-                        timeout=5,  # Shorter timeout for verification
-                    )
-                    if resp.status_code == 200:
-                        parks = resp.json().get("data", []) or []
-                        if parks:
-                            park_code = derived_code
-                            full_name = parks[0].get("fullName", place.name)
-                            match_score = 100
-                            logger.info(f"[OfflineMapPDF] placeId={place_id} derived parkCode='{park_code}' from local map")
-                except Exception as e:
-                    # NPS verification failed, but still use our derived code
-                    park_code = derived_code
-                    full_name = place.name
-                    match_score = 90
-                    logger.info(f"[OfflineMapPDF] placeId={place_id} using derived parkCode='{park_code}' (NPS verify failed: {e})")
-            
-            # Fallback to NPS search if local match didn't work
-            if not park_code:
-                try:
-                    resp = requests.get(
-                        "https://developer.nps.gov/api/v1/parks",
-                        params={"q": place.name, "limit": 20, "api_key": nps_api_key},
-                        timeout=10,
-                    )
-                    if resp.status_code == 200:
-                        parks = resp.json().get("data", []) or []
-                        park_code, full_name, match_score = _select_best_nps_park_code(place.name, parks)
-                except Exception as e:
-                    logger.info(f"[OfflineMapPDF] placeId={place_id} NPS API search failed: {e}")
-    except Exception as e:
-        logger.info(f"[OfflineMapPDF] placeId={place_id} nps_search_failed err={e}")
+    # The curated local map is authoritative for major parks; no NPS call needed
+    park_info = _derive_park_info(place.name) if place.name else None
+    if park_info:
+        park_code, full_name = park_info
+        match_score = 100
+        logger.info(f"[OfflineMapPDF] placeId={place_id} derived parkCode='{park_code}' from local map")
+    
+    # Fallback to NPS search if local match didn't work
+    nps_api_key = os.environ.get("NPS_API_KEY")
+    search_failed = False
+    if not park_code and place.name:
+        if not nps_api_key:
+            search_failed = True
+        else:
+            try:
+                resp = await get_http_client().get(
+                    "https://developer.nps.gov/api/v1/parks",
+                    params={"q": place.name, "limit": 20, "api_key": nps_api_key},
+                    timeout=10,
+                )
+                if resp.status_code == 200:
+                    parks = resp.json().get("data", []) or []
+                    park_code, full_name, match_score = _select_best_nps_park_code(place.name, parks)
+                else:
+                    search_failed = True
+                    logger.info(f"[OfflineMapPDF] placeId={place_id} NPS API search status={resp.status_code}")
+            except Exception as e:
+                search_failed = True
+                logger.info(f"[OfflineMapPDF] placeId={place_id} NPS API search failed: {e}")
 
     logger.info(
         f"[OfflineMapPDF] placeId={place_id} selected parkCode={park_code!r} fullName={full_name!r} score={match_score!r}"
     )
     if not park_code:
-        return JSONResponse(status_code=200, content={"available": False, "reason": "no_nps_match"})
+        if search_failed:
+            return {"available": False, "reason": "no_nps_match", "transient": True}
+        return {"available": False, "reason": "no_nps_match"}
 
     pdf_url = await _resolve_official_pdf_url_for_place(place, park_code=park_code, db=db, full_name=full_name)
     if not pdf_url or not isinstance(pdf_url, str) or not pdf_url.strip():
-        return JSONResponse(status_code=200, content={"available": False, "reason": "no_pdf_found", "parkCode": park_code})
+        return {"available": False, "reason": "no_pdf_found", "parkCode": park_code}
 
     from urllib.parse import urlparse
 
-    safe_name = _safe_filename(place.name)
-    filename = f"{safe_name}-offline-map.pdf"
-
-    def _classify_upstream_url(u: str) -> str:
-        u_l = (u or "").lower()
-        if "style.json" in u_l:
-            return "style.json"
-        if "/glyphs/" in u_l or "glyph" in u_l:
-            return "glyph"
-        if "sprite" in u_l:
-            return "sprite"
-        if "/{z}/" in u_l or "/tiles/" in u_l or "/tile/" in u_l or any(x in u_l for x in ("/0/0/0", "/1/1/1")):
-            return "tile"
-        if u_l.endswith(".pdf") or ".pdf" in u_l:
-            return "pdf"
-        if u_l.endswith(".png") or u_l.endswith(".jpg") or u_l.endswith(".jpeg"):
-            return "image"
-        return "unknown"
-
     # Validate URL is http(s) and looks like a PDF link
     parsed = urlparse(pdf_url)
     if parsed.scheme not in ("http", "https"):
         logger.warning(f"[OfflineMapPDF] placeId={place_id} invalid_scheme url={pdf_url!r}")
-        return JSONResponse(status_code=200, content={"available": False, "reason": "no_pdf_found", "parkCode": park_code})
+        return {"available": False, "reason": "no_pdf_found", "parkCode": park_code}
 
     if "undefined" in pdf_url.lower() or "null" in pdf_url.lower():
         logger.warning(f"[OfflineMapPDF] placeId={place_id} invalid_url_contains_undefined url={pdf_url!r}")
-        return JSONResponse(status_code=200, content={"available": False, "reason": "no_pdf_found", "parkCode": park_code})
+        return {"available": False, "reason": "no_pdf_found", "parkCode": park_code}
 
-    try:
-        logger.info(
-            f"[OfflineMapPDF] placeId={place_id} parkName={place.name!r} resolved_url={pdf_url} "
-            f"url_type={_classify_upstream_url(pdf_url)}"
-        )
-        logger.info(f"[OfflineMapPDF] placeId={place_id} parkCode={park_code!r}")
+    logger.info(
+        f"[OfflineMapPDF] placeId={place_id} parkName={place.name!r} resolved_url={pdf_url} "
+        f"url_type={_classify_upstream_url(pdf_url)}"
+    )
+    logger.info(f"[OfflineMapPDF] placeId={place_id} parkCode={park_code!r}")
 
-        # DISCOVERY STEP: HEAD validate before attempting download
-        head_method = "HEAD"
-        head_status = None
-        head_ct = None
-        try:
-            hr = requests.head(
-                pdf_url,
-                timeout=10,
-                headers={"User-Agent": "EcoTrails/1.0"},
-                allow_redirects=True,
-            )
-            head_status = hr.status_code
-            head_ct = (hr.headers.get("content-type") or "").split(";")[0].strip().lower()
-        except Exception as he:
-            logger.warning(f"[OfflineMapPDF] placeId={place_id} head_failed url={pdf_url} err={he}")
+    return {"available": True, "parkCode": park_code, "pdfUrl": pdf_url}
 
-        logger.info(
-            f"[OfflineMapPDF] placeId={place_id} upstream_check method={head_method} status={head_status} content_type={head_ct!r}"
-        )
 
-        if head_status != 200 or (head_ct and "application/pdf" not in head_ct and ".pdf" not in pdf_url.lower()):
-            # Do not attempt guessed/invalid assets; report unavailability cleanly
-            return JSONResponse(status_code=200, content={"available": False, "reason": "no_pdf_found", "parkCode": park_code})
+@app.get("/api/v1/places/{place_id}/offline-map/pdf")
+async def download_place_offline_map_pdf(
+    place_id: str,
+    forceRefresh: bool = Query(False, description="Re-resolve the PDF URL instead of using the cache"),
+    db: Session = Depends(get_db),
+):
+    """
+    Download an official printable PDF map for a place.
+
+    - Resolves an official PDF URL (NPS brochures/maps) when available
+    - Caches the resolved URL (or the miss) per place in Redis
+    - Fetches server-side (avoids browser CORS issues)
+    - Streams bytes back to client with attachment headers
+    """
+    place = db.get(Place, place_id)
+    if not place:
+        raise HTTPException(status_code=404, detail="Place not found")
 
+    cache_key = f"offlinepdf:resolve:{place_id}"
+    resolved = None if forceRefresh else redis_client.get(cache_key)
+    from_cache = bool(resolved)
+    if from_cache:
+        logger.info(f"[OfflineMapPDF] placeId={place_id} resolve_cache_hit available={resolved.get('available')}")
+    else:
+        try:
+            resolved = await _resolve_place_offline_pdf(place, db)
+        except Exception as e:
+            logger.exception(f"[OfflineMapPDF] placeId={place_id} failed: {e}")
+            return JSONResponse(status_code=200, content={"available": False, "reason": "download_failed"})
+        if not resolved.get("available") and not resolved.get("transient"):
+            redis_client.set(cache_key, resolved, ttl=OFFLINE_PDF_MISS_TTL)
+
+    if not resolved.get("available"):
+        return JSONResponse(status_code=200, content=resolved)
+
+    park_code = resolved.get("parkCode")
+    pdf_url = resolved["pdfUrl"]
+    filename = f"{_safe_filename(place.name)}-offline-map.pdf"
+    no_pdf = {"available": False, "reason": "no_pdf_found", "parkCode": park_code}
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "Cache-Control": "no-store",
+        "X-Offline-Map-Available": "true",
+        "X-Offline-Map-ParkCode": (park_code or ""),
+        "X-Offline-Map-Upstream-Url": pdf_url,
+    }
+
+    # An earlier download (or tee) stored this PDF: serve it from disk
+    stored = db.get(OfflineMapAsset, offline_map_asset_id(place_id, pdf_url))
+    if stored and stored.status == "downloaded" and stored.local_path and os.path.isfile(stored.local_path):
+        logger.info(f"[OfflineMapPDF] placeId={place_id} serving stored asset={stored.id}")
+        accel_uri = accel_redirect_uri(stored.local_path)
+        media_type = "application/pdf" if stored.file_type == "pdf" else "application/octet-stream"
+        if accel_uri:
+            return Response(
+                status_code=200,
+                media_type=media_type,
+                headers={"X-Accel-Redirect": accel_uri, **headers},
+            )
+        return FileResponse(stored.local_path, media_type=media_type, headers=headers)
+
+    try:
+        # One streamed GET doubles as the validation probe: check the status and
+        # content type on the response headers, then stream or bail out
         method = "GET"
-        r = requests.get(
-            pdf_url,
-            stream=True,
-            timeout=20,
-            headers={"User-Agent": "EcoTrails/1.0"},
-            allow_redirects=True,
-        )
+        http = get_http_client()
+        r = await http.send(http.build_request("GET", pdf_url), stream=True)
         upstream_status = r.status_code
         content_type = (r.headers.get("content-type") or "").split(";")[0].strip().lower()
         content_length = r.headers.get("content-length")
@@ -4141,11 +4302,7 @@ async def download_place_offline_map_pdf(
 
         if upstream_status >= 400:
             # Read a small preview of the body for debugging (HTML error pages, etc.)
-            preview = b""
-            try:
-                preview = next(r.iter_content(chunk_size=4096)) or b""
-            except Exception:
-                pass
+            preview = await _read_preview(r, 4096)
             try:
                 preview_txt = preview.decode("utf-8", errors="replace")
             except Exception:
@@ -4154,15 +4311,18 @@ async def download_place_offline_map_pdf(
                 f"[OfflineMapPDF] placeId={place_id} upstream_error method={method} url={pdf_url} "
                 f"status={upstream_status} content_type={content_type!r} body_preview={preview_txt[:500]!r}"
             )
-            return JSONResponse(status_code=200, content={"available": False, "reason": "no_pdf_found", "parkCode": park_code})
+            if upstream_status not in OFFLINE_PDF_GONE_STATUSES:
+                # 429/5xx are transient: report the failure but keep retrying on later requests
+                return JSONResponse(
+                    status_code=200,
+                    content={"available": False, "reason": "download_failed", "parkCode": park_code},
+                )
+            redis_client.set(cache_key, no_pdf, ttl=OFFLINE_PDF_MISS_TTL)
+            return JSONResponse(status_code=200, content=no_pdf)
 
         if "application/pdf" not in content_type and ".pdf" not in pdf_url.lower():
             # Try to read a small preview for debugging
-            preview = b""
-            try:
-                preview = next(r.iter_content(chunk_size=2048)) or b""
-            except Exception:
-                pass
+            preview = await _read_preview(r, 2048)
             try:
                 preview_txt = preview.decode("utf-8", errors="replace")
             except Exception:
@@ -4171,25 +4331,19 @@ async def download_place_offline_map_pdf(
                 f"[OfflineMapPDF] placeId={place_id} non_pdf_upstream method={method} url={pdf_url} "
                 f"content_type={content_type!r} body_preview={preview_txt[:500]!r}"
             )
-            return JSONResponse(status_code=200, content={"available": False, "reason": "no_pdf_found", "parkCode": park_code})
-
-        def _iter_bytes():
-            total = 0
-            for chunk in r.iter_content(chunk_size=1024 * 128):
-                if not chunk:
-                    continue
-                total += len(chunk)
-                yield chunk
-            logger.info(f"[OfflineMapPDF] placeId={place_id} streamed_bytes={total}")
-
-        headers = {
-            "Content-Disposition": f'attachment; filename="{filename}"',
-            "Cache-Control": "no-store",
-            "X-Offline-Map-Available": "true",
-            "X-Offline-Map-ParkCode": (park_code or ""),
-            "X-Offline-Map-Upstream-Url": pdf_url,
-        }
-        return StreamingResponse(_iter_bytes(), media_type="application/pdf", headers=headers)
+            redis_client.set(cache_key, no_pdf, ttl=OFFLINE_PDF_MISS_TTL)
+            return JSONResponse(status_code=200, content=no_pdf)
+
+        if not from_cache:
+            redis_client.set(cache_key, resolved, ttl=OFFLINE_PDF_RESOLVE_TTL)
+
+        # Save a copy while relaying so the next request is served from disk
+        tee = start_offline_map_tee(place_id, pdf_url, content_type)
+        return StreamingResponse(
+            _iter_upstream(r, f"[OfflineMapPDF] placeId={place_id}", tee=tee),
+            media_type="application/pdf",
+            headers=headers,
+        )
     except Exception as e:
         logger.exception(f"[OfflineMapPDF] placeId={place_id} failed: {e}")
         return JSONResponse(status_code=200, content={"available": False, "reason": "download_failed", "parkCode": park_code})
@@ -4199,15 +4353,17 @@ async def download_place_offline_map_pdf(
 # NPS.GOV SCRAPING (STATE + PARK DETAIL)
 # ======================================
 
+# Let browsers/CDNs reuse scraped NPS data for the Redis TTL, then serve stale while revalidating
+NPS_STATE_CACHE_CONTROL = "public, max-age=86400, stale-while-revalidate=86400"
+NPS_PARK_CACHE_CONTROL = "public, max-age=43200, stale-while-revalidate=86400"
+
+
 @app.get("/api/nps/state/{state_code}")
-async def nps_browse_state(state_code: str, forceRefresh: bool = Query(False)):
+async def nps_browse_state(state_code: str, request: Request, forceRefresh: bool = Query(False)):
     """
     Scrape https://www.nps.gov/state/{stateCode}/index.htm and return parks list.
     Cached for 24h unless forceRefresh=true.
     """
-    from backend.redis_client import redis_client
-    from backend.nps_scraper import scrape_state_parks
-
     sc = (state_code or "").strip().lower()
     cache_key = f"nps:state:{sc}"
     ttl = 24 * 60 * 60
@@ -4215,23 +4371,20 @@ async def nps_browse_state(state_code: str, forceRefresh: bool = Query(False)):
     if not forceRefresh:
         cached = redis_client.get(cache_key)
         if cached:
-            return {**cached, "from_cache": True}
+            return _etag_json_response(
+                request, {**cached, "from_cache": True}, cache_control=NPS_STATE_CACHE_CONTROL, etag_source=cached
+            )
 
     data = scrape_state_parks(sc)
     redis_client.set(cache_key, data, ttl=ttl)
-    data["from_cache"] = False
-    return data
-
+    # Tag the scraped data itself so a cached read of it matches this response's ETag
+    return _etag_json_response(
+        request, {**data, "from_cache": False}, cache_control=NPS_STATE_CACHE_CONTROL, etag_source=data
+    )
 
-@app.get("/api/nps/parks/{park_code}")
-async def nps_park_detail(park_code: str, forceRefresh: bool = Query(False)):
-    """
-    Scrape NPS park pages and return a merged park detail object including mapAssets.
-    Cached for 12h unless forceRefresh=true.
-    """
-    from backend.redis_client import redis_client
-    from backend.nps_scraper import scrape_park_detail
 
+async def _get_nps_park_detail(park_code: str, forceRefresh: bool = False) -> Dict[str, Any]:
+    """Scraped NPS park detail, served from the 12h cache unless forceRefresh"""
     pc = (park_code or "").strip().lower()
     cache_key = f"nps:park:{pc}"
     ttl = 12 * 60 * 60
@@ -4247,6 +4400,19 @@ async def nps_park_detail(park_code: str, forceRefresh: bool = Query(False)):
     return data
 
 
+@app.get("/api/nps/parks/{park_code}")
+async def nps_park_detail(park_code: str, request: Request, forceRefresh: bool = Query(False)):
+    """
+    Scrape NPS park pages and return a merged park detail object including mapAssets.
+    Cached for 12h unless forceRefresh=true.
+    """
+    data = await _get_nps_park_detail(park_code, forceRefresh)
+    return _etag_json_response(
+        request, data, cache_control=NPS_PARK_CACHE_CONTROL,
+        etag_source={k: v for k, v in data.items() if k != "from_cache"},
+    )
+
+
 @app.get("/api/nps/parks/{park_code}/offline-map")
 async def nps_park_offline_map(park_code: str, forceRefresh: bool = Query(False)):
     """
@@ -4254,37 +4420,30 @@ async def nps_park_offline_map(park_code: str, forceRefresh: bool = Query(False)
     If no PDF found, return 200 JSON {available:false, reason:'no_pdf_found'}.
     Cached mapAssets (via /api/nps/parks/{parkCode}) for 12h unless forceRefresh=true.
     """
-    from backend.nps_scraper import pick_best_pdf
-
-    detail = await nps_park_detail(park_code, forceRefresh=forceRefresh)
+    detail = await _get_nps_park_detail(park_code, forceRefresh)
     assets = detail.get("mapAssets") or []
     pc = (park_code or "").strip().lower()
     pdf_url = pick_best_pdf(assets, pc)
     if not pdf_url:
         return {"available": False, "reason": "no_pdf_found", "parkCode": pc}
 
-    import requests
-
     safe_name = _safe_filename(pc)
     filename = f"{safe_name}-offline-map.pdf"
-    r = requests.get(pdf_url, stream=True, timeout=20, headers={"User-Agent": "EcoTrails/1.0"}, allow_redirects=True)
-    if r.status_code != 200:
-        return {"available": False, "reason": "no_pdf_found", "parkCode": pc}
-
+    http = get_http_client()
+    r = await http.send(http.build_request("GET", pdf_url), stream=True)
     content_type = (r.headers.get("content-type") or "").lower()
-    if "application/pdf" not in content_type:
+    if r.status_code != 200 or "application/pdf" not in content_type:
+        await r.aclose()
         return {"available": False, "reason": "no_pdf_found", "parkCode": pc}
 
-    def _iter_bytes():
-        for chunk in r.iter_content(chunk_size=1024 * 128):
-            if chunk:
-                yield chunk
-
     headers = {"Content-Disposition": f'attachment; filename="{filename}"', "X-Upstream-Url": pdf_url}
-    return StreamingResponse(_iter_bytes(), media_type="application/pdf", headers=headers)
+    return StreamingResponse(_iter_upstream(r), media_type="application/pdf", headers=headers)
+
+TRAIL_NAVIGATION_CACHE_TTL = 24 * 60 * 60  # keyed on trail/place updated_at, so edits miss the cache
+
 
 @app.get("/api/v1/trails/{trail_id}/navigation")
-async def get_trail_navigation(
+def get_trail_navigation(
     trail_id: str,
     db: Session = Depends(get_db)
 ):
@@ -4292,24 +4451,40 @@ async def get_trail_navigation(
     Get navigation data for starting Google Maps directions to trailhead.
     Returns trailhead coordinates and pre-formatted Google Maps URL.
     """
-    trail = db.query(Trail).filter(Trail.id == trail_id).first()
+    # Apps refetch this on every resume. The trailhead can come from the trail or
+    # its place, so both updated_at stamps version the key; a cheap column read
+    # decides whether the full build can be skipped
+    versions = db.execute(
+        select(Trail.updated_at, Place.updated_at)
+        .outerjoin(Place, Place.id == Trail.place_id)
+        .where(Trail.id == trail_id)
+    ).first()
+    if not versions:
+        raise HTTPException(status_code=404, detail="Trail not found")
+    trail_updated, place_updated = (v.isoformat() if v else "" for v in versions)
+    cache_key = f"trail:navigation:{trail_id}:{trail_updated}:{place_updated}"
+    cached = redis_client.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    trail = db.get(Trail, trail_id)
     if not trail:
         raise HTTPException(status_code=404, detail="Trail not found")
     
     # Get trailhead coordinates from meta_data
     meta = trail.meta_data if isinstance(trail.meta_data, dict) else {}
-    trailhead_lat = meta.get('trailhead_lat') or meta.get('lat')
-    trailhead_lng = meta.get('trailhead_lng') or meta.get('lng')
+    trailhead_lat = _first_set(meta, 'trailhead_lat', 'lat')
+    trailhead_lng = _first_set(meta, 'trailhead_lng', 'lng')
     
     # Fallback to place coordinates if trail doesn't have specific coordinates
-    if not trailhead_lat and trail.place_id:
-        place = db.query(Place).filter(Place.id == trail.place_id).first()
+    if (trailhead_lat is None or trailhead_lng is None) and trail.place_id:
+        place = db.get(Place, trail.place_id)
         if place and place.location:
             loc = place.location if isinstance(place.location, dict) else {}
             trailhead_lat = loc.get('lat')
             trailhead_lng = loc.get('lng')
     
-    if not trailhead_lat or not trailhead_lng:
+    if trailhead_lat is None or trailhead_lng is None:
         raise HTTPException(status_code=404, detail="Trail coordinates not available")
     
     # Convert to float
@@ -4319,7 +4494,7 @@ async def get_trail_navigation(
     # Generate Google Maps URLs for different platforms
     google_maps_url = f"https://www.google.com/maps/dir/?api=1&destination={trailhead_lat},{trailhead_lng}&travelmode=driving"
     
-    return {
+    result = {
         "trail_id": trail_id,
         "trail_name": trail.name,
         "trailhead": {
@@ -4332,28 +4507,43 @@ async def get_trail_navigation(
         "distance_miles": trail.distance_miles,
         "difficulty": trail.difficulty
     }
+    redis_client.set(cache_key, result, ttl=TRAIL_NAVIGATION_CACHE_TTL)
+    return result
+
+TRAIL_ROUTE_CACHE_TTL = 24 * 60 * 60  # simulated routes are deterministic per trail
+
 
 @app.get("/api/v1/trails/{trail_id}/route")
-async def get_trail_route(
+def get_trail_route(
     trail_id: str,
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """
     Get trail route GeoJSON for offline map rendering.
     Generates a simulated route if no stored route exists.
     """
-    trail = db.query(Trail).filter(Trail.id == trail_id).first()
+    trail = db.get(Trail, trail_id)
     if not trail:
         raise HTTPException(status_code=404, detail="Trail not found")
     
+    # The route only depends on the trail row (and its place's location), so
+    # key on its id, length and last update
+    distance_miles = trail.distance_miles or 2.0
+    updated = trail.updated_at.isoformat() if trail.updated_at else ""
+    cache_key = f"trail:route:{trail_id}:{int(distance_miles * 10)}:{updated}"
+    cached = redis_client.get(cache_key)
+    if cached is not None:
+        return _etag_json_response(request, cached)
+    
     # Get trail coordinates from meta_data
     meta = trail.meta_data if isinstance(trail.meta_data, dict) else {}
-    base_lat = meta.get('trailhead_lat') or meta.get('lat') or meta.get('latitude')
-    base_lng = meta.get('trailhead_lng') or meta.get('lng') or meta.get('longitude')
+    base_lat = _first_set(meta, 'trailhead_lat', 'lat', 'latitude')
+    base_lng = _first_set(meta, 'trailhead_lng', 'lng', 'longitude')
     
     # Get place coordinates as fallback
-    if trail.place_id:
-        place = db.query(Place).filter(Place.id == trail.place_id).first()
+    if (base_lat is None or base_lng is None) and trail.place_id:
+        place = db.get(Place, trail.place_id)
         if place and place.location:
             loc = place.location if isinstance(place.location, dict) else {}
             if base_lat is None and loc.get('lat') is not None:
@@ -4365,63 +4555,48 @@ async def get_trail_route(
         raise HTTPException(status_code=404, detail="Trail coordinates not available")
     
     # Generate a simulated trail route (in production, this would come from actual GPS data)
-    import random
-    import hashlib
     
     # Use trail_id as seed for consistent route generation
-    seed = int(hashlib.md5(trail_id.encode()).hexdigest()[:8], 16)
-    rng = random.Random(seed)
+    seed = int.from_bytes(hashlib.blake2b(trail_id.encode(), digest_size=4).digest(), "big")
+    rng = np.random.default_rng(seed)
     
     # Generate route points based on trail distance
-    distance_miles = trail.distance_miles or 2.0
     num_points = max(10, int(distance_miles * 20))  # ~20 points per mile
     
-    coordinates = []
-    current_lat = float(base_lat)
-    current_lng = float(base_lng)
-    
-    for i in range(num_points):
-        # Create a winding path
-        t = i / (num_points - 1) if num_points > 1 else 0
-        
-        # Add some randomness but keep it realistic
-        lat_offset = rng.uniform(-0.0002, 0.0002) + (t * 0.01 * rng.choice([-1, 1]))
-        lng_offset = rng.uniform(-0.0002, 0.0002) + (t * 0.008 * rng.choice([-1, 1]))
-        
-        current_lat = base_lat + lat_offset
-        current_lng = base_lng + lng_offset
-        
-        coordinates.append([current_lng, current_lat])  # GeoJSON is [lng, lat]
-    
-    # Calculate bounding box
-    lats = [c[1] for c in coordinates]
-    lngs = [c[0] for c in coordinates]
+    # Create a winding path: drift away from the trailhead plus some jitter
+    t = np.linspace(0.0, 1.0, num_points)
+    signs = rng.choice([-1, 1], size=(2, num_points))
+    lats = float(base_lat) + rng.uniform(-0.0002, 0.0002, num_points) + t * 0.01 * signs[0]
+    lngs = float(base_lng) + rng.uniform(-0.0002, 0.0002, num_points) + t * 0.008 * signs[1]
+    coordinates = np.column_stack((lngs, lats)).tolist()  # GeoJSON is [lng, lat]
     
     route_geojson = {
         "type": "LineString",
         "coordinates": coordinates
     }
     
-    return {
+    result = {
         "trailId": trail_id,
         "trailName": trail.name,
         "geojson": route_geojson,
         "bounds": {
-            "north": max(lats),
-            "south": min(lats),
-            "east": max(lngs),
-            "west": min(lngs)
+            "north": float(lats.max()),
+            "south": float(lats.min()),
+            "east": float(lngs.max()),
+            "west": float(lngs.min())
         },
         "distance_miles": distance_miles,
         "generated": True  # Indicates this is a simulated route
     }
+    redis_client.set(cache_key, result, ttl=TRAIL_ROUTE_CACHE_TTL)
+    return _etag_json_response(request, result)
 
 # ======================================
 # ACTIVE HIKE MANAGEMENT
 # ======================================
 
 @app.get("/api/v1/hikes/active")
-async def get_active_hike(
+def get_active_hike(
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -4429,26 +4604,27 @@ async def get_active_hike(
     if not user:
         return {"active_hike": None}
     
-    # Find active hike for user
-    active_hike = db.query(Hike).filter(
-        Hike.user_id == user.id,
-        Hike.status == 'active'
-    ).order_by(Hike.start_time.desc()).first()
+    # Find active hike for user, with trail and place names in the same query
+    row = db.execute(
+        select(Hike, Trail.name, Place.name)
+        .outerjoin(Trail, Hike.trail_id == Trail.id)
+        .outerjoin(Place, Hike.place_id == Place.id)
+        .where(Hike.user_id == user.id, Hike.status == 'active')
+        .order_by(Hike.start_time.desc())
+        .limit(1)
+    ).first()
     
-    if not active_hike:
+    if not row:
         return {"active_hike": None}
-    
-    # Get trail and place info
-    trail = db.query(Trail).filter(Trail.id == active_hike.trail_id).first() if active_hike.trail_id else None
-    place = db.query(Place).filter(Place.id == active_hike.place_id).first() if active_hike.place_id else None
+    active_hike, trail_name, place_name = row
     
     return {
         "active_hike": {
             "id": active_hike.id,
             "trail_id": active_hike.trail_id,
-            "trail_name": trail.name if trail else None,
+            "trail_name": trail_name,
             "place_id": active_hike.place_id,
-            "place_name": place.name if place else None,
+            "place_name": place_name,
             "status": active_hike.status,
             "start_time": active_hike.start_time.isoformat() if active_hike.start_time else None,
             "meta_data": active_hike.meta_data
@@ -4459,8 +4635,34 @@ async def get_active_hike(
 # VISION AI ENDPOINTS (Gemini Vision)
 # ======================================
 
+# Cap concurrent Gemini vision calls so bursts queue here instead of tripping 429s
+VISION_CONCURRENCY = int(os.getenv("VISION_CONCURRENCY", "5"))
+_vision_semaphore = asyncio.Semaphore(VISION_CONCURRENCY)
+
+# Identical frames already on their way to Gemini (double taps, client retries), by content hash
+_vision_inflight: Dict[str, asyncio.Future] = {}
+
+
+async def _identify_image_coalesced(image_data: str, location: Optional[Dict[str, float]], context: str) -> Dict[str, Any]:
+    """Run vision_service.identify_image, sharing one Gemini call among concurrent identical requests"""
+    key = hashlib.blake2b(
+        f"{context}|{sorted((location or {}).items())}|{image_data}".encode(), digest_size=16
+    ).hexdigest()
+    task = _vision_inflight.get(key)
+    if task is None:
+        async def run():
+            async with _vision_semaphore:
+                return await vision_service.identify_image(
+                    image_data=image_data, location=location, context=context
+                )
+        task = asyncio.ensure_future(run())
+        _vision_inflight[key] = task
+        task.add_done_callback(lambda _: _vision_inflight.pop(key, None))
+    # One caller disconnecting must not cancel the call the others are waiting on
+    return await asyncio.shield(task)
+
 class VisionIdentifyRequest(BaseModel):
-    image_data: str  # Base64 encoded image
+    image_data: str  # Base64 (or data URL) JPEG, ~q85; PNG is accepted but re-encoded
     hike_id: Optional[str] = None
     location: Optional[Dict[str, float]] = None
     context: Optional[str] = "hiking_trail_discovery"
@@ -4471,15 +4673,10 @@ async def identify_image(request: VisionIdentifyRequest):
     Identify species/objects in an image using Gemini Vision AI.
     Used for live camera discovery during hikes.
     """
-    from backend.vision_service import vision_service
-    
     try:
-        result = await vision_service.identify_image(
-            image_data=request.image_data,
-            location=request.location,
-            context=request.context or "hiking_trail_discovery"
+        return await _identify_image_coalesced(
+            request.image_data, request.location, request.context or "hiking_trail_discovery"
         )
-        return result
     except Exception as e:
         logger.error(f"[Vision] Identification failed: {e}")
         return {
@@ -4489,7 +4686,7 @@ async def identify_image(request: VisionIdentifyRequest):
         }
 
 class EnhancedVisionRequest(BaseModel):
-    image_data: str
+    image_data: str  # Base64 (or data URL) JPEG, ~q85; PNG is accepted but re-encoded
     hike_id: Optional[str] = None
     location: Optional[Dict[str, float]] = None
 
@@ -4503,46 +4700,51 @@ async def vision_identify_enhanced(
     Enhanced vision identification with multi-agent analysis.
     Uses Observer, Spatial, and Bard agents for comprehensive results.
     """
-    from backend.vision_service import vision_service
-    
     # Get hike context if provided
     hike_context = {}
     if request.hike_id:
-        hike = db.query(Hike).filter(Hike.id == request.hike_id, Hike.user_id == user.id).first()
+        hike = _get_owned_hike(db, request.hike_id, user.id)
         if hike:
-            hike_meta = hike.meta_data if isinstance(hike.meta_data, dict) else {}
+            hike_meta = hike.safe_meta
             hike_context = {
-                'duration_minutes': (datetime.utcnow() - hike.start_time).total_seconds() / 60 if hike.start_time else 0,
+                'duration_minutes': (_utcnow() - hike.start_time).total_seconds() / 60 if hike.start_time else 0,
                 'discoveries_so_far': len(hike_meta.get('discovery_captures', []))
             }
     
     try:
-        result = await vision_service.identify_image_enhanced(
-            image_data=request.image_data,
-            location=request.location,
-            hike_context=hike_context
-        )
+        async with _vision_semaphore:
+            result = await vision_service.identify_image_enhanced(
+                image_data=request.image_data,
+                location=request.location,
+                hike_context=hike_context
+            )
         return result
     except Exception as e:
         logger.error(f"[Vision] Enhanced identification failed: {e}")
-        # Fallback to basic identification
-        return await vision_service.identify_image(
-            image_data=request.image_data,
-            location=request.location,
-            context="hiking_trail_discovery"
-        )
+        # Static fallback rather than a second Gemini call that would pile onto an outage
+        return vision_service.fallback_result()
 
 class SpeciesHintsRequest(BaseModel):
     location: Dict[str, float]
     season: Optional[str] = None
 
+# Static, so serialized once at import rather than on every failed request
+_SPECIES_HINTS_FALLBACK_BYTES = orjson.dumps({
+    "success": True,
+    "hints": [
+        {"name": "Oak Tree", "category": "plant", "likelihood": "high", "hint": "Look for lobed leaves", "xp": 20},
+        {"name": "Songbird", "category": "bird", "likelihood": "high", "hint": "Listen for melodic calls", "xp": 25},
+        {"name": "Wildflower", "category": "plant", "likelihood": "medium", "hint": "Check sunny clearings", "xp": 30},
+        {"name": "Deer", "category": "animal", "likelihood": "medium", "hint": "Watch meadows at dawn/dusk", "xp": 45},
+        {"name": "Hawk", "category": "bird", "likelihood": "low", "hint": "Scan the sky near ridges", "xp": 65},
+    ]
+})
+
 @app.post("/api/v1/vision/species-hints")
 async def get_species_hints(request: SpeciesHintsRequest):
     """
     Get species hints for a location - used for field guide and quests.
     """
-    from backend.vision_service import vision_service
-    
     try:
         hints = await vision_service.get_nearby_species_hints(request.location, request.season)
         return {
@@ -4552,16 +4754,7 @@ async def get_species_hints(request: SpeciesHintsRequest):
     except Exception as e:
         logger.error(f"[Vision] Species hints failed: {e}")
         # Return fallback data instead of empty
-        return {
-            "success": True,
-            "hints": [
-                {"name": "Oak Tree", "category": "plant", "likelihood": "high", "hint": "Look for lobed leaves", "xp": 20},
-                {"name": "Songbird", "category": "bird", "likelihood": "high", "hint": "Listen for melodic calls", "xp": 25},
-                {"name": "Wildflower", "category": "plant", "likelihood": "medium", "hint": "Check sunny clearings", "xp": 30},
-                {"name": "Deer", "category": "animal", "likelihood": "medium", "hint": "Watch meadows at dawn/dusk", "xp": 45},
-                {"name": "Hawk", "category": "bird", "likelihood": "low", "hint": "Scan the sky near ridges", "xp": 65},
-            ]
-        }
+        return Response(content=_SPECIES_HINTS_FALLBACK_BYTES, media_type="application/json")
 
 # ======================================
 # DYNAMIC ACTIVITY GENERATION
@@ -4572,14 +4765,14 @@ from backend.activity_generation_service import activity_generation_service
 @app.post("/api/v1/hikes/{hike_id}/generate-activities")
 async def generate_contextual_activities(
     hike_id: str,
-    request: Dict[str, Any],
+    request: Dict[str, Any] = Depends(_json_object_body),
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Generate AI-powered activities based on current context
     """
-    hike = db.query(Hike).filter(Hike.id == hike_id, Hike.user_id == user.id).first()
+    hike = _get_owned_hike(db, hike_id, user.id)
     if not hike:
         raise HTTPException(status_code=404, detail="Hike not found")
     
@@ -4588,18 +4781,20 @@ async def generate_contextual_activities(
     
     # Enrich context with hike data
     context['hike_duration_minutes'] = (
-        (datetime.utcnow() - hike.start_time).total_seconds() / 60
+        (_utcnow() - hike.start_time).total_seconds() / 60
         if hike.start_time else 0
     )
     
     # Get recent discoveries from meta_data
-    hike_meta = hike.meta_data if isinstance(hike.meta_data, dict) else {}
+    hike_meta = hike.safe_meta
     recent_captures = hike_meta.get('discovery_captures', [])
-    context['recent_discoveries'] = [
-        cap.get('species_name', 'Unknown')
-        for cap in recent_captures[-5:]  # Last 5 discoveries
-        if isinstance(cap, dict)
-    ]
+    # Last 5 discoveries, oldest first; walks back from the end and stops at 5
+    recent = list(islice(
+        (cap.get('species_name', 'Unknown') for cap in reversed(recent_captures) if isinstance(cap, dict)),
+        5
+    ))
+    recent.reverse()
+    context['recent_discoveries'] = recent
     
     activities = await activity_generation_service.generate_contextual_activities(
         location, context
@@ -4608,24 +4803,49 @@ async def generate_contextual_activities(
     return {
         "success": True,
         "activities": activities,
-        "generated_at": datetime.utcnow().isoformat()
+        "generated_at": _utcnow().isoformat()
     }
 
 # ======================================
 # CHECKPOINT ENDPOINTS
 # ======================================
 
+TRAIL_CHECKPOINTS_CACHE_TTL = 5 * 60  # checkpoints are read on every trail view and rarely change
+TRAIL_CHECKPOINTS_CACHE_CONTROL = "public, max-age=60, stale-while-revalidate=300"
+
+
 @app.get("/api/v1/trails/{trail_id}/checkpoints")
-async def get_trail_checkpoints(
+def get_trail_checkpoints(
     trail_id: str,
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """Get all checkpoints for a trail"""
-    checkpoints = db.query(TrailCheckpoint).filter(
-        TrailCheckpoint.trail_id == trail_id
-    ).order_by(TrailCheckpoint.sequence_order).all()
+    cache_key = f"trail:checkpoints:{trail_id}"
+    cached = redis_client.get(cache_key)
+    if cached is not None:
+        return _etag_json_response(request, cached, TRAIL_CHECKPOINTS_CACHE_CONTROL)
+    
+    # Plain column rows: nothing here is modified, so skip ORM instance hydration
+    rows = db.execute(
+        select(
+            TrailCheckpoint.id,
+            TrailCheckpoint.name,
+            TrailCheckpoint.description,
+            TrailCheckpoint.sequence_order,
+            TrailCheckpoint.location,
+            TrailCheckpoint.distance_from_start_meters,
+            TrailCheckpoint.elevation_feet,
+            TrailCheckpoint.activities,
+            TrailCheckpoint.photo_url,
+            TrailCheckpoint.difficulty_rating,
+            TrailCheckpoint.estimated_time_minutes,
+        )
+        .where(TrailCheckpoint.trail_id == trail_id)
+        .order_by(TrailCheckpoint.sequence_order)
+    )
     
-    return {
+    result = {
         "trail_id": trail_id,
         "checkpoints": [
             {
@@ -4641,44 +4861,77 @@ async def get_trail_checkpoints(
                 "difficulty_rating": cp.difficulty_rating,
                 "estimated_time_minutes": cp.estimated_time_minutes
             }
-            for cp in checkpoints
+            for cp in rows
         ]
     }
+    redis_client.set(cache_key, result, ttl=TRAIL_CHECKPOINTS_CACHE_TTL)
+    return _etag_json_response(request, result, TRAIL_CHECKPOINTS_CACHE_CONTROL)
+
+def _insert_checkpoint_progress(db: Session, hike_id: str, checkpoint_id: str, now: datetime) -> HikeCheckpointProgress:
+    """Create the checkpoint's progress row unless one exists, and return the stored row.
+
+    Reach and complete-activity can both be first to write; INSERT .. ON CONFLICT
+    DO NOTHING lets whichever lands second reuse the winner's row instead of failing.
+    """
+    values = dict(
+        id=str(uuid.uuid4()),
+        hike_id=hike_id,
+        checkpoint_id=checkpoint_id,
+        reached_at=now,
+        activities_completed=[],
+        xp_earned=0,
+        photos_taken=[],
+        created_at=now,
+        updated_at=now,
+    )
+    dialect_insert = {"postgresql": pg_insert, "sqlite": sqlite_insert}.get(db.get_bind().dialect.name)
+    if dialect_insert is not None:
+        db.execute(
+            dialect_insert(HikeCheckpointProgress)
+            .values(**values)
+            .on_conflict_do_nothing(index_elements=["hike_id", "checkpoint_id"])
+        )
+    else:
+        try:
+            with db.begin_nested():
+                db.add(HikeCheckpointProgress(**values))
+        except IntegrityError:
+            pass
+    return db.execute(
+        select(HikeCheckpointProgress)
+        .where(
+            HikeCheckpointProgress.hike_id == hike_id,
+            HikeCheckpointProgress.checkpoint_id == checkpoint_id
+        )
+        .with_for_update()
+    ).scalar_one()
 
 @app.post("/api/v1/hikes/{hike_id}/checkpoints/{checkpoint_id}/reach")
-async def reach_checkpoint(
+def reach_checkpoint(
     hike_id: str,
     checkpoint_id: str,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Mark checkpoint as reached"""
-    # Verify hike exists and belongs to user
-    hike = db.query(Hike).filter(Hike.id == hike_id, Hike.user_id == user.id).first()
-    if not hike:
-        raise HTTPException(status_code=404, detail="Hike not found")
-    
-    # Get or create progress record
-    progress = db.query(HikeCheckpointProgress).filter(
-        HikeCheckpointProgress.hike_id == hike_id,
-        HikeCheckpointProgress.checkpoint_id == checkpoint_id
+    # Ownership check and progress lookup in one round trip
+    row = db.execute(
+        select(Hike.id, HikeCheckpointProgress)
+        .outerjoin(HikeCheckpointProgress, and_(
+            HikeCheckpointProgress.hike_id == Hike.id,
+            HikeCheckpointProgress.checkpoint_id == checkpoint_id
+        ))
+        .where(Hike.id == hike_id, Hike.user_id == user.id)
+        .limit(1)
     ).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Hike not found")
     
+    progress = row[1]
     if not progress:
-        progress = HikeCheckpointProgress(
-            id=str(uuid.uuid4()),
-            hike_id=hike_id,
-            checkpoint_id=checkpoint_id,
-            reached_at=datetime.utcnow(),
-            activities_completed=[],
-            xp_earned=0,
-            photos_taken=[]
-        )
-        db.add(progress)
-        db.commit()
-        db.refresh(progress)
+        progress = _insert_checkpoint_progress(db, hike_id, checkpoint_id, _utcnow())
     
-    return {
+    result = {
         "success": True,
         "checkpoint_progress": {
             "checkpoint_id": checkpoint_id,
@@ -4687,12 +4940,14 @@ async def reach_checkpoint(
             "xp_earned": progress.xp_earned
         }
     }
+    db.commit()
+    return result
 
 @app.post("/api/v1/hikes/{hike_id}/checkpoints/{checkpoint_id}/complete-activity")
-async def complete_checkpoint_activity(
+def complete_checkpoint_activity(
     hike_id: str,
     checkpoint_id: str,
-    request: Dict[str, Any],
+    request: Dict[str, Any] = Depends(_json_object_body),
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -4703,28 +4958,26 @@ async def complete_checkpoint_activity(
     if not activity_id:
         raise HTTPException(status_code=400, detail="activity_id required")
     
-    # Verify hike exists and belongs to user
-    hike = db.query(Hike).filter(Hike.id == hike_id, Hike.user_id == user.id).first()
-    if not hike:
+    now = _utcnow()
+    
+    # Ownership check, progress lookup and the checkpoint's activities in one round trip
+    row = db.execute(
+        select(Hike.id, HikeCheckpointProgress, TrailCheckpoint.activities)
+        .outerjoin(HikeCheckpointProgress, and_(
+            HikeCheckpointProgress.hike_id == Hike.id,
+            HikeCheckpointProgress.checkpoint_id == checkpoint_id
+        ))
+        .outerjoin(TrailCheckpoint, TrailCheckpoint.id == checkpoint_id)
+        .where(Hike.id == hike_id, Hike.user_id == user.id)
+        .limit(1)
+    ).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Hike not found")
     
     # Get or create progress record
-    progress = db.query(HikeCheckpointProgress).filter(
-        HikeCheckpointProgress.hike_id == hike_id,
-        HikeCheckpointProgress.checkpoint_id == checkpoint_id
-    ).first()
-    
+    _, progress, checkpoint_activities = row
     if not progress:
-        progress = HikeCheckpointProgress(
-            id=str(uuid.uuid4()),
-            hike_id=hike_id,
-            checkpoint_id=checkpoint_id,
-            reached_at=datetime.utcnow(),
-            activities_completed=[],
-            xp_earned=0,
-            photos_taken=[]
-        )
-        db.add(progress)
+        progress = _insert_checkpoint_progress(db, hike_id, checkpoint_id, now)
     
     # Add completed activity
     completed = progress.activities_completed or []
@@ -4733,9 +4986,8 @@ async def complete_checkpoint_activity(
         progress.activities_completed = completed
         
         # Award XP
-        checkpoint = db.query(TrailCheckpoint).get(checkpoint_id)
-        if checkpoint and checkpoint.activities:
-            activity = next((a for a in checkpoint.activities if a.get('id') == activity_id), None)
+        if checkpoint_activities:
+            activity = next((a for a in checkpoint_activities if a.get('id') == activity_id), None)
             if activity:
                 progress.xp_earned += activity.get('xp', 0)
         
@@ -4745,11 +4997,11 @@ async def complete_checkpoint_activity(
             photos.append(proof['photo_url'])
             progress.photos_taken = photos
         
-        progress.updated_at = datetime.utcnow()
-        db.commit()
-        db.refresh(progress)
+        progress.updated_at = now
     
-    return {
+    # Read the result before committing; commit expires the instance and
+    # touching it afterwards would cost another SELECT
+    result = {
         "success": True,
         "checkpoint_progress": {
             "checkpoint_id": checkpoint_id,
@@ -4757,38 +5009,54 @@ async def complete_checkpoint_activity(
             "xp_earned": progress.xp_earned
         }
     }
+    db.commit()
+    return result
 
 @app.get("/api/v1/hikes/{hike_id}/checkpoint-progress")
-async def get_hike_checkpoint_progress(
+def get_hike_checkpoint_progress(
     hike_id: str,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get all checkpoint progress for a hike"""
-    # Verify hike exists and belongs to user
-    hike = db.query(Hike).filter(Hike.id == hike_id, Hike.user_id == user.id).first()
-    if not hike:
-        raise HTTPException(status_code=404, detail="Hike not found")
+    # Ownership check, progress records and checkpoint metadata in one round trip;
+    # an owned hike with no progress yields a single row with NULL progress
+    rows = db.execute(
+        select(Hike.id, HikeCheckpointProgress, TrailCheckpoint.name, TrailCheckpoint.sequence_order)
+        .outerjoin(HikeCheckpointProgress, HikeCheckpointProgress.hike_id == Hike.id)
+        .outerjoin(TrailCheckpoint, TrailCheckpoint.id == HikeCheckpointProgress.checkpoint_id)
+        .where(Hike.id == hike_id, Hike.user_id == user.id)
+        .order_by(TrailCheckpoint.sequence_order)
+        .execution_options(yield_per=200)
+    )
     
-    progress_records = db.query(HikeCheckpointProgress).filter(
-        HikeCheckpointProgress.hike_id == hike_id
-    ).all()
+    # Build the response and its totals in one pass over the streamed rows
+    owned = False
+    progress = []
+    total_xp = 0
+    for _, p, name, sequence in rows:
+        owned = True
+        if p is None:
+            continue
+        total_xp += p.xp_earned or 0
+        progress.append({
+            "checkpoint_id": p.checkpoint_id,
+            "checkpoint_name": name,
+            "sequence": sequence,
+            "reached_at": p.reached_at.isoformat() if p.reached_at else None,
+            "activities_completed": p.activities_completed or [],
+            "xp_earned": p.xp_earned,
+            "photos_taken": p.photos_taken or []
+        })
+    if not owned:
+        raise HTTPException(status_code=404, detail="Hike not found")
     
-    return {
+    return ORJSONResponse({
         "hike_id": hike_id,
-        "progress": [
-            {
-                "checkpoint_id": p.checkpoint_id,
-                "reached_at": p.reached_at.isoformat() if p.reached_at else None,
-                "activities_completed": p.activities_completed or [],
-                "xp_earned": p.xp_earned,
-                "photos_taken": p.photos_taken or []
-            }
-            for p in progress_records
-        ],
-        "total_xp": sum(p.xp_earned for p in progress_records),
-        "total_checkpoints_reached": len(progress_records)
-    }
+        "progress": progress,
+        "total_xp": total_xp,
+        "total_checkpoints_reached": len(progress)
+    })
 
 # ======================================
 # SOCIAL / COMMUNITY ENDPOINTS
@@ -4806,21 +5074,32 @@ class CreatePostRequest(BaseModel):
 class CreateCommentRequest(BaseModel):
     content: str
 
+# New posts and comments should show up right away: always revalidate, the ETag keeps it cheap
+COMMUNITY_FEED_CACHE_CONTROL = "no-cache"
+
+
 @app.get("/api/v1/community/feed")
-async def get_community_feed(
+def get_community_feed(
+    request: Request,
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
     post_type: Optional[str] = Query(None),
     place_id: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; takes precedence over offset"),
     db: Session = Depends(get_db),
 ):
     """Get the community feed"""
-    from backend.social_service import get_feed
-    posts = get_feed(db, limit=limit, offset=offset, post_type=post_type, place_id=place_id)
-    return {"posts": posts, "count": len(posts)}
+    try:
+        posts = get_feed(db, limit=limit, offset=offset, post_type=post_type, place_id=place_id, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    next_cursor = encode_feed_cursor(posts[-1]) if len(posts) == limit else None
+    return _etag_json_response(
+        request, {"posts": posts, "count": len(posts), "next_cursor": next_cursor}, COMMUNITY_FEED_CACHE_CONTROL
+    )
 
 @app.post("/api/v1/community/posts")
-async def create_community_post(
+def create_community_post(
     request: CreatePostRequest,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
@@ -4828,7 +5107,6 @@ async def create_community_post(
     """Create a new community post"""
     if not user:
         raise HTTPException(status_code=401, detail="Authentication required")
-    from backend.social_service import create_post
     post = create_post(
         db,
         user_id=user.id,
@@ -4843,19 +5121,18 @@ async def create_community_post(
     return {"post_id": post.id, "created_at": post.created_at.isoformat()}
 
 @app.get("/api/v1/community/posts/{post_id}")
-async def get_community_post(
+def get_community_post(
     post_id: str,
     db: Session = Depends(get_db),
 ):
     """Get a single post with comments"""
-    from backend.social_service import get_post
     post = get_post(db, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     return post
 
 @app.post("/api/v1/community/posts/{post_id}/comments")
-async def add_post_comment(
+def add_post_comment(
     post_id: str,
     request: CreateCommentRequest,
     user: User = Depends(get_current_user),
@@ -4864,7 +5141,6 @@ async def add_post_comment(
     """Add a comment to a post"""
     if not user:
         raise HTTPException(status_code=401, detail="Authentication required")
-    from backend.social_service import add_comment
     comment = add_comment(db, post_id=post_id, user_id=user.id, content=request.content)
     return {
         "comment_id": comment.id,
@@ -4872,7 +5148,7 @@ async def add_post_comment(
     }
 
 @app.post("/api/v1/community/posts/{post_id}/like")
-async def toggle_post_like(
+def toggle_post_like(
     post_id: str,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
@@ -4880,12 +5156,11 @@ async def toggle_post_like(
     """Toggle like on a post"""
     if not user:
         raise HTTPException(status_code=401, detail="Authentication required")
-    from backend.social_service import toggle_like
     result = toggle_like(db, post_id=post_id, user_id=user.id)
     return result
 
 @app.get("/api/v1/community/posts/{post_id}/liked")
-async def check_post_liked(
+def check_post_liked(
     post_id: str,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
@@ -4893,11 +5168,10 @@ async def check_post_liked(
     """Check if user has liked a post"""
     if not user:
         return {"liked": False}
-    from backend.social_service import check_liked
     return {"liked": check_liked(db, post_id=post_id, user_id=user.id)}
 
 @app.delete("/api/v1/community/posts/{post_id}")
-async def delete_community_post(
+def delete_community_post(
     post_id: str,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
@@ -4905,25 +5179,23 @@ async def delete_community_post(
     """Delete a post (author only)"""
     if not user:
         raise HTTPException(status_code=401, detail="Authentication required")
-    from backend.social_service import delete_post
     success = delete_post(db, post_id=post_id, user_id=user.id)
     if not success:
         raise HTTPException(status_code=404, detail="Post not found or you are not the author")
     return {"deleted": True}
 
 @app.get("/api/v1/community/users/{user_id}/posts")
-async def get_user_community_posts(
+def get_user_community_posts(
     user_id: str,
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
     db: Session = Depends(get_db),
 ):
     """Get posts by a specific user"""
-    from backend.social_service import get_user_posts
     posts = get_user_posts(db, user_id=user_id, limit=limit, offset=offset)
     return {"posts": posts, "count": len(posts)}
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(app, host="0.0.0.0", port=8000, timeout_keep_alive=30)
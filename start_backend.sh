@@ -32,4 +32,4 @@ echo "Starting EcoAtlas backend server..."
 echo "Backend will be available at: http://localhost:8000"
 echo "API docs at: http://localhost:8000/docs"
 echo ""
-.venv/bin/uvicorn main:app --host 0.0.0.0 --port 8000 --reload
+.venv/bin/uvicorn main:app --host 0.0.0.0 --port 8000 --timeout-keep-alive 30 --reload